@@ -1,8 +1,14 @@
+import os
+
 from backend.app.admin.devices_admin_model import DevicesAdmin
 from backend.app.admin.iqos_admin_model import IqosAdmin
 from backend.app.admin.terea_admin_model import TereaAdmin
 from backend.app.admin.category_admin_madel import DevicesCategoryAdmin, IqosCategoryAdmin, TereaCategoryAdmin
 from backend.app.admin.orders_admin_model import OrdersAdmin, OrdersProductAdmin
+from backend.app.admin.customers_admin_model import CustomersAdmin
+from backend.app.admin.slow_queries_admin_view import SlowQueriesAdmin
+from backend.app.admin.admin_operation_middleware import AdminOperationMiddleware
+from backend.core.config import settings
 
 admin_views = [
     DevicesAdmin,
@@ -12,5 +18,11 @@ admin_views = [
     IqosCategoryAdmin,
     TereaCategoryAdmin,
     OrdersAdmin,
-    OrdersProductAdmin
-]
\ No newline at end of file
+    OrdersProductAdmin,
+    CustomersAdmin
+]
+
+if settings.slow_queries.enabled:
+    admin_views.append(SlowQueriesAdmin)
+
+ADMIN_TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), "templates")
@@ -0,0 +1,31 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from backend.core.metrics import db_operation
+
+
+def _admin_operation(scope: Scope) -> str:
+    # "/devices-model/details/5" -> "sqladmin.devices-model.details": без id, чтобы меток было конечное число
+    path = scope["path"]
+    root_path = scope.get("root_path", "")
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    parts = [part for part in path.strip("/").split("/")[:2] if part and not part.isdigit()]
+    return ".".join(["sqladmin", *parts]) if parts else "sqladmin.index"
+
+
+class AdminOperationMiddleware:
+    # Запросы sqladmin идут мимо репозиториев, поэтому метку для метрик и журнала медленных запросов
+    # ставит middleware приложения админки
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = db_operation.set(_admin_operation(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            db_operation.reset(token)
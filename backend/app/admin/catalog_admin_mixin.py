@@ -0,0 +1,42 @@
+from typing import Any, Optional
+
+from sqlalchemy import Select
+from starlette.requests import Request
+
+from backend.app.cache.catalog_cache import catalog_cache
+from backend.app.cache.price_index import price_index
+from backend.app.cache.search_index import search_index
+from backend.app.cache.suggest_index import suggest_index
+from backend.app.cache.totals_cache import totals_cache
+from backend.core.db_helper import db_helper
+
+
+class CatalogCacheAdminMixin:
+    catalog_name: str
+
+    async def count(self, request: Request, stmt: Optional[Select] = None) -> int:
+        # Запрос с поиском или фильтрами приходит готовым stmt и считается как обычно
+        if stmt is not None:
+            return await super().count(request, stmt)
+
+        total = totals_cache.get(self.catalog_name)
+        if total is None:
+            total = await super().count(request)
+            totals_cache.set(self.catalog_name, total)
+        return total
+
+    async def after_model_change(self, data: dict, model: Any, is_created: bool, request: Request) -> None:
+        db_helper.mark_written()
+        catalog_cache.invalidate(self.catalog_name)
+        search_index.upsert(self.catalog_name, model)
+        suggest_index.upsert(self.catalog_name, model)
+        price_index.upsert(self.catalog_name, model)
+        await super().after_model_change(data, model, is_created, request)
+
+    async def after_model_delete(self, model: Any, request: Request) -> None:
+        db_helper.mark_written()
+        catalog_cache.invalidate(self.catalog_name)
+        search_index.remove(self.catalog_name, model.id)
+        suggest_index.remove(self.catalog_name, model.id)
+        price_index.remove(self.catalog_name, model.id)
+        await super().after_model_delete(model, request)
@@ -1,9 +1,11 @@
 from sqladmin import ModelView
 
+from backend.app.admin.catalog_admin_mixin import CatalogCacheAdminMixin
 from backend.core.models import DevicesCategoryModel, IqosCategoryModel, TereaCategoryModel
 
 
-class DevicesCategoryAdmin(ModelView, model=DevicesCategoryModel):
+class DevicesCategoryAdmin(CatalogCacheAdminMixin, ModelView, model=DevicesCategoryModel):
+    catalog_name = "devices_category"
     name = "Категории Devices"
     name_plural = "Таблица категорий Devices"
 
@@ -31,7 +33,8 @@ class DevicesCategoryAdmin(ModelView, model=DevicesCategoryModel):
     page_size_options = [10, 25, 50, 100]
 
 
-class IqosCategoryAdmin(ModelView, model=IqosCategoryModel):
+class IqosCategoryAdmin(CatalogCacheAdminMixin, ModelView, model=IqosCategoryModel):
+    catalog_name = "iqos_category"
     name = "Категории Iqos"
     name_plural = "Таблица категорий Iqos"
 
@@ -59,7 +62,8 @@ class IqosCategoryAdmin(ModelView, model=IqosCategoryModel):
     page_size_options = [10, 25, 50, 100]
 
 
-class TereaCategoryAdmin(ModelView, model=TereaCategoryModel):
+class TereaCategoryAdmin(CatalogCacheAdminMixin, ModelView, model=TereaCategoryModel):
+    catalog_name = "terea_category"
     name = "Категории Terea"
     name_plural = "Таблица категорий Terea"
 
@@ -0,0 +1,58 @@
+from sqladmin import ModelView
+
+from backend.core.models import CustomerModel
+
+
+class CustomersAdmin(ModelView, model=CustomerModel):
+    name = "Покупатель"
+    name_plural = "Таблица с покупателями"
+
+    column_list = [
+        CustomerModel.id,
+        CustomerModel.customer_name,
+        CustomerModel.phone,
+        CustomerModel.orders_count,
+        CustomerModel.total_spent,
+        CustomerModel.first_order_at,
+        CustomerModel.last_order_at,
+    ]
+    # История заказов только на странице покупателя: выборка идёт по индексу (customer_id, id)
+    column_details_list = column_list + [CustomerModel.orders]
+
+    column_searchable_list = [
+        CustomerModel.customer_name,
+        CustomerModel.phone,
+    ]
+    column_sortable_list = [
+        CustomerModel.id,
+        CustomerModel.customer_name,
+        CustomerModel.orders_count,
+        CustomerModel.total_spent,
+        CustomerModel.first_order_at,
+        CustomerModel.last_order_at,
+    ]
+    column_default_sort = [(CustomerModel.last_order_at, True)]
+
+    column_formatters = {
+        CustomerModel.total_spent: lambda m, a: f"{m.total_spent:.2f}"
+    }
+
+    column_labels = {
+        CustomerModel.id: "ID",
+        CustomerModel.customer_name: "Имя (из последнего заказа)",
+        CustomerModel.phone: "Телефон",
+        CustomerModel.orders_count: "Заказов",
+        CustomerModel.total_spent: "Сумма заказов",
+        CustomerModel.first_order_at: "Первый заказ",
+        CustomerModel.last_order_at: "Последний заказ",
+        CustomerModel.orders: "Заказы",
+    }
+
+    # Статистика ведётся при создании заказа через API, вручную её не правят
+    can_create = False
+    can_edit = False
+    can_delete = False
+    can_view_details = True
+
+    page_size = 25
+    page_size_options = [10, 25, 50, 100]
@@ -1,10 +1,12 @@
 from sqladmin import ModelView
 
+from backend.app.admin.catalog_admin_mixin import CatalogCacheAdminMixin
 from backend.core.models import DevicesModel
 from backend.core.models.emun_for_models import ENUM_COLORS
 
 
-class DevicesAdmin(ModelView, model=DevicesModel):
+class DevicesAdmin(CatalogCacheAdminMixin, ModelView, model=DevicesModel):
+    catalog_name = "devices"
     name = "Devices"
     name_plural = "Таблица Devices"
 
@@ -87,6 +89,7 @@ class DevicesAdmin(ModelView, model=DevicesModel):
         "hit": {
             "label": "Хит",
             "description": "Укажите: Да = 1;  Нет = 0",
+            "default": 0,
         },
         "color": {
             "label": "Цвет",
@@ -1,10 +1,12 @@
 from sqladmin import ModelView
 
+from backend.app.admin.catalog_admin_mixin import CatalogCacheAdminMixin
 from backend.core.models import IqosModel
 from backend.core.models.emun_for_models import ENUM_COLORS
 
 
-class IqosAdmin(ModelView, model=IqosModel):
+class IqosAdmin(CatalogCacheAdminMixin, ModelView, model=IqosModel):
+    catalog_name = "iqos"
     name = "Iqos"
     name_plural = "Таблица Iqos"
 
@@ -109,6 +111,7 @@ class IqosAdmin(ModelView, model=IqosModel):
         "hit": {
             "label": "Хит",
             "description": "Укажите: Да = 1;  Нет = 0",
+            "default": 0,
         },
         "exclusive": {
             "label": "Эксклюзив",
@@ -1,7 +1,12 @@
 from decimal import Decimal
+from typing import Any, Optional
 
 from sqladmin import ModelView
+from sqlalchemy import Select
+from starlette.requests import Request
 
+from backend.app.cache.totals_cache import totals_cache
+from backend.app.repositories.orders_repository import OrderRepository
 from backend.core.models import OrderModel, OrderedProductModel
 
 
@@ -61,9 +66,9 @@ class OrdersAdmin(ModelView, model=OrderModel):
         OrderModel.ordered_items: "Заказанные товары"
     }
 
+    # Телефон не редактируется: по нему заказ привязан к покупателю и учтён в его статистике
     form_columns = [
         OrderModel.customer_name,
-        OrderModel.phone_number,
         OrderModel.is_delivery,
         OrderModel.city,
         OrderModel.address,
@@ -74,10 +79,6 @@ class OrdersAdmin(ModelView, model=OrderModel):
             "label": "Имя заказчика",
             "description": "Введите имя заказчика",
         },
-        "phone_number": {
-            "label": "Номер телефона",
-            "description": "Введите номер телефона заказчика",
-        },
         "is_delivery": {
             "label": "Доставка",
             "description": "Отметьте, если заказ с доставкой",
@@ -105,6 +106,24 @@ class OrdersAdmin(ModelView, model=OrderModel):
     page_size = 25
     page_size_options = [10, 25, 50, 100]
 
+    async def count(self, request: Request, stmt: Optional[Select] = None) -> int:
+        # Полный COUNT(*) по Orders на каждой странице заменён кэшированным счётчиком,
+        # который увеличивается при создании заказа через API
+        if stmt is not None:
+            return await super().count(request, stmt)
+
+        total = totals_cache.get("orders")
+        if total is None:
+            total = await super().count(request)
+            totals_cache.set("orders", total)
+        return total
+
+    async def after_model_delete(self, model: Any, request: Request) -> None:
+        totals_cache.invalidate("orders")
+        if model.customer_id is not None:
+            await OrderRepository.subtract_customer_order(model.customer_id, model.total_amount)
+        await super().after_model_delete(model, request)
+
 
 class OrdersProductAdmin(ModelView, model=OrderedProductModel):
     name = "Заказанный товар"
@@ -0,0 +1,25 @@
+from sqladmin import BaseView, expose
+from starlette.requests import Request
+
+from backend.core.config import settings
+from backend.core.slow_query_log import slow_query_log
+
+
+class SlowQueriesAdmin(BaseView):
+    name = "Медленные запросы"
+    icon = "fa-solid fa-stopwatch"
+
+    @expose("/slow-queries", methods=["GET"])
+    async def slow_queries_page(self, request: Request):
+        order_by = request.query_params.get("order_by", "total")
+        return await self.templates.TemplateResponse(
+            request,
+            "slow_queries.html",
+            context={
+                "title": "Медленные запросы",
+                "subtitle": f"Порог {settings.slow_queries.threshold_ms} мс, топ {settings.slow_queries.top_n}",
+                "order_by": order_by,
+                "entries": slow_query_log.top(settings.slow_queries.top_n, order_by),
+                "stats": slow_query_log.stats(),
+            },
+        )
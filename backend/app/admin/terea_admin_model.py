@@ -1,6 +1,7 @@
 from sqladmin import ModelView
 from wtforms import TextAreaField
 
+from backend.app.admin.catalog_admin_mixin import CatalogCacheAdminMixin
 from backend.core.models import TereaModel
 from backend.core.models.emun_for_models import SET_FLAVORS
 
@@ -36,7 +37,8 @@ class MySQLSetField(TextAreaField):
             self.data = None
 
 
-class TereaAdmin(ModelView, model=TereaModel):
+class TereaAdmin(CatalogCacheAdminMixin, ModelView, model=TereaModel):
+    catalog_name = "terea"
     name = "Terea"
     name_plural = "Таблица Terea"
 
@@ -168,6 +170,7 @@ class TereaAdmin(ModelView, model=TereaModel):
         "hit": {
             "label": "Хит",
             "description": "Укажите: Да = 1;  Нет = 0",
+            "default": 0,
         },
         "ref": {
             "label": "Ссылка",
@@ -0,0 +1,61 @@
+import decimal
+from typing import List
+
+from fastapi import Query, Depends, HTTPException
+from starlette import status
+
+from backend.app.api.schemas.filters_schemas import (
+    ProductFilters,
+    ColorEnum,
+    FlavorEnum,
+    StrengthFilterEnum,
+    SortEnum
+)
+
+
+def get_common_filters(
+        price_min: decimal.Decimal | None = Query(None, ge=0, description="Минимальная цена"),
+        price_max: decimal.Decimal | None = Query(None, ge=0, description="Максимальная цена"),
+        nalichie: int | None = Query(None, ge=0, le=1, description="Наличие: 1 - в наличии, 0 - нет"),
+        new: int | None = Query(None, ge=0, le=1, description="Только новинки (1) или только не новинки (0)"),
+        hit: int | None = Query(None, ge=0, le=1, description="Только хиты (1) или только не хиты (0)"),
+        category_id: int | None = Query(None, ge=1, description="ID подкатегории"),
+        sort: SortEnum = Query("id", description="Сортировка: id (новые записи первыми), price_asc, price_desc, new, hit")
+) -> ProductFilters:
+    if price_min is not None and price_max is not None and price_min > price_max:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="price_min не может быть больше price_max"
+        )
+
+    return ProductFilters(
+        price_min=price_min,
+        price_max=price_max,
+        nalichie=nalichie,
+        new=new,
+        hit=hit,
+        category_id=category_id,
+        sort=sort
+    )
+
+
+def get_devices_filters(
+        filters: ProductFilters = Depends(get_common_filters),
+        color: List[ColorEnum] = Query([], description="Цвета")
+) -> ProductFilters:
+    return filters.model_copy(update={"color": color})
+
+
+def get_iqos_filters(
+        filters: ProductFilters = Depends(get_common_filters),
+        color: List[ColorEnum] = Query([], description="Цвета")
+) -> ProductFilters:
+    return filters.model_copy(update={"color": color})
+
+
+def get_terea_filters(
+        filters: ProductFilters = Depends(get_common_filters),
+        flavor: List[FlavorEnum] = Query([], description="Вкусы (подходит товар хотя бы с одним из них)"),
+        strength: List[StrengthFilterEnum] = Query([], description="Крепость")
+) -> ProductFilters:
+    return filters.model_copy(update={"flavor": flavor, "strength": strength})
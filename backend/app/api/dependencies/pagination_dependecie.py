@@ -1,10 +1,30 @@
 from typing import Tuple
 
-from fastapi import Query
+from fastapi import Query, HTTPException
+from starlette import status
+
+from backend.app.api.schemas.filters_schemas import PageCursor
+from backend.app.repositories.catalog_query import decode_cursor
 
 
 def get_pagination(
         skip: int = Query(0, ge=0, description="Количество пропущенных записей"),
         limit: int = Query(50, ge=1, le=1000, description="Лимит записей на странице")
 ) -> Tuple[int, int]:
-    return skip, limit
\ No newline at end of file
+    return skip, limit
+
+
+def get_cursor(
+        cursor: str | None = Query(
+            None,
+            max_length=256,
+            description="Курсор следующей страницы (next_cursor из предыдущего ответа). Если указан, skip игнорируется"
+        )
+) -> PageCursor | None:
+    if cursor is None:
+        return None
+
+    try:
+        return decode_cursor(cursor)
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
@@ -0,0 +1,142 @@
+import logging
+from typing import List, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.app.cache.catalog_cache import catalog_cache
+from backend.app.cache.payload_cache import payload_cache, available_encodings, CachedPayload
+from backend.core.config import settings
+from backend.core.request_timing import timed_phase
+
+
+logger = logging.getLogger(__name__)
+
+
+def _cache_key(scope: Scope) -> str:
+    query = parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)
+    return f"{scope['path']}?{urlencode(sorted(query))}"
+
+
+def _has_param(scope: Scope, names: Sequence[str]) -> bool:
+    query = parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)
+    return any(name in names for name, _ in query)
+
+
+def _header(scope: Scope, header_name: bytes) -> str:
+    for name, value in scope["headers"]:
+        if name == header_name:
+            return value.decode("latin-1")
+    return ""
+
+
+def _cache_control() -> bytes:
+    return (
+        f"public, max-age={settings.cache.http_max_age}, "
+        f"stale-while-revalidate={settings.cache.http_stale_while_revalidate}"
+    ).encode("latin-1")
+
+
+def _choose_encoding(scope: Scope) -> str:
+    accept_encoding = _header(scope, b"accept-encoding").lower()
+
+    accepted = set()
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        if token and params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(token)
+
+    for encoding in available_encodings():
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return "identity"
+
+
+class PayloadCacheMiddleware:
+    def __init__(self, app: ASGIApp, path_prefix: str = "/products", bypass_params: Sequence[str] = ()):
+        self.app = app
+        self.path_prefix = path_prefix
+        # Запросы с этими параметрами всегда идут в роут: это переключатели для замеров, а не другой ответ
+        self.bypass_params = tuple(bypass_params)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+                scope["type"] != "http"
+                or scope["method"] != "GET"
+                or not scope["path"].startswith(self.path_prefix)
+                or not (payload_cache.enabled or settings.cache.http_etag_enabled)
+                or (self.bypass_params and _has_param(scope, self.bypass_params))
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        key = _cache_key(scope)
+        version = catalog_cache.catalog_version
+        encoding = _choose_encoding(scope)
+        if_none_match = _header(scope, b"if-none-match")
+
+        entry = payload_cache.get(key, version)
+        if entry is not None:
+            if entry.route is not None:
+                scope["route"] = entry.route
+            await self._send_payload(send, entry, encoding, if_none_match, [(b"x-cache", b"HIT")])
+            return
+
+        start_message: Message = {}
+        body_parts: List[bytes] = []
+
+        async def capture(message: Message) -> None:
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+            elif message["type"] == "http.response.body":
+                body_parts.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+
+        headers = start_message.get("headers", [])
+        media_type = next((value for name, value in headers if name == b"content-type"), b"")
+        if start_message.get("status") != 200 or not media_type.startswith(b"application/json"):
+            await send(start_message)
+            await send({"type": "http.response.body", "body": b"".join(body_parts)})
+            return
+
+        entry = payload_cache.set(key, b"".join(body_parts), media_type.decode("latin-1"), version, scope.get("route"))
+        extra_headers = [
+            (name, value) for name, value in headers
+            if name not in (b"content-length", b"content-type", b"content-encoding", b"vary", b"cache-control", b"etag")
+        ]
+        await self._send_payload(send, entry, encoding, if_none_match, extra_headers + [(b"x-cache", b"MISS")])
+
+    @staticmethod
+    async def _send_payload(
+            send: Send,
+            entry: CachedPayload,
+            encoding: str,
+            if_none_match: str,
+            extra_headers: List[Tuple[bytes, bytes]]
+    ) -> None:
+        if not entry.can_compress():
+            encoding = "identity"
+
+        headers = [(b"vary", b"Accept-Encoding"), (b"cache-control", _cache_control())]
+        if settings.cache.http_etag_enabled:
+            headers.append((b"etag", entry.etag(encoding).encode("latin-1")))
+
+            if if_none_match and entry.matches(if_none_match):
+                payload_cache.not_modified += 1
+                await send({"type": "http.response.start", "status": 304, "headers": headers + extra_headers})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+        with timed_phase("compress"):
+            body = entry.encoded(encoding)
+        headers += [
+            (b"content-type", entry.media_type.encode("latin-1")),
+            (b"content-length", str(len(body)).encode("latin-1")),
+        ]
+        if encoding != "identity":
+            headers.append((b"content-encoding", encoding.encode("latin-1")))
+
+        await send({"type": "http.response.start", "status": 200, "headers": headers + extra_headers})
+        await send({"type": "http.response.body", "body": body})
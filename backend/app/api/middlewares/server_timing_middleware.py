@@ -0,0 +1,48 @@
+import logging
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.core.config import settings
+from backend.core.request_timing import RequestTiming, request_timing
+
+
+logger = logging.getLogger(__name__)
+
+
+class ServerTimingMiddleware:
+    # Фазы копятся в RequestTiming через контекстную переменную, заголовок добавляется к началу ответа:
+    # к этому моменту тело уже собрано, поэтому в разбивку попадают и pydantic, и JSON
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.timing.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = request_timing.set(timing)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - timing.started
+                # Свой Server-Timing эндпоинта (GET /products) остаётся: заголовок может повторяться
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.server_timing(total).encode("latin-1")))
+                message = {**message, "headers": headers}
+
+                if settings.timing.log_enabled and total * 1000 >= settings.timing.log_min_ms:
+                    durations = timing.durations(total)
+                    logger.info(
+                        "%s %s %s: %s",
+                        scope["method"], scope["path"], message["status"],
+                        ", ".join(f"{phase}={duration:.1f}мс" for phase, duration in durations.items()),
+                        extra={"timing": durations}
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_timing.reset(token)
@@ -1,10 +1,12 @@
 import logging
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Header
 from starlette import status
 
 from backend.app.api.schemas.orders_schemas import OrderResponse, OrderCreate
-from backend.app.services.orders_services import OrdersService
+from backend.app.services.order_queue import OrderQueueFull
+from backend.app.services.orders_services import OrdersService, IdempotencyConflict
+from backend.app.services.serializers import json_response
 
 
 logger = logging.getLogger(__name__)
@@ -12,20 +14,45 @@ router = APIRouter(prefix="/orders", tags=["Заказы"])
 
 
 @router.post("", summary="Создать новый заказ", status_code=status.HTTP_201_CREATED)
-async def create_order(order: OrderCreate) -> OrderResponse:
-    logger.info(f"POST /orders запрос: создание заказа {order.model_dump()}")
+async def create_order(
+        order: OrderCreate,
+        idempotency_key: str | None = Header(
+            None,
+            alias="Idempotency-Key",
+            min_length=1,
+            max_length=128,
+            description="Повтор запроса с тем же ключом вернёт уже созданный заказ"
+        )
+) -> OrderResponse:
+    logger.info("POST /orders запрос: создание заказа %s", order)
     try:
-        result = await OrdersService.create_order(order)
-        logger.info(f"POST /orders успешно: заказ создан с ID {result.order.id}")
-        return result
+        result, is_replay = await OrdersService.create_order(order, idempotency_key)
+        response = json_response(result, status.HTTP_201_CREATED)
+        if is_replay:
+            response.headers["Idempotency-Replayed"] = "true"
+            logger.info("POST /orders повтор: возвращён заказ с ID %s", result.order.id)
+        else:
+            logger.info("POST /orders успешно: заказ создан с ID %s", result.order.id)
+        return response
+    except IdempotencyConflict as error:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(error)
+        )
     except ValueError as error:
-        logger.warning(f"POST /orders ошибка валидации: {str(error)}")
+        logger.warning("POST /orders ошибка валидации: %s", error)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Некорректные данные: {str(error)}"
         )
+    except OrderQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Слишком много заказов, повторите запрос позже",
+            headers={"Retry-After": "1"}
+        )
     except Exception as error:
-        logger.error(f"POST /orders внутренняя ошибка: {str(error)}", exc_info=True)
+        logger.error("POST /orders внутренняя ошибка: %s", error, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Внутренняя ошибка сервера при создании заказа"
@@ -1,41 +1,70 @@
+import asyncio
 import logging
-from typing import Tuple
+import time
+from typing import Tuple, Awaitable, TypeVar, List, Literal
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Path
 from starlette import status
 
-from backend.app.api.dependencies.pagination_dependecie import get_pagination
+from backend.app.api.dependencies.pagination_dependecie import get_pagination, get_cursor
+from backend.app.api.dependencies.filters_dependecie import get_devices_filters, get_iqos_filters, get_terea_filters
 from backend.app.api.schemas import (
     GetDevicesResponse, GetDeviceByIdResponse,
     GetIqosResponse, GetIqosByIdResponse,
     GetTereaResponse, GetTereaByIdResponse,
-    GetAllProductsResponse
+    GetAllProductsResponse,
+    GetProductByRefResponse,
+    ProductsBatchRequest,
+    ProductsBatchResponse,
+    ProductSearchResponse,
+    SuggestResponse,
+    ProductFilters,
+    PageCursor,
+    ViewEnum
 )
 from backend.app.services.products_service import DevicesService
+from backend.app.services.serializers import json_response
+from backend.core.config import settings
 
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 router = APIRouter(prefix="/products", tags=["Products"])
 
 
-@router.get("/devices", summary="Получить все девайсы с пагинацией")
-async def get_devices(pagination: Tuple[int, int] = Depends(get_pagination)) -> GetDevicesResponse:
+async def _timed(awaitable: Awaitable[T]) -> Tuple[T, float]:
+    started = time.perf_counter()
+    result = await awaitable
+    return result, (time.perf_counter() - started) * 1000
+
+
+@router.get("/devices", summary="Получить девайсы с фильтрами, сортировкой и пагинацией")
+async def get_devices(
+        pagination: Tuple[int, int] = Depends(get_pagination),
+        cursor: PageCursor | None = Depends(get_cursor),
+        filters: ProductFilters = Depends(get_devices_filters),
+        include_total: bool = Query(True, description="Считать общее количество записей (false экономит запрос COUNT)"),
+        view: ViewEnum = Query("full", description="full - полные записи, card - компактные карточки без description")
+) -> GetDevicesResponse:
     skip, limit = pagination
-    logger.info(f"GET /products/devices запрос: skip={skip}, limit={limit}")
+    logger.info("GET /products/devices запрос: skip=%s, limit=%s, cursor=%s, filters=%s, view=%s", skip, limit, cursor, filters, view)
     try:
-        result = await DevicesService.get_devices(skip=skip, limit=limit)
-        logger.info(f"GET /products/devices успешно: {len(result.devices)} девайсов возвращено")
-        return result
+        result = await DevicesService.get_devices(
+            skip=skip, limit=limit, cursor=cursor, filters=filters, include_total=include_total, view=view
+        )
+        logger.info("GET /products/devices успешно: %s девайсов возвращено", len(result.devices))
+        return json_response(result)
 
     except ValueError as error:
-        logger.warning(f"GET /products/devices ошибка клиента: {str(error)}")
+        logger.warning("GET /products/devices ошибка клиента: %s", error)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(error)
         )
     except Exception as error:
-        logger.error(f"GET /products/devices внутренняя ошибка: {str(error)}", exc_info=True)
+        logger.error("GET /products/devices внутренняя ошибка: %s", error, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Внутренняя ошибка сервера при получении девайса"
@@ -44,50 +73,58 @@ async def get_devices(pagination: Tuple[int, int] = Depends(get_pagination)) ->
 
 @router.get("/devices/{id}", summary="Получить девайс по id")
 async def get_devices_by_id(devices_id: int) -> GetDeviceByIdResponse:
-    logger.info(f"GET /products/devices/{devices_id} запрос")
+    logger.info("GET /products/devices/%s запрос", devices_id)
     try:
         result = await DevicesService.get_device(devices_id)
-        logger.info(f"GET /products/devices/{devices_id} успешно")
-        return result
+        logger.info("GET /products/devices/%s успешно", devices_id)
+        return json_response(result)
 
     except ValueError as error:
         if "не найден" in str(error).lower():
-            logger.warning(f"GET /products/devices/{devices_id} девайс не найден")
+            logger.warning("GET /products/devices/%s девайс не найден", devices_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Девайс не найден"
             )
 
-        logger.warning(f"GET /products/devices/{devices_id} ошибка клиента: {str(error)}")
+        logger.warning("GET /products/devices/%s ошибка клиента: %s", devices_id, error)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(error)
         )
     except Exception as error:
-        logger.error(f"GET /products/devices/{devices_id} внутренняя ошибка: {str(error)}", exc_info=True)
+        logger.error("GET /products/devices/%s внутренняя ошибка: %s", devices_id, error, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Внутренняя ошибка сервера при получении девайса"
         )
 
 
-@router.get("/iqos", summary="Получить все продукты iqos с пагинацией")
-async def get_iqos(pagination: Tuple[int, int] = Depends(get_pagination)) -> GetIqosResponse:
+@router.get("/iqos", summary="Получить продукты iqos с фильтрами, сортировкой и пагинацией")
+async def get_iqos(
+        pagination: Tuple[int, int] = Depends(get_pagination),
+        cursor: PageCursor | None = Depends(get_cursor),
+        filters: ProductFilters = Depends(get_iqos_filters),
+        include_total: bool = Query(True, description="Считать общее количество записей (false экономит запрос COUNT)"),
+        view: ViewEnum = Query("full", description="full - полные записи, card - компактные карточки без description")
+) -> GetIqosResponse:
     skip, limit = pagination
-    logger.info(f"GET /products/iqos запрос: skip={skip}, limit={limit}")
+    logger.info("GET /products/iqos запрос: skip=%s, limit=%s, cursor=%s, filters=%s, view=%s", skip, limit, cursor, filters, view)
     try:
-        result = await DevicesService.get_iqos_list(skip=skip, limit=limit)
-        logger.info(f"GET /products/iqos успешно: {len(result.iqos)} iqos возвращено")
-        return result
+        result = await DevicesService.get_iqos_list(
+            skip=skip, limit=limit, cursor=cursor, filters=filters, include_total=include_total, view=view
+        )
+        logger.info("GET /products/iqos успешно: %s iqos возвращено", len(result.iqos))
+        return json_response(result)
 
     except ValueError as error:
-        logger.warning(f"GET /products/iqos ошибка клиента: {str(error)}")
+        logger.warning("GET /products/iqos ошибка клиента: %s", error)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(error)
         )
     except Exception as error:
-        logger.error(f"GET /products/iqos внутренняя ошибка: {str(error)}", exc_info=True)
+        logger.error("GET /products/iqos внутренняя ошибка: %s", error, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Внутренняя ошибка сервера при получении iqos"
@@ -96,50 +133,58 @@ async def get_iqos(pagination: Tuple[int, int] = Depends(get_pagination)) -> Get
 
 @router.get("/iqos/{id}", summary="Получить продукт iqos по id")
 async def get_iqos_by_id(iqos_id: int) -> GetIqosByIdResponse:
-    logger.info(f"GET /products/iqos/{iqos_id} запрос")
+    logger.info("GET /products/iqos/%s запрос", iqos_id)
     try:
         result = await DevicesService.get_iqos(iqos_id)
-        logger.info(f"GET /products/iqos/{iqos_id} успешно")
-        return result
+        logger.info("GET /products/iqos/%s успешно", iqos_id)
+        return json_response(result)
 
     except ValueError as error:
         if "не найден" in str(error).lower():
-            logger.warning(f"GET /products/iqos/{iqos_id} продукт iqos не найден")
+            logger.warning("GET /products/iqos/%s продукт iqos не найден", iqos_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Продукт iqos не найден"
             )
 
-        logger.warning(f"GET /products/iqos/{iqos_id} ошибка клиента: {str(error)}")
+        logger.warning("GET /products/iqos/%s ошибка клиента: %s", iqos_id, error)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(error)
         )
     except Exception as error:
-        logger.error(f"GET /products/iqos/{iqos_id} внутренняя ошибка: {str(error)}", exc_info=True)
+        logger.error("GET /products/iqos/%s внутренняя ошибка: %s", iqos_id, error, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Внутренняя ошибка сервера при получении продукта iqos"
         )
 
 
-@router.get("/terea", summary="Получить все продукты terea с пагинацией")
-async def get_terea(pagination: Tuple[int, int] = Depends(get_pagination)) -> GetTereaResponse:
+@router.get("/terea", summary="Получить продукты terea с фильтрами, сортировкой и пагинацией")
+async def get_terea(
+        pagination: Tuple[int, int] = Depends(get_pagination),
+        cursor: PageCursor | None = Depends(get_cursor),
+        filters: ProductFilters = Depends(get_terea_filters),
+        include_total: bool = Query(True, description="Считать общее количество записей (false экономит запрос COUNT)"),
+        view: ViewEnum = Query("full", description="full - полные записи, card - компактные карточки без description")
+) -> GetTereaResponse:
     skip, limit = pagination
-    logger.info(f"GET /products/terea запрос: skip={skip}, limit={limit}")
+    logger.info("GET /products/terea запрос: skip=%s, limit=%s, cursor=%s, filters=%s, view=%s", skip, limit, cursor, filters, view)
     try:
-        result = await DevicesService.get_terea_list(skip=skip, limit=limit)
-        logger.info(f"GET /products/terea успешно: {len(result.terea)} продуктов terea возвращено")
-        return result
+        result = await DevicesService.get_terea_list(
+            skip=skip, limit=limit, cursor=cursor, filters=filters, include_total=include_total, view=view
+        )
+        logger.info("GET /products/terea успешно: %s продуктов terea возвращено", len(result.terea))
+        return json_response(result)
 
     except ValueError as error:
-        logger.warning(f"GET /products/terea ошибка клиента: {str(error)}")
+        logger.warning("GET /products/terea ошибка клиента: %s", error)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(error)
         )
     except Exception as error:
-        logger.error(f"GET /products/terea внутренняя ошибка: {str(error)}", exc_info=True)
+        logger.error("GET /products/terea внутренняя ошибка: %s", error, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Внутренняя ошибка сервера при получении продукта terea"
@@ -148,52 +193,191 @@ async def get_terea(pagination: Tuple[int, int] = Depends(get_pagination)) -> Ge
 
 @router.get("/terea/{id}", summary="Получить продукт terea по id")
 async def get_terea_by_id(terea_id: int) -> GetTereaByIdResponse:
-    logger.info(f"GET /products/terea/{terea_id} запрос")
+    logger.info("GET /products/terea/%s запрос", terea_id)
     try:
         result = await DevicesService.get_terea(terea_id)
-        logger.info(f"GET /products/terea/{terea_id} успешно")
-        return result
+        logger.info("GET /products/terea/%s успешно", terea_id)
+        return json_response(result)
 
     except ValueError as error:
         if "не найден" in str(error).lower():
-            logger.warning(f"GET /products/terea/{terea_id} продукт terea не найден")
+            logger.warning("GET /products/terea/%s продукт terea не найден", terea_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Продукт terea не найден"
             )
 
-        logger.warning(f"GET /products/terea/{terea_id} ошибка клиента: {str(error)}")
+        logger.warning("GET /products/terea/%s ошибка клиента: %s", terea_id, error)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(error)
         )
     except Exception as error:
-        logger.error(f"GET /products/terea/{terea_id} внутренняя ошибка: {str(error)}", exc_info=True)
+        logger.error("GET /products/terea/%s внутренняя ошибка: %s", terea_id, error, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Внутренняя ошибка сервера при получении продукта terea"
         )
 
+
+@router.get("/by-ref/{ref}", summary="Получить товар любой категории по ref")
+async def get_product_by_ref(
+        ref: str = Path(..., max_length=256, description="ref товара (уникален в пределах таблицы)")
+) -> GetProductByRefResponse:
+    logger.info("GET /products/by-ref/%s запрос", ref)
+    try:
+        result = await DevicesService.get_product_by_ref(ref)
+        logger.info("GET /products/by-ref/%s успешно: %s", ref, result.type)
+        return json_response(result)
+
+    except ValueError as error:
+        if "не найден" in str(error).lower():
+            logger.warning("GET /products/by-ref/%s товар не найден", ref)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Товар не найден"
+            )
+
+        logger.warning("GET /products/by-ref/%s ошибка клиента: %s", ref, error)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(error)
+        )
+    except Exception as error:
+        logger.error("GET /products/by-ref/%s внутренняя ошибка: %s", ref, error, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Внутренняя ошибка сервера при получении товара"
+        )
+
+
+@router.get("/suggest", summary="Подсказки при вводе в строку поиска")
+async def suggest_products(
+        prefix: str = Query(..., min_length=1, max_length=100, description="Введённое начало слова или названия"),
+        limit: int = Query(10, ge=1, le=20, description="Максимальное количество подсказок")
+) -> SuggestResponse:
+    try:
+        return json_response(await DevicesService.suggest_products(prefix, limit))
+
+    except ValueError as error:
+        logger.warning("GET /products/suggest ошибка клиента: %s", error)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(error)
+        )
+    except Exception as error:
+        logger.error("GET /products/suggest внутренняя ошибка: %s", error, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Внутренняя ошибка сервера при получении подсказок"
+        )
+
+
+@router.get("/search", summary="Полнотекстовый поиск по товарам всех категорий")
+async def search_products(
+        q: str = Query(..., min_length=1, max_length=200, description="Поисковый запрос (кириллица или латиница)"),
+        limit: int = Query(20, ge=1, le=100, description="Максимальное количество результатов"),
+        types: List[Literal["devices", "iqos", "terea"]] = Query(
+            ["devices", "iqos", "terea"],
+            alias="type",
+            description="Искать только в указанных категориях"
+        )
+) -> ProductSearchResponse:
+    logger.info("GET /products/search запрос: q=%s, limit=%s, types=%s", q, limit, types)
+    try:
+        result = await DevicesService.search_products(q, limit, tuple(dict.fromkeys(types)))
+        logger.info("GET /products/search успешно: %s товаров возвращено", len(result.results))
+        return json_response(result)
+
+    except ValueError as error:
+        logger.warning("GET /products/search ошибка клиента: %s", error)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(error)
+        )
+    except Exception as error:
+        logger.error("GET /products/search внутренняя ошибка: %s", error, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Внутренняя ошибка сервера при поиске товаров"
+        )
+
+
+@router.post("/batch", summary="Получить цены и наличие нескольких товаров по ref или (type, id)")
+async def get_products_batch(batch: ProductsBatchRequest) -> ProductsBatchResponse:
+    logger.info("POST /products/batch запрос: %s ref, %s id", len(batch.refs), len(batch.items))
+    try:
+        result = await DevicesService.get_products_batch(batch)
+        logger.info("POST /products/batch успешно: %s товаров возвращено", len(result.products))
+        return json_response(result)
+
+    except ValueError as error:
+        logger.warning("POST /products/batch ошибка клиента: %s", error)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(error)
+        )
+    except Exception as error:
+        logger.error("POST /products/batch внутренняя ошибка: %s", error, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Внутренняя ошибка сервера при пакетном получении товаров"
+        )
+
+
 @router.get("", summary="Получить все продукты (devices, iqos, terea)")
-async def get_all_products() -> GetAllProductsResponse:
-    logger.info(f"GET /products запрос")
+async def get_all_products(
+        concurrent: bool | None = Query(
+            None,
+            description=(
+                "Загружать категории параллельно (по умолчанию из настроек). Нужен для сравнения с последовательной "
+                "загрузкой: запросы с этим параметром не обслуживаются кэшем ответов, Server-Timing всегда свежий"
+            )
+        ),
+        view: ViewEnum = Query("full", description="full - полные записи, card - компактные карточки без description")
+) -> GetAllProductsResponse:
+    if concurrent is None:
+        concurrent = settings.products.all_products_concurrent
+    limit = settings.products.all_products_limit
+
+    logger.info("GET /products запрос: concurrent=%s, view=%s", concurrent, view)
     try:
-        devices_result = await DevicesService.get_devices(skip=0, limit=1000)
-        iqos_result = await DevicesService.get_iqos_list(skip=0, limit=1000)
-        terea_result = await DevicesService.get_terea_list(skip=0, limit=1000)
+        started = time.perf_counter()
+        if concurrent:
+            # Каждый сервис открывает свою сессию, поэтому запросы идут по разным соединениям пула
+            (devices_result, devices_ms), (iqos_result, iqos_ms), (terea_result, terea_ms) = await asyncio.gather(
+                _timed(DevicesService.get_devices(skip=0, limit=limit, include_total=False, view=view)),
+                _timed(DevicesService.get_iqos_list(skip=0, limit=limit, include_total=False, view=view)),
+                _timed(DevicesService.get_terea_list(skip=0, limit=limit, include_total=False, view=view)),
+            )
+        else:
+            devices_result, devices_ms = await _timed(DevicesService.get_devices(skip=0, limit=limit, include_total=False, view=view))
+            iqos_result, iqos_ms = await _timed(DevicesService.get_iqos_list(skip=0, limit=limit, include_total=False, view=view))
+            terea_result, terea_ms = await _timed(DevicesService.get_terea_list(skip=0, limit=limit, include_total=False, view=view))
+        total_ms = (time.perf_counter() - started) * 1000
 
         response_data = GetAllProductsResponse(devices=devices_result.devices, iqos=iqos_result.iqos, terea=terea_result.terea)
-        logger.info(f"GET /products успешно: {len(response_data.devices)} devices, {len(response_data.iqos)} iqos, {len(response_data.terea)} terea возвращено")
-        return response_data
+        response = json_response(response_data)
+        response.headers["Server-Timing"] = (
+            f"devices;dur={devices_ms:.1f}, iqos;dur={iqos_ms:.1f}, terea;dur={terea_ms:.1f}, "
+            f"fanout;dur={total_ms:.1f};desc=\"{'concurrent' if concurrent else 'sequential'}\""
+        )
+        logger.info(
+            "GET /products успешно: %s devices, %s iqos, %s terea возвращено "
+            "за %.1f мс (devices %.1f мс, iqos %.1f мс, terea %.1f мс)",
+            len(response_data.devices), len(response_data.iqos), len(response_data.terea),
+            total_ms, devices_ms, iqos_ms, terea_ms
+        )
+        return response
 
     except ValueError as error:
-        logger.warning(f"GET /products ошибка клиента: {str(error)}")
+        logger.warning("GET /products ошибка клиента: %s", error)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(error)
         )
     except Exception as error:
-        logger.error(f"GET /products внутренняя ошибка: {str(error)}", exc_info=True)
+        logger.error("GET /products внутренняя ошибка: %s", error, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Внутренняя ошибка сервера при получении всех продуктов"
@@ -1,19 +1,33 @@
 from backend.app.api.schemas.devices_schemas import (
     DevicesSchema,
+    DevicesCardSchema,
     GetDevicesResponse,
     GetDeviceByIdResponse
 )
 
 from backend.app.api.schemas.iqos_schemas import (
     IqosSchema,
+    IqosCardSchema,
     GetIqosResponse,
     GetIqosByIdResponse
 )
 
 from backend.app.api.schemas.terea_schemas import (
     TereaSchema,
+    TereaCardSchema,
     GetTereaResponse,
     GetTereaByIdResponse
 )
 
-from backend.app.api.schemas.all_products_schemas import GetAllProductsResponse
+from backend.app.api.schemas.all_products_schemas import GetAllProductsResponse, GetProductByRefResponse
+
+from backend.app.api.schemas.filters_schemas import ProductFilters, PageCursor, ViewEnum
+
+from backend.app.api.schemas.batch_schemas import (
+    ProductKey,
+    ProductsBatchRequest,
+    ProductStockSchema,
+    ProductsBatchResponse
+)
+
+from backend.app.api.schemas.search_schemas import ProductSearchItem, ProductSearchResponse, SuggestionSchema, SuggestResponse
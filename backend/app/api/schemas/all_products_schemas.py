@@ -1,13 +1,24 @@
-from typing import List
+from typing import List, Literal, Union
 
 from pydantic import BaseModel, Field, ConfigDict
 
-from backend.app.api.schemas import DevicesSchema, IqosSchema, TereaSchema
+from backend.app.api.schemas import (
+    DevicesSchema, DevicesCardSchema,
+    IqosSchema, IqosCardSchema,
+    TereaSchema, TereaCardSchema
+)
 
 
 class GetAllProductsResponse(BaseModel):
-    devices: List[DevicesSchema] = Field(..., description="Список устройств Devices")
-    iqos: List[IqosSchema] = Field(..., description="Список продуктов IQOS")
-    terea: List[TereaSchema] = Field(..., description="Список продуктов Terea")
+    devices: List[Union[DevicesSchema, DevicesCardSchema]] = Field(..., description="Список устройств Devices")
+    iqos: List[Union[IqosSchema, IqosCardSchema]] = Field(..., description="Список продуктов IQOS")
+    terea: List[Union[TereaSchema, TereaCardSchema]] = Field(..., description="Список продуктов Terea")
+
+    model_config = ConfigDict(from_attributes=True, str_strip_whitespace=True)
+
+
+class GetProductByRefResponse(BaseModel):
+    type: Literal["devices", "iqos", "terea"] = Field(..., description="Таблица, в которой найден товар", examples=["terea"])
+    product: Union[DevicesSchema, IqosSchema, TereaSchema] = Field(..., description="Найденный товар")
 
     model_config = ConfigDict(from_attributes=True, str_strip_whitespace=True)
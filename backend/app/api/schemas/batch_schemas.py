@@ -0,0 +1,47 @@
+import decimal
+from typing import Literal, List
+
+from pydantic import BaseModel, Field, ConfigDict, model_validator
+
+from backend.core.config import settings
+
+
+ProductTypeEnum = Literal["devices", "iqos", "terea"]
+
+
+class ProductKey(BaseModel):
+    type: ProductTypeEnum = Field(..., description="Таблица товара", examples=["terea"])
+    id: int = Field(..., ge=1, description="id товара в таблице", examples=[14])
+
+
+class ProductsBatchRequest(BaseModel):
+    refs: List[str] = Field(default_factory=list, description="Список ref товаров", examples=[["terea-sienna-am"]])
+    items: List[ProductKey] = Field(default_factory=list, description="Список пар (type, id)")
+
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    @model_validator(mode="after")
+    def check_size(self):
+        count = len(self.refs) + len(self.items)
+        if count == 0:
+            raise ValueError("Нужно передать хотя бы один ref или пару (type, id)")
+        if count > settings.products.batch_max_items:
+            raise ValueError(f"Слишком много товаров в запросе: максимум {settings.products.batch_max_items}")
+        return self
+
+
+class ProductStockSchema(BaseModel):
+    type: ProductTypeEnum = Field(..., description="Таблица товара", examples=["iqos"])
+    id: int = Field(..., description="id товара в таблице", examples=[5])
+    ref: str = Field(..., description="ref товара", max_length=256)
+    name: str = Field(..., description="Название товара", max_length=256, examples=["IQOS Iluma i One"])
+    price: decimal.Decimal = Field(..., description="Цена", examples=[9000], max_digits=10, decimal_places=0)
+    sale_price: decimal.Decimal | None = Field(None, description="Цена со скидкой (iqos)", max_digits=10, decimal_places=0)
+    pricePack: decimal.Decimal | None = Field(None, description="Цена блока (terea)", max_digits=10, decimal_places=0)
+    nalichie: int = Field(..., description="Наличие (0 или 1)", examples=[1], ge=0, le=1)
+
+
+class ProductsBatchResponse(BaseModel):
+    products: List[ProductStockSchema] = Field(..., description="Найденные товары в порядке запроса")
+    missing_refs: List[str] = Field(default_factory=list, description="ref, для которых товар не найден")
+    missing_items: List[ProductKey] = Field(default_factory=list, description="Пары (type, id), для которых товар не найден")
@@ -1,8 +1,10 @@
 import decimal
-from typing import Literal, List
+from typing import List, Union
 
 from pydantic import BaseModel, Field, ConfigDict
 
+from backend.app.api.schemas.filters_schemas import ColorEnum
+
 
 class DevicesCategorySchema(BaseModel):
     id: int = Field(..., description="Уникальный идентификатор категории", examples=[1])
@@ -29,14 +31,8 @@ class DevicesSchema(BaseModel):
     price: decimal.Decimal = Field(..., description="Цена устройства", examples=[1990], max_digits=10, decimal_places=0)
     nalichie: int = Field(..., description="Наличие (обычно 0 или 1)", examples=[1], ge=0, le=1)
     new: int = Field(..., description="Флаг новинки (обычно 0 или 1)", examples=[0], ge=0, le=1)
-    hit: int | None = Field(None, description="Флаг хита (обычно 0 или 1, может быть NULL)", examples=[0], ge=0, le=1)
-    color: Literal['Красный', 'Черный', 'Бежевый', 'Синий', 'Оранжевый', 'Зеленый', 'Фиолетовый', 'Желтый', 'Серый'] = (
-        Field(
-            ...,
-            description="Цвет устройства",
-            examples=['Серый']
-        )
-    )
+    hit: int = Field(..., description="Флаг хита (обычно 0 или 1)", examples=[0], ge=0, le=1)
+    color: ColorEnum = Field(..., description="Цвет устройства", examples=['Серый'])
     ref: str = Field(..., description="Ссылка или имя файла изображения", examples=["Съемная крышка для ILuma Prime (Серая).png.webp"], max_length=256)
     type: str = Field(..., description="Тип записи (devices)", examples=["devices"], max_length=256)
     device_id: int = Field(..., description="ID связанной категории", examples=[1])
@@ -45,11 +41,28 @@ class DevicesSchema(BaseModel):
     model_config = ConfigDict(from_attributes=True, str_strip_whitespace=True)
 
 
+class DevicesCardSchema(BaseModel):
+    id: int = Field(..., description="Уникальный идентификатор устройства", examples=[38])
+    name: str = Field(..., description="Название устройства", examples=["Съемная крышка для ILuma Prime, голубой"], max_length=256)
+    image: str = Field(..., description="Путь к изображению устройства", max_length=16777215)
+    price: decimal.Decimal = Field(..., description="Цена устройства", examples=[1990], max_digits=10, decimal_places=0)
+    nalichie: int = Field(..., description="Наличие (обычно 0 или 1)", examples=[1], ge=0, le=1)
+    new: int = Field(..., description="Флаг новинки (обычно 0 или 1)", examples=[0], ge=0, le=1)
+    hit: int = Field(..., description="Флаг хита (обычно 0 или 1)", examples=[0], ge=0, le=1)
+    color: ColorEnum = Field(..., description="Цвет устройства", examples=['Серый'])
+    ref: str = Field(..., description="Ссылка или имя файла изображения", max_length=256)
+    type: str = Field(..., description="Тип записи (devices)", examples=["devices"], max_length=256)
+    device_id: int = Field(..., description="ID связанной категории", examples=[1])
+
+    model_config = ConfigDict(from_attributes=True, str_strip_whitespace=True)
+
+
 class GetDevicesResponse(BaseModel):
-    devices: List[DevicesSchema] = Field(..., description="Список устройств")
+    devices: List[Union[DevicesSchema, DevicesCardSchema]] = Field(..., description="Список устройств (карточки при view=card)")
     skip: int
     limit: int
-    total: int
+    total: int | None = Field(None, description="Общее количество записей (None, если include_total=false)")
+    next_cursor: str | None = Field(None, description="Курсор следующей страницы (None, если страниц больше нет)")
 
 
 class GetDeviceByIdResponse(BaseModel):
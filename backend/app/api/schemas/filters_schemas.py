@@ -0,0 +1,41 @@
+import decimal
+import json
+from typing import Literal, List
+
+from pydantic import BaseModel, Field
+
+from backend.core.models.emun_for_models import ENUM_COLORS, SET_FLAVORS, ENUM_STRENGTHS
+
+
+ColorEnum = Literal[tuple(ENUM_COLORS)]
+FlavorEnum = Literal[tuple(SET_FLAVORS)]
+StrengthFilterEnum = Literal[tuple(ENUM_STRENGTHS)]
+SortEnum = Literal["id", "price_asc", "price_desc", "new", "hit"]
+ViewEnum = Literal["full", "card"]
+
+
+class ProductFilters(BaseModel):
+    price_min: decimal.Decimal | None = Field(None, ge=0, description="Минимальная цена")
+    price_max: decimal.Decimal | None = Field(None, ge=0, description="Максимальная цена")
+    color: List[ColorEnum] = Field(default_factory=list, description="Цвета (devices, iqos)")
+    flavor: List[FlavorEnum] = Field(default_factory=list, description="Вкусы (terea)")
+    strength: List[StrengthFilterEnum] = Field(default_factory=list, description="Крепость (terea)")
+    nalichie: int | None = Field(None, ge=0, le=1, description="Наличие: 1 - в наличии, 0 - нет")
+    new: int | None = Field(None, ge=0, le=1, description="Флаг новинки")
+    hit: int | None = Field(None, ge=0, le=1, description="Флаг хита")
+    category_id: int | None = Field(None, ge=1, description="ID подкатегории")
+    sort: SortEnum = Field("id", description="Сортировка: id, price_asc, price_desc, new, hit")
+
+    def is_filtered(self) -> bool:
+        return bool(self.model_dump(exclude_defaults=True, exclude={"sort"}))
+
+    def cache_key(self) -> str:
+        # Ключ не зависит от сортировки: количество записей от неё не меняется
+        values = self.model_dump(mode="json", exclude_defaults=True, exclude={"sort"})
+        return json.dumps(values, sort_keys=True, ensure_ascii=False) if values else ""
+
+
+class PageCursor(BaseModel):
+    id: int = Field(..., description="id последней записи страницы")
+    sort: SortEnum = Field("id", description="Сортировка, для которой выдан курсор")
+    value: str | None = Field(None, description="Значение ключа сортировки последней записи")
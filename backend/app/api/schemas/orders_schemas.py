@@ -1,9 +1,11 @@
 from datetime import datetime
 from decimal import Decimal
-from typing import List
+from typing import List, Literal
 
 from pydantic import BaseModel, Field, ConfigDict
 
+from backend.app.api.schemas.batch_schemas import ProductTypeEnum
+
 
 class OrderedItemBase(BaseModel):
     product_name: str = Field(min_length=1, max_length=256, examples=["IQOS Iluma i Series One 2025 Leaf Green"])
@@ -12,7 +14,15 @@ class OrderedItemBase(BaseModel):
 
 
 class OrderedItemCreate(OrderedItemBase):
-    pass
+    # Если (type, id) не передан, товар ищется в каталоге по названию
+    product_type: ProductTypeEnum | None = Field(None, examples=["iqos"])
+    product_id: int | None = Field(None, ge=1, examples=[5])
+    # Для terea цена проверяется по заказанному варианту: блок (price) или пачка (pricePack)
+    variant: Literal["block", "pack"] | None = Field(
+        None,
+        description="Вариант terea: block - блок, pack - пачка. Для остальных товаров не указывается",
+        examples=[None]
+    )
 
 
 class OrderedItemResponse(OrderedItemBase):
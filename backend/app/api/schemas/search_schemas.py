@@ -0,0 +1,31 @@
+from typing import Literal, List, Union
+
+from pydantic import BaseModel, Field
+
+from backend.app.api.schemas.devices_schemas import DevicesCardSchema
+from backend.app.api.schemas.iqos_schemas import IqosCardSchema
+from backend.app.api.schemas.terea_schemas import TereaCardSchema
+
+
+class ProductSearchItem(BaseModel):
+    type: Literal["devices", "iqos", "terea"] = Field(..., description="Таблица товара", examples=["devices"])
+    score: float = Field(..., description="Релевантность (больше - лучше)", examples=[8.0])
+    product: Union[DevicesCardSchema, IqosCardSchema, TereaCardSchema] = Field(..., description="Карточка товара")
+
+
+class ProductSearchResponse(BaseModel):
+    query: str = Field(..., description="Поисковый запрос", examples=["илюма"])
+    total: int = Field(..., description="Сколько товаров подходит под запрос")
+    results: List[ProductSearchItem] = Field(..., description="Найденные товары по убыванию релевантности")
+
+
+class SuggestionSchema(BaseModel):
+    text: str = Field(..., description="Текст подсказки (название товара)", examples=["IQOS Iluma i One"])
+    type: Literal["devices", "iqos", "terea"] = Field(..., description="Таблица товара", examples=["iqos"])
+    id: int = Field(..., description="id товара в таблице", examples=[5])
+    ref: str = Field(..., description="ref товара для перехода на страницу", max_length=256)
+
+
+class SuggestResponse(BaseModel):
+    prefix: str = Field(..., description="Введённый префикс", examples=["илю"])
+    suggestions: List[SuggestionSchema] = Field(..., description="Подсказки")
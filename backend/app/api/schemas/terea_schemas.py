@@ -50,7 +50,7 @@ class TereaSchema(BaseModel):
     strength: StrengthEnum = Field(..., description="Крепость продукта Terea", examples=["Крепкие"])
     nalichie: int = Field(..., description="Наличие (обычно 0 или 1)", examples=[1], ge=0, le=1)
     new: int = Field(..., description="Флаг новинки (обычно 0 или 1)", examples=[0], ge=0, le=1)
-    hit: int | None = Field(None, description="Флаг хита (обычно 0 или 1, может быть NULL)", examples=[0], ge=0, le=1)
+    hit: int = Field(..., description="Флаг хита (обычно 0 или 1)", examples=[0], ge=0, le=1)
     ref: str = Field(..., description="Ссылка или имя файла изображения", examples=["terea-armenia-sienna"], max_length=256)
     type: str = Field(..., description="Тип записи (terea)", examples=["terea"], max_length=256)
     terea_id: int = Field(..., description="ID связанной категории", examples=[3])
@@ -59,11 +59,31 @@ class TereaSchema(BaseModel):
     model_config = ConfigDict(from_attributes=True, str_strip_whitespace=True)
 
 
+class TereaCardSchema(BaseModel):
+    id: int = Field(..., description="Уникальный идентификатор продукта Terea", examples=[14])
+    name: str = Field(..., description="Название продукта Terea", examples=["Terea Sienna AM"], max_length=256)
+    image: str = Field(..., description="Путь к изображению продукта Terea", max_length=16777215)
+    imagePack: str | None = Field(None, description="Путь к изображению упаковки продукта Terea (может быть NULL)", max_length=256)
+    price: decimal.Decimal = Field(..., description="Цена продукта Terea", examples=[5000], max_digits=10, decimal_places=0)
+    pricePack: decimal.Decimal | None = Field(None, description="Цена упаковки продукта Terea (может быть NULL)", examples=[510], max_digits=10, decimal_places=0)
+    flavor: Union[Set[str], frozenset[str]] = Field(..., description="Вкус продукта Terea", examples=[{"Ментол"}])
+    strength: StrengthEnum = Field(..., description="Крепость продукта Terea", examples=["Крепкие"])
+    nalichie: int = Field(..., description="Наличие (обычно 0 или 1)", examples=[1], ge=0, le=1)
+    new: int = Field(..., description="Флаг новинки (обычно 0 или 1)", examples=[0], ge=0, le=1)
+    hit: int = Field(..., description="Флаг хита (обычно 0 или 1)", examples=[0], ge=0, le=1)
+    ref: str = Field(..., description="Ссылка или имя файла изображения", max_length=256)
+    type: str = Field(..., description="Тип записи (terea)", examples=["terea"], max_length=256)
+    terea_id: int = Field(..., description="ID связанной категории", examples=[3])
+
+    model_config = ConfigDict(from_attributes=True, str_strip_whitespace=True)
+
+
 class GetTereaResponse(BaseModel):
-    terea: List[TereaSchema] = Field(..., description="Список продуктов Terea")
+    terea: List[Union[TereaSchema, TereaCardSchema]] = Field(..., description="Список продуктов Terea (карточки при view=card)")
     skip: int = Field(..., description="Количество пропущенных записей")
     limit: int = Field(..., description="Максимальное количество возвращённых записей")
-    total: int = Field(..., description="Общее количество записей")
+    total: int | None = Field(None, description="Общее количество записей (None, если include_total=false)")
+    next_cursor: str | None = Field(None, description="Курсор следующей страницы (None, если страниц больше нет)")
 
 
 class GetTereaByIdResponse(BaseModel):
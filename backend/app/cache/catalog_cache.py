@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Sequence
+
+from backend.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+CATALOG_TABLES = ("devices", "iqos", "terea")
+
+# Категории встраиваются в каждую строку товара, поэтому их изменение
+# делает неактуальным и снимок соответствующей таблицы товаров.
+CATALOG_DEPENDENCIES: Dict[str, tuple] = {
+    "devices_category": ("devices",),
+    "iqos_category": ("iqos",),
+    "terea_category": ("terea",),
+}
+
+
+class CatalogSnapshot:
+    def __init__(self, version: int, items: Sequence[Any]):
+        self.version = version
+        self.items: List[Any] = list(items)
+        self.by_id: Dict[int, Any] = {item.id: item for item in self.items}
+        self.by_ref: Dict[str, Any] = {item.ref: item for item in self.items}
+        self.loaded_at = time.monotonic()
+        # Отфильтрованные и отсортированные выборки живут, пока жив снимок
+        self.views: Dict[Any, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+class CatalogCache:
+    def __init__(self, enabled: bool = True, ttl: int = 300):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.catalog_version = 0
+
+        self._versions: Dict[str, int] = {}
+        self._snapshots: Dict[str, CatalogSnapshot] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.expirations = 0
+
+    def version(self, name: str) -> int:
+        return self._versions.get(name, 0)
+
+    def _is_expired(self, snapshot: CatalogSnapshot) -> bool:
+        return bool(self.ttl) and time.monotonic() - snapshot.loaded_at >= self.ttl
+
+    def _get_fresh(self, name: str) -> CatalogSnapshot | None:
+        snapshot = self._snapshots.get(name)
+        if snapshot is None or snapshot.version != self.version(name):
+            return None
+
+        if self._is_expired(snapshot):
+            # TTL страхует от правок, сделанных через другой воркер или в обход админки
+            self.expirations += 1
+            self._bump(name)
+            return None
+
+        return snapshot
+
+    async def get_snapshot(self, name: str, loader: Callable[[], Awaitable[Sequence[Any]]]) -> CatalogSnapshot:
+        snapshot = self._get_fresh(name)
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+
+        self.misses += 1
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            snapshot = self._get_fresh(name)
+            if snapshot is not None:
+                return snapshot
+
+            version = self.version(name)
+            items = await loader()
+            snapshot = CatalogSnapshot(version, items)
+
+            # Если каталог изменили во время загрузки, снимок уже устарел и не сохраняется
+            if version == self.version(name):
+                self._snapshots[name] = snapshot
+                logger.info("Снимок каталога %s загружен: %s записей, версия %s", name, len(snapshot), version)
+            else:
+                logger.info("Снимок каталога %s устарел во время загрузки и не сохранён", name)
+
+            return snapshot
+
+    def _bump(self, name: str) -> None:
+        for table in (name, *CATALOG_DEPENDENCIES.get(name, ())):
+            self._versions[table] = self.version(table) + 1
+            self._snapshots.pop(table, None)
+        self.catalog_version += 1
+
+    def invalidate(self, name: str) -> None:
+        self.invalidations += 1
+        self._bump(name)
+        logger.info("Кэш каталога %s сброшен, версия каталога %s", name, self.catalog_version)
+
+    def clear(self) -> None:
+        for name in CATALOG_TABLES:
+            self.invalidate(name)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "catalog_version": self.catalog_version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "expirations": self.expirations,
+            "tables": {
+                name: {
+                    "version": self.version(name),
+                    "size": len(self._snapshots[name]) if name in self._snapshots else None
+                }
+                for name in CATALOG_TABLES
+            }
+        }
+
+
+catalog_cache = CatalogCache(
+    enabled=settings.cache.catalog_enabled,
+    ttl=settings.cache.catalog_ttl,
+)
@@ -0,0 +1,62 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Sequence, Tuple
+
+from backend.app.cache.catalog_cache import catalog_cache
+
+
+logger = logging.getLogger(__name__)
+
+
+# Справочники категорий целиком в памяти: в них несколько строк, а нужны они в каждом запросе товаров
+class CategoryRegistry:
+    def __init__(self):
+        # имя справочника -> (версия в catalog_cache, время загрузки, {id: категория})
+        self._categories: Dict[str, Tuple[int, float, Dict[int, Any]]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+        self.hits = 0
+        self.loads = 0
+
+    def _get_fresh(self, name: str) -> Dict[int, Any] | None:
+        entry = self._categories.get(name)
+        if entry is None:
+            return None
+
+        version, loaded_at, categories = entry
+        is_expired = bool(catalog_cache.ttl) and time.monotonic() - loaded_at >= catalog_cache.ttl
+        if version != catalog_cache.version(name) or is_expired:
+            return None
+        return categories
+
+    async def get(self, name: str, loader: Callable[[], Awaitable[Sequence[Any]]]) -> Dict[int, Any]:
+        categories = self._get_fresh(name)
+        if categories is not None:
+            self.hits += 1
+            return categories
+
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            categories = self._get_fresh(name)
+            if categories is not None:
+                return categories
+
+            version = catalog_cache.version(name)
+            categories = {category.id: category for category in await loader()}
+            if version == catalog_cache.version(name):
+                self._categories[name] = (version, time.monotonic(), categories)
+            self.loads += 1
+
+            logger.info("Справочник %s загружен: %s категорий", name, len(categories))
+            return categories
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "loads": self.loads,
+            "tables": {name: len(entry[2]) for name, entry in self._categories.items()},
+        }
+
+
+category_registry = CategoryRegistry()
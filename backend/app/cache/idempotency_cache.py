@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from backend.core.config import settings
+from backend.core.metrics import stats_counters
+
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyCache:
+    def __init__(self, max_entries: int = 1024, ttl: int = 86400, purge_interval: int = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        # ключ -> (хэш запроса, готовый ответ, время записи)
+        self._entries: "OrderedDict[str, Tuple[str, Any, float]]" = OrderedDict()
+        # ключ -> [замок, число ожидающих запросов]
+        self._locks: Dict[str, List[Any]] = {}
+        self._purged_at = time.monotonic()
+
+        self.memory_replays = 0
+        self.db_replays = 0
+        self.conflicts = 0
+        self.stored = 0
+
+    def get(self, key: str) -> Tuple[str, Any] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        request_hash, response, stored_at = entry
+        if self.ttl and time.monotonic() - stored_at >= self.ttl:
+            self._entries.pop(key, None)
+            return None
+
+        self._entries.move_to_end(key)
+        return request_hash, response
+
+    def set(self, key: str, request_hash: str, response: Any) -> None:
+        self._entries[key] = (request_hash, response, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    @asynccontextmanager
+    async def hold(self, key: str) -> AsyncIterator[None]:
+        # Повторы с одним ключом внутри воркера ждут первый запрос, а не идут в базу параллельно
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                self._locks.pop(key, None)
+
+    def purge_due(self) -> bool:
+        if time.monotonic() - self._purged_at < self.purge_interval:
+            return False
+        self._purged_at = time.monotonic()
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory_replays": self.memory_replays,
+            "db_replays": self.db_replays,
+            "conflicts": self.conflicts,
+            "stored": self.stored,
+            "entries": len(self._entries),
+        }
+
+
+idempotency_cache = IdempotencyCache(
+    max_entries=settings.orders.idempotency_max_entries,
+    ttl=settings.orders.idempotency_ttl,
+    purge_interval=settings.orders.idempotency_purge_interval,
+)
+stats_counters(
+    "idempotency_keys_total",
+    "Запросы с Idempotency-Key: повторы из памяти и из базы, конфликты, сохранённые ключи",
+    "result",
+    idempotency_cache.stats,
+    ("memory_replays", "db_replays", "conflicts", "stored"),
+)
@@ -0,0 +1,127 @@
+import gzip
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+from backend.core.config import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+logger = logging.getLogger(__name__)
+
+
+def available_encodings() -> Tuple[str, ...]:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+class CachedPayload:
+    def __init__(self, body: bytes, media_type: str, version: int, min_compress_size: int, route: Any = None):
+        self.body = body
+        self.media_type = media_type
+        self.version = version
+        # Роут, который собрал ответ: при HIT роутер не вызывается, а метрикам нужен шаблон пути
+        self.route = route
+        self.stored_at = time.monotonic()
+        self._min_compress_size = min_compress_size
+        self._encoded: Dict[str, bytes] = {}
+        # ETag считается по содержимому, поэтому совпадает между воркерами и после рестарта
+        self.etag_hash = hashlib.blake2b(body, digest_size=16).hexdigest()
+
+    def etag(self, encoding: str) -> str:
+        if encoding == "identity":
+            return f'"{self.etag_hash}"'
+        return f'"{self.etag_hash}-{encoding}"'
+
+    def matches(self, if_none_match: str) -> bool:
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag == "*":
+                return True
+            tag = tag.removeprefix("W/").strip('"')
+            if tag.split("-", 1)[0] == self.etag_hash:
+                return True
+        return False
+
+    def can_compress(self) -> bool:
+        return len(self.body) >= self._min_compress_size
+
+    def encoded(self, encoding: str) -> bytes:
+        if encoding == "identity":
+            return self.body
+
+        body = self._encoded.get(encoding)
+        if body is None:
+            if encoding == "br":
+                body = brotli.compress(self.body, quality=5)
+            else:
+                body = gzip.compress(self.body, compresslevel=6)
+            self._encoded[encoding] = body
+        return body
+
+
+class PayloadCache:
+    def __init__(self, enabled: bool = True, max_entries: int = 256, ttl: int = 300, min_compress_size: int = 1024):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.min_compress_size = min_compress_size
+        self._entries: "OrderedDict[str, CachedPayload]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key: str, version: int) -> CachedPayload | None:
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            is_expired = bool(self.ttl) and time.monotonic() - entry.stored_at >= self.ttl
+            if entry.version == version and not is_expired:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self._entries.pop(key, None)
+
+        self.misses += 1
+        return None
+
+    def set(self, key: str, body: bytes, media_type: str, version: int, route: Any = None) -> CachedPayload:
+        entry = CachedPayload(body, media_type, version, self.min_compress_size, route)
+        if not self.enabled:
+            return entry
+
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "entries": len(self._entries),
+            "bytes": sum(len(entry.body) for entry in self._entries.values()),
+            "encodings": available_encodings()
+        }
+
+
+payload_cache = PayloadCache(
+    enabled=settings.cache.payload_enabled,
+    max_entries=settings.cache.payload_max_entries,
+    ttl=settings.cache.payload_ttl,
+    min_compress_size=settings.cache.payload_min_compress_size,
+)
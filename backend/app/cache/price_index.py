@@ -0,0 +1,141 @@
+import decimal
+import logging
+import time
+from typing import Any, Dict, Tuple
+
+from backend.app.cache.catalog_cache import catalog_cache, CatalogSnapshot
+from backend.app.cache.search_index import SEARCH_TABLES, DocKey
+
+
+logger = logging.getLogger(__name__)
+
+
+def _name_key(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+def current_prices(product_type: str, item: Any) -> Dict[str | None, decimal.Decimal]:
+    # Цена по варианту товара: у terea блок (price) и пачка (pricePack) - разные позиции заказа,
+    # у остальных товаров вариант один (None), у iqos действует цена со скидкой
+    if product_type == "iqos" and item.sale_price:
+        return {None: item.sale_price}
+    if product_type == "terea":
+        prices = {"block": item.price}
+        if item.pricePack:
+            prices["pack"] = item.pricePack
+        return prices
+    return {None: item.price}
+
+
+class PriceIndex:
+    def __init__(self):
+        # (таблица, id) -> (название, цены по вариантам)
+        self._prices: Dict[DocKey, Tuple[str, Dict[str | None, decimal.Decimal]]] = {}
+        # нормализованное название -> (таблица, id); None, если название не уникально
+        self._by_name: Dict[str, DocKey | None] = {}
+        self._versions: Dict[str, int] = {}
+        # Момент, когда истечёт TTL снимка, из которого собран индекс таблицы
+        self._expires: Dict[str, float] = {}
+
+        self.lookups = 0
+        self.misses = 0
+        self.rebuilds = 0
+        self.upserts = 0
+
+    def _add(self, key: DocKey, item: Any) -> None:
+        self._prices[key] = (item.name, current_prices(key[0], item))
+        name_key = _name_key(item.name)
+        self._by_name[name_key] = key if self._by_name.get(name_key, key) == key else None
+
+    def _remove(self, key: DocKey) -> None:
+        entry = self._prices.pop(key, None)
+        if entry is None:
+            return
+        name_key = _name_key(entry[0])
+        if self._by_name.get(name_key) == key:
+            del self._by_name[name_key]
+        elif name_key in self._by_name:
+            # Название было неоднозначным: после удаления одного из товаров пересчитываем владельца
+            owners = [other for other, (name, _) in self._prices.items() if _name_key(name) == name_key]
+            if owners:
+                self._by_name[name_key] = owners[0] if len(owners) == 1 else None
+            else:
+                del self._by_name[name_key]
+
+    def sync(self, name: str, snapshot: CatalogSnapshot) -> None:
+        if self._versions.get(name) == snapshot.version:
+            return
+
+        for key in [key for key in self._prices if key[0] == name]:
+            self._prices.pop(key)
+        self._by_name = {}
+        for key, (item_name, _) in self._prices.items():
+            name_key = _name_key(item_name)
+            self._by_name[name_key] = key if self._by_name.get(name_key, key) == key else None
+        for item in snapshot.items:
+            self._add((name, item.id), item)
+        self._versions[name] = snapshot.version
+        self._expires[name] = snapshot.loaded_at + catalog_cache.ttl if catalog_cache.ttl else float("inf")
+
+        self.rebuilds += 1
+        logger.info("Индекс цен %s перестроен: %s товаров", name, len(snapshot))
+
+    def is_current(self, name: str) -> bool:
+        # Версия каталога меняется при правках из админки, а истечение TTL замечает только get_snapshot,
+        # поэтому после TTL индекс сверяется со снимком заново
+        return self._versions.get(name) == catalog_cache.version(name) and time.monotonic() < self._expires.get(name, 0)
+
+    def upsert(self, name: str, item: Any) -> None:
+        if name not in SEARCH_TABLES:
+            return
+
+        self._remove((name, item.id))
+        self._add((name, item.id), item)
+        self._mark_synced(name)
+        self.upserts += 1
+
+    def remove(self, name: str, item_id: int) -> None:
+        if name not in SEARCH_TABLES:
+            return
+
+        self._remove((name, item_id))
+        self._mark_synced(name)
+        self.upserts += 1
+
+    def _mark_synced(self, name: str) -> None:
+        # Как и в search_index: правка из админки применена точечно, перестроение не нужно
+        version = catalog_cache.version(name)
+        if self._versions.get(name) == version - 1:
+            self._versions[name] = version
+
+    def lookup(
+            self,
+            product_type: str | None,
+            product_id: int | None,
+            product_name: str
+    ) -> Tuple[DocKey, str, Dict[str | None, decimal.Decimal]] | None:
+        self.lookups += 1
+        if product_type is not None and product_id is not None:
+            key = (product_type, product_id)
+        else:
+            key = self._by_name.get(_name_key(product_name))
+
+        entry = self._prices.get(key) if key is not None else None
+        if entry is None:
+            self.misses += 1
+            return None
+        return key, entry[0], entry[1]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "lookups": self.lookups,
+            "misses": self.misses,
+            "rebuilds": self.rebuilds,
+            "upserts": self.upserts,
+            "products": len(self._prices),
+            "ambiguous_names": sum(1 for key in self._by_name.values() if key is None),
+            "versions": dict(self._versions),
+        }
+
+
+price_index = PriceIndex()
@@ -0,0 +1,204 @@
+import bisect
+import heapq
+import logging
+import re
+import time
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from backend.app.cache.catalog_cache import catalog_cache, CatalogSnapshot
+
+
+logger = logging.getLogger(__name__)
+
+
+SEARCH_TABLES = ("devices", "iqos", "terea")
+
+# Вес поля в ранжировании: совпадение в названии важнее совпадения в описании
+FIELD_WEIGHTS = {
+    "name": 4.0,
+    "model": 2.0,
+    "flavor": 2.0,
+    "description": 1.0,
+}
+
+# Совпадение по началу слова весит меньше точного совпадения
+PREFIX_FACTOR = 0.5
+MIN_PREFIX_LENGTH = 2
+
+CYRILLIC_TO_LATIN = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e", "ж": "zh",
+    "з": "z", "и": "i", "й": "i", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o",
+    "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f", "х": "h", "ц": "c",
+    "ч": "ch", "ш": "sh", "щ": "sch", "ъ": "", "ы": "i", "ь": "", "э": "e", "ю": "u",
+    "я": "a",
+}
+
+# Латиница сводится к тем же звукам, что и транслитерация: "илюма" и "Iluma" дают "iluma"
+LATIN_FOLDING = (
+    ("yu", "u"), ("ya", "a"), ("ye", "e"), ("y", "i"), ("q", "k"), ("w", "v"), ("x", "ks"),
+)
+
+TOKEN_RE = re.compile(r"\w+")
+REPEATED_RE = re.compile(r"([^\W\d_])\1+")
+
+DocKey = Tuple[str, int]
+
+
+def normalize(text: str) -> str:
+    text = text.lower()
+    text = "".join(CYRILLIC_TO_LATIN.get(char, char) for char in text)
+    for source, target in LATIN_FOLDING:
+        text = text.replace(source, target)
+    return REPEATED_RE.sub(r"\1", text)
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(normalize(text))
+
+
+def _field_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (set, frozenset, list, tuple)):
+        return " ".join(str(part) for part in value)
+    return str(value)
+
+
+class SearchIndex:
+    def __init__(self):
+        # терм -> {(таблица, id): вес}
+        self._postings: Dict[str, Dict[DocKey, float]] = {}
+        self._doc_terms: Dict[DocKey, Set[str]] = {}
+        self._versions: Dict[str, int] = {}
+        self._sorted_terms: List[str] = []
+        self._terms_dirty = False
+
+        self.searches = 0
+        self.rebuilds = 0
+        self.upserts = 0
+
+    def _add(self, key: DocKey, item: Any) -> None:
+        weights: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(_field_text(getattr(item, field, None))):
+                weights[term] = weights.get(term, 0.0) + weight
+
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._terms_dirty = True
+            postings[key] = weight
+        self._doc_terms[key] = set(weights)
+
+    def _remove(self, key: DocKey) -> None:
+        for term in self._doc_terms.pop(key, ()):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[term]
+                self._terms_dirty = True
+
+    def sync(self, name: str, snapshot: CatalogSnapshot) -> None:
+        if self._versions.get(name) == snapshot.version:
+            return
+
+        started = time.perf_counter()
+        for key in [key for key in self._doc_terms if key[0] == name]:
+            self._remove(key)
+        for item in snapshot.items:
+            self._add((name, item.id), item)
+        self._versions[name] = snapshot.version
+
+        self.rebuilds += 1
+        logger.info(
+            "Поисковый индекс %s перестроен: %s записей за %.1f мс",
+            name, len(snapshot), (time.perf_counter() - started) * 1000
+        )
+
+    def upsert(self, name: str, item: Any) -> None:
+        if name not in SEARCH_TABLES:
+            return
+
+        self._remove((name, item.id))
+        self._add((name, item.id), item)
+        self._mark_synced(name)
+        self.upserts += 1
+
+    def remove(self, name: str, item_id: int) -> None:
+        if name not in SEARCH_TABLES:
+            return
+
+        self._remove((name, item_id))
+        self._mark_synced(name)
+        self.upserts += 1
+
+    def _mark_synced(self, name: str) -> None:
+        # Вызывается сразу после catalog_cache.invalidate: если индекс был актуален до этой правки,
+        # то с её учётом он актуален и для новой версии, и полное перестроение не нужно
+        version = catalog_cache.version(name)
+        if self._versions.get(name) == version - 1:
+            self._versions[name] = version
+
+    def _terms_with_prefix(self, prefix: str) -> Iterable[str]:
+        if self._terms_dirty:
+            self._sorted_terms = sorted(self._postings)
+            self._terms_dirty = False
+
+        position = bisect.bisect_left(self._sorted_terms, prefix)
+        while position < len(self._sorted_terms) and self._sorted_terms[position].startswith(prefix):
+            yield self._sorted_terms[position]
+            position += 1
+
+    def _match_token(self, token: str, tables: Tuple[str, ...]) -> Dict[DocKey, float]:
+        if len(token) >= MIN_PREFIX_LENGTH:
+            terms = list(self._terms_with_prefix(token))
+        else:
+            terms = [token] if token in self._postings else []
+        all_tables = set(tables) >= set(SEARCH_TABLES)
+
+        # Частый случай - одно точное совпадение: словарь индекса отдаётся без копирования, дальше он только читается
+        if terms == [token] and all_tables:
+            return self._postings[token]
+
+        scores: Dict[DocKey, float] = {}
+        for term in terms:
+            factor = 1.0 if term == token else PREFIX_FACTOR
+            for key, weight in self._postings[term].items():
+                if (all_tables or key[0] in tables) and weight * factor > scores.get(key, 0.0):
+                    scores[key] = weight * factor
+        return scores
+
+    def search(self, query: str, limit: int, tables: Tuple[str, ...] = SEARCH_TABLES) -> Tuple[List[Tuple[DocKey, float]], int]:
+        self.searches += 1
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return [], 0
+
+        # Сначала самый редкий токен: пересечение множеств сразу становится маленьким
+        matches = sorted((self._match_token(token, tables) for token in tokens), key=len)
+        scores = matches[0]
+        for token_scores in matches[1:]:
+            scores = {key: score + token_scores[key] for key, score in scores.items() if key in token_scores}
+            if not scores:
+                return [], 0
+
+        # nlargest устойчива: при равной релевантности внутри таблицы сохраняется порядок снимка (id DESC)
+        top = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+        return top, len(scores)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "searches": self.searches,
+            "rebuilds": self.rebuilds,
+            "upserts": self.upserts,
+            "documents": len(self._doc_terms),
+            "terms": len(self._postings),
+            "versions": dict(self._versions),
+        }
+
+
+search_index = SearchIndex()
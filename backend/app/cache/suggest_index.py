@@ -0,0 +1,175 @@
+import bisect
+import logging
+import time
+from typing import Any, Dict, List, Tuple
+
+from backend.app.cache.catalog_cache import catalog_cache, CatalogSnapshot
+from backend.app.cache.search_index import tokenize, SEARCH_TABLES, DocKey
+
+
+logger = logging.getLogger(__name__)
+
+
+# Поля, по которым строятся подсказки, в порядке важности
+SUGGEST_FIELDS = ("name", "brend", "model")
+
+# Сколько записей каждого массива просматривается после bisect в поисках уникальных товаров
+MAX_SCAN = 200
+
+# Ключи с начала названия лежат в отдельном массиве и просматриваются первыми:
+# иначе хвосты слов ("terea n" у сотни стиков) выбирают лимит раньше, чем дойдёт до "terea sienna"
+HEAD, TAIL = 0, 1
+
+
+class SuggestIndex:
+    def __init__(self):
+        # Отсортированные массивы нормализованных хвостов названий и параллельные массивы (товар, позиция слова),
+        # по одному на HEAD и TAIL
+        self._keys: Tuple[List[str], List[str]] = ([], [])
+        self._entries: Tuple[List[Tuple[DocKey, int]], List[Tuple[DocKey, int]]] = ([], [])
+        self._doc_keys: Dict[DocKey, List[Tuple[int, str]]] = {}
+        self._docs: Dict[DocKey, Tuple[str, str]] = {}
+        self._versions: Dict[str, int] = {}
+
+        self.lookups = 0
+        self.rebuilds = 0
+        self.upserts = 0
+
+    @staticmethod
+    def _item_keys(item: Any) -> List[Tuple[str, int]]:
+        keys = []
+        for field_position, field in enumerate(SUGGEST_FIELDS):
+            value = getattr(item, field, None)
+            if not value:
+                continue
+            # Подсказка находит товар по началу любого слова: "prime" -> "Крышка Iluma Prime"
+            tokens = tokenize(str(value))
+            for word_position in range(len(tokens)):
+                keys.append((" ".join(tokens[word_position:]), field_position * 100 + word_position))
+        return keys
+
+    @staticmethod
+    def _tier(position: int) -> int:
+        return HEAD if position == 0 else TAIL
+
+    def _add(self, key: DocKey, item: Any) -> None:
+        doc_keys = []
+        for text, position in self._item_keys(item):
+            tier = self._tier(position)
+            keys, entries = self._keys[tier], self._entries[tier]
+            index = bisect.bisect_right(keys, text)
+            keys.insert(index, text)
+            entries.insert(index, (key, position))
+            doc_keys.append((tier, text))
+        self._doc_keys[key] = doc_keys
+        self._docs[key] = (item.name, item.ref)
+
+    def _remove(self, key: DocKey) -> None:
+        for tier, text in self._doc_keys.pop(key, ()):
+            keys, entries = self._keys[tier], self._entries[tier]
+            index = bisect.bisect_left(keys, text)
+            while index < len(keys) and keys[index] == text:
+                if entries[index][0] == key:
+                    del keys[index]
+                    del entries[index]
+                    break
+                index += 1
+        self._docs.pop(key, None)
+
+    def sync(self, name: str, snapshot: CatalogSnapshot) -> None:
+        if self._versions.get(name) == snapshot.version:
+            return
+
+        started = time.perf_counter()
+        # Полная пересборка дешевле вставок по одной: собираем пары и сортируем один раз
+        pairs = tuple(
+            [(text, entry) for text, entry in zip(keys, entries) if entry[0][0] != name]
+            for keys, entries in zip(self._keys, self._entries)
+        )
+        for key in [key for key in self._docs if key[0] == name]:
+            self._doc_keys.pop(key, None)
+            self._docs.pop(key, None)
+
+        for item in snapshot.items:
+            key = (name, item.id)
+            doc_keys = []
+            for text, position in self._item_keys(item):
+                tier = self._tier(position)
+                pairs[tier].append((text, (key, position)))
+                doc_keys.append((tier, text))
+            self._doc_keys[key] = doc_keys
+            self._docs[key] = (item.name, item.ref)
+
+        for tier_pairs in pairs:
+            tier_pairs.sort(key=lambda pair: pair[0])
+        self._keys = tuple([text for text, _ in tier_pairs] for tier_pairs in pairs)
+        self._entries = tuple([entry for _, entry in tier_pairs] for tier_pairs in pairs)
+        self._versions[name] = snapshot.version
+
+        self.rebuilds += 1
+        logger.info(
+            "Индекс подсказок %s перестроен: %s записей, %s ключей за %.1f мс",
+            name, len(snapshot), self._key_count(), (time.perf_counter() - started) * 1000
+        )
+
+    def upsert(self, name: str, item: Any) -> None:
+        if name not in SEARCH_TABLES:
+            return
+
+        self._remove((name, item.id))
+        self._add((name, item.id), item)
+        self._mark_synced(name)
+        self.upserts += 1
+
+    def remove(self, name: str, item_id: int) -> None:
+        if name not in SEARCH_TABLES:
+            return
+
+        self._remove((name, item_id))
+        self._mark_synced(name)
+        self.upserts += 1
+
+    def _mark_synced(self, name: str) -> None:
+        # Как и в search_index: правка из админки применена точечно, перестроение не нужно
+        version = catalog_cache.version(name)
+        if self._versions.get(name) == version - 1:
+            self._versions[name] = version
+
+    def suggest(self, prefix: str, limit: int) -> List[Tuple[DocKey, str, str]]:
+        self.lookups += 1
+        prefix = " ".join(tokenize(prefix))
+        if not prefix:
+            return []
+
+        best: Dict[DocKey, int] = {}
+        for keys, entries in zip(self._keys, self._entries):
+            # Все совпадения из HEAD ранжируются выше любых из TAIL
+            if len(best) >= limit:
+                break
+            index = bisect.bisect_left(keys, prefix)
+            end = min(index + MAX_SCAN, len(keys))
+            while index < end and keys[index].startswith(prefix):
+                key, position = entries[index]
+                if position < best.get(key, position + 1):
+                    best[key] = position
+                index += 1
+
+        # Совпадение с начала названия выше совпадения с середины, затем короткие названия
+        ranked = sorted(best.items(), key=lambda entry: (entry[1], len(self._docs[entry[0]][0])))
+        return [(key, *self._docs[key]) for key, _ in ranked[:limit]]
+
+    def _key_count(self) -> int:
+        return sum(len(keys) for keys in self._keys)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "lookups": self.lookups,
+            "rebuilds": self.rebuilds,
+            "upserts": self.upserts,
+            "documents": len(self._docs),
+            "keys": self._key_count(),
+            "versions": dict(self._versions),
+        }
+
+
+suggest_index = SuggestIndex()
@@ -0,0 +1,70 @@
+import logging
+import time
+from typing import Any, Dict, Tuple
+
+from backend.app.cache.catalog_cache import catalog_cache
+from backend.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class TotalsCache:
+    def __init__(self, enabled: bool = True, ttl: int = 60):
+        self.enabled = enabled
+        self.ttl = ttl
+        # (таблица, ключ фильтра) -> (версия каталога, количество, время записи)
+        self._totals: Dict[Tuple[str, str], Tuple[int, int, float]] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str, filter_key: str = "") -> int | None:
+        if not self.enabled:
+            return None
+
+        entry = self._totals.get((name, filter_key))
+        if entry is not None:
+            version, total, stored_at = entry
+            is_expired = bool(self.ttl) and time.monotonic() - stored_at >= self.ttl
+            if version == catalog_cache.version(name) and not is_expired:
+                self.hits += 1
+                return total
+            self._totals.pop((name, filter_key), None)
+
+        self.misses += 1
+        return None
+
+    def set(self, name: str, total: int, filter_key: str = "") -> None:
+        if self.enabled:
+            self._totals[(name, filter_key)] = (catalog_cache.version(name), total, time.monotonic())
+
+    def increment(self, name: str, delta: int = 1) -> None:
+        entry = self._totals.get((name, ""))
+        self._drop_filtered(name)
+        if entry is not None:
+            version, total, stored_at = entry
+            self._totals[(name, "")] = (version, total + delta, stored_at)
+
+    def invalidate(self, name: str) -> None:
+        self._drop_filtered(name)
+        self._totals.pop((name, ""), None)
+        logger.debug("Счётчики таблицы %s сброшены", name)
+
+    def _drop_filtered(self, name: str) -> None:
+        for key in [key for key in self._totals if key[0] == name and key[1]]:
+            self._totals.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._totals)
+        }
+
+
+totals_cache = TotalsCache(
+    enabled=settings.cache.totals_enabled,
+    ttl=settings.cache.totals_ttl,
+)
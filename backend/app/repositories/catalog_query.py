@@ -0,0 +1,193 @@
+import base64
+import binascii
+import bisect
+import decimal
+import json
+from typing import Any, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import Select, and_, or_, func
+
+from backend.app.api.schemas.filters_schemas import ProductFilters, PageCursor, SortEnum
+from backend.app.cache.catalog_cache import CatalogSnapshot
+from backend.core.models import DevicesModel, IqosModel, TereaModel
+
+
+# У каждой таблицы товаров своё имя колонки подкатегории
+CATEGORY_COLUMNS = {
+    DevicesModel: "device_id",
+    IqosModel: "id_category",
+    TereaModel: "terea_id",
+}
+
+# Число отфильтрованных выборок, которые хранятся в одном снимке каталога
+MAX_SNAPSHOT_VIEWS = 64
+
+
+def _sort_expression(model, sort: SortEnum):
+    if sort in ("price_asc", "price_desc"):
+        return model.price
+    if sort == "new":
+        return model.new
+    if sort == "hit":
+        return model.hit
+    return None
+
+
+def _parse_sort_value(sort: SortEnum, value: str | None) -> Any:
+    try:
+        if sort in ("price_asc", "price_desc"):
+            return decimal.Decimal(value)
+        return int(value)
+    except (TypeError, ValueError, decimal.InvalidOperation) as error:
+        raise ValueError("Некорректный курсор пагинации") from error
+
+
+def sort_value(item: Any, sort: SortEnum) -> str | None:
+    if sort in ("price_asc", "price_desc"):
+        return str(item.price)
+    if sort == "new":
+        return str(item.new)
+    if sort == "hit":
+        return str(item.hit)
+    return None
+
+
+def encode_cursor(cursor: PageCursor) -> str:
+    payload = {"id": cursor.id}
+    if cursor.sort != "id":
+        payload.update({"s": cursor.sort, "v": cursor.value})
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> PageCursor:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return PageCursor(id=payload["id"], sort=payload.get("s", "id"), value=payload.get("v"))
+    except (ValueError, KeyError, TypeError, AttributeError, binascii.Error, ValidationError) as error:
+        raise ValueError("Некорректный курсор пагинации") from error
+
+
+def check_cursor(cursor: PageCursor | None, filters: ProductFilters) -> None:
+    if cursor is not None and cursor.sort != filters.sort:
+        raise ValueError("Курсор выдан для другой сортировки")
+
+
+def apply_filters(query: Select, model, filters: ProductFilters) -> Select:
+    if filters.price_min is not None:
+        query = query.where(model.price >= filters.price_min)
+    if filters.price_max is not None:
+        query = query.where(model.price <= filters.price_max)
+    if filters.nalichie is not None:
+        query = query.where(model.nalichie == filters.nalichie)
+    if filters.new is not None:
+        query = query.where(model.new == filters.new)
+    if filters.hit is not None:
+        query = query.where(model.hit == filters.hit)
+    if filters.category_id is not None:
+        query = query.where(getattr(model, CATEGORY_COLUMNS[model]) == filters.category_id)
+    if filters.color and hasattr(model, "color"):
+        query = query.where(model.color.in_(filters.color))
+    if filters.strength and hasattr(model, "strength"):
+        query = query.where(model.strength.in_(filters.strength))
+    if filters.flavor and hasattr(model, "flavor"):
+        # flavor - это MySQL SET, подходит товар хотя бы с одним из выбранных вкусов
+        query = query.where(or_(*[func.find_in_set(flavor, model.flavor) > 0 for flavor in filters.flavor]))
+    return query
+
+
+def apply_sort(query: Select, model, filters: ProductFilters, cursor: PageCursor | None) -> Select:
+    expression = _sort_expression(model, filters.sort)
+
+    if cursor is not None:
+        if expression is None:
+            query = query.where(model.id < cursor.id)
+        else:
+            value = _parse_sort_value(filters.sort, cursor.value)
+            if filters.sort == "price_asc":
+                # По возрастанию цены и id: порядок совпадает с индексом (price, id)
+                query = query.where(or_(expression > value, and_(expression == value, model.id > cursor.id)))
+            else:
+                query = query.where(or_(expression < value, and_(expression == value, model.id < cursor.id)))
+
+    if expression is None:
+        return query.order_by(model.id.desc())
+    if filters.sort == "price_asc":
+        return query.order_by(expression.asc(), model.id.asc())
+    return query.order_by(expression.desc(), model.id.desc())
+
+
+def _matches(item: Any, filters: ProductFilters) -> bool:
+    if filters.price_min is not None and item.price < filters.price_min:
+        return False
+    if filters.price_max is not None and item.price > filters.price_max:
+        return False
+    if filters.nalichie is not None and item.nalichie != filters.nalichie:
+        return False
+    if filters.new is not None and item.new != filters.new:
+        return False
+    if filters.hit is not None and item.hit != filters.hit:
+        return False
+    if filters.category_id is not None and getattr(item, CATEGORY_COLUMNS[type(item)]) != filters.category_id:
+        return False
+    if filters.color and getattr(item, "color", None) not in filters.color:
+        return False
+    if filters.strength and getattr(item, "strength", None) not in filters.strength:
+        return False
+    if filters.flavor and not set(filters.flavor) & set(getattr(item, "flavor", None) or ()):
+        return False
+    return True
+
+
+def _sort_key(sort: SortEnum, value: Any, item_id: int) -> Tuple:
+    # Ключи растут в порядке выдачи, поэтому позицию курсора можно искать через bisect
+    if sort == "price_asc":
+        return value, item_id
+    if sort in ("price_desc", "new", "hit"):
+        return -value, -item_id
+    return (-item_id,)
+
+
+def _item_sort_key(item: Any, sort: SortEnum) -> Tuple:
+    if sort in ("price_asc", "price_desc"):
+        return _sort_key(sort, item.price, item.id)
+    if sort == "new":
+        return _sort_key(sort, item.new, item.id)
+    if sort == "hit":
+        return _sort_key(sort, item.hit, item.id)
+    return _sort_key(sort, None, item.id)
+
+
+def snapshot_view(snapshot: CatalogSnapshot, filters: ProductFilters) -> Tuple[List[Any], List[Tuple]]:
+    view_key = (filters.cache_key(), filters.sort)
+    view = snapshot.views.get(view_key)
+    if view is None:
+        items = [item for item in snapshot.items if _matches(item, filters)] if filters.is_filtered() else snapshot.items
+        if filters.sort != "id":
+            items = sorted(items, key=lambda item: _item_sort_key(item, filters.sort))
+        view = (items, [_item_sort_key(item, filters.sort) for item in items])
+
+        if len(snapshot.views) >= MAX_SNAPSHOT_VIEWS:
+            snapshot.views.pop(next(iter(snapshot.views)))
+        snapshot.views[view_key] = view
+    return view
+
+
+def snapshot_page(
+        snapshot: CatalogSnapshot,
+        filters: ProductFilters,
+        skip: int,
+        limit: int,
+        cursor: PageCursor | None
+) -> Tuple[List[Any], int]:
+    items, keys = snapshot_view(snapshot, filters)
+
+    if cursor is None:
+        start = skip
+    elif filters.sort == "id":
+        start = bisect.bisect_right(keys, _sort_key("id", None, cursor.id))
+    else:
+        value = _parse_sort_value(filters.sort, cursor.value)
+        start = bisect.bisect_right(keys, _sort_key(filters.sort, value, cursor.id))
+
+    return items[start:start + limit], len(items)
@@ -1,65 +1,226 @@
 import logging
-from decimal import Decimal
+import re
+from decimal import Decimal, ROUND_HALF_UP
+from typing import List, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import select, insert, update, delete, func, false, text
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from backend.core.models import OrderModel, OrderedProductModel
+from backend.app.cache.totals_cache import totals_cache
+from backend.core.models import CustomerModel, OrderModel, OrderedProductModel, IdempotencyKeyModel
 from backend.core.db_helper import db_helper
+from backend.core.metrics import instrument_repository
 
 logger = logging.getLogger(__name__)
 
+CENTS = Decimal('0.01')
 
+NON_DIGITS_RE = re.compile(r"\D")
+
+
+def normalize_phone(phone_number: str) -> str:
+    # "+7 (999) 123-45-67", "89991234567" и "9991234567" - один и тот же покупатель
+    digits = NON_DIGITS_RE.sub("", phone_number)
+    if len(digits) == 11 and digits.startswith("8"):
+        return "7" + digits[1:]
+    if len(digits) == 10 and digits.startswith("9"):
+        return "7" + digits
+    return digits or phone_number.strip()
+
+
+def _expired_key(ttl: int):
+    # Срок ключа считается по часам MySQL: created_at тоже ставит NOW(), расхождение часов приложения не влияет
+    if not ttl:
+        return false()
+    return IdempotencyKeyModel.created_at <= func.timestampadd(text("SECOND"), -ttl, func.now())
+
+
+@instrument_repository
 class OrderRepository:
 
     @staticmethod
-    async def create(order_data: dict) -> OrderModel:
-        logger.info(f"Создание нового заказа с данными: {order_data}")
-        try:
-            ordered_items_data = order_data.pop('ordered_items', [])
-            phone_number = order_data.get('phone_number')
+    def _prepare(order_data: dict) -> Tuple[dict, List[dict]]:
+        ordered_items_data = order_data.pop('ordered_items', [])
 
-            async with db_helper.session_factory() as session:
-                existing_order_result = await session.execute(
-                    select(OrderModel.id)
-                    .where(OrderModel.phone_number == phone_number)
-                    .limit(1)
+        # Округляем так же, как это сделает DECIMAL(..., 2) в MySQL, чтобы ответ совпадал с записанным
+        total_amount = Decimal('0.00')
+        for item_data in ordered_items_data:
+            item_data['price_at_time_of_order'] = Decimal(item_data['price_at_time_of_order']).quantize(CENTS, ROUND_HALF_UP)
+            total_amount += Decimal(item_data['quantity']) * item_data['price_at_time_of_order']
+
+        order_data['total_amount'] = total_amount.quantize(CENTS, ROUND_HALF_UP)
+        return order_data, ordered_items_data
+
+    @staticmethod
+    async def _insert(
+            session: AsyncSession,
+            order_data: dict,
+            ordered_items_data: List[dict],
+            idempotency_key: str | None,
+            request_hash: str | None
+    ) -> OrderModel:
+        phone_number = order_data.get('phone_number')
+        # Время заказа ставит MySQL (server_default NOW()), при повторе пачки прошлое значение не переносится
+        order_data.pop('created_at', None)
+
+        # Первый заказ определяется по уникальному ключу телефона: MySQL вернёт 1 строку для вставки
+        # и 2 для обновления, а параллельные первые заказы с одного номера упорядочит блокировка строки
+        customer_insert = mysql_insert(CustomerModel).values(
+            phone=normalize_phone(phone_number),
+            customer_name=order_data['customer_name'],
+            first_order_at=func.now(),
+            last_order_at=func.now(),
+            orders_count=1,
+            total_spent=order_data['total_amount'],
+        )
+        customer_result = await session.execute(
+            customer_insert.on_duplicate_key_update(
+                # LAST_INSERT_ID(id) отдаёт id существующего покупателя через lastrowid
+                id=func.last_insert_id(CustomerModel.id),
+                customer_name=customer_insert.inserted.customer_name,
+                last_order_at=customer_insert.inserted.last_order_at,
+                orders_count=CustomerModel.orders_count + 1,
+                total_spent=CustomerModel.total_spent + customer_insert.inserted.total_spent,
+            )
+        )
+        order_data['is_first_order'] = customer_result.rowcount == 1
+        order_data['customer_id'] = customer_result.lastrowid
+
+        order_result = await session.execute(insert(OrderModel).values(**order_data))
+        order_id = order_result.inserted_primary_key[0]
+
+        if ordered_items_data:
+            # Все позиции одним INSERT ... VALUES (...), (...)
+            await session.execute(
+                insert(OrderedProductModel).values([
+                    {**item_data, 'order_id': order_id} for item_data in ordered_items_data
+                ])
+            )
+
+        # Время заказа и id позиций одним запросом: на подряд идущие id после многострочной вставки
+        # не полагаемся (interleaved-режим innodb_autoinc_lock_mode, auto_increment_increment > 1)
+        rows = (await session.execute(
+            select(OrderModel.created_at, OrderedProductModel.id)
+            .outerjoin(OrderedProductModel, OrderedProductModel.order_id == OrderModel.id)
+            .where(OrderModel.id == order_id)
+            .order_by(OrderedProductModel.id)
+        )).all()
+        order_data['created_at'] = rows[0].created_at
+        item_ids = [row.id for row in rows if row.id is not None]
+
+        if idempotency_key is not None:
+            # Ключ пишется в той же транзакции: при гонке двух повторов второй упадёт на первичном ключе
+            # и откатит свой заказ целиком
+            await session.execute(
+                insert(IdempotencyKeyModel).values(
+                    key=idempotency_key,
+                    request_hash=request_hash,
+                    order_id=order_id,
+                    created_at=order_data['created_at'],
                 )
-                existing_order = existing_order_result.scalar_one_or_none()
+            )
 
-                order_data['is_first_order'] = existing_order is None
+        # Ответ собирается из записанных значений, без загрузки заказа и позиций через ORM
+        new_order = OrderModel(id=order_id, **order_data)
+        new_order.ordered_items = [
+            OrderedProductModel(id=item_id, order_id=order_id, **item_data)
+            for item_id, item_data in zip(item_ids, ordered_items_data)
+        ]
+        return new_order
 
-                total_amount = Decimal('0.00')
-                for item_data in ordered_items_data:
-                    quantity = item_data.get('quantity', 0)
-                    price = Decimal(item_data.get('price_at_time_of_order', 0))
-                    total_amount += Decimal(quantity) * price
+    @staticmethod
+    async def create(order_data: dict, idempotency_key: str | None = None, request_hash: str | None = None) -> OrderModel:
+        logger.info("Создание нового заказа с данными: %s", order_data)
+        try:
+            order_data, ordered_items_data = OrderRepository._prepare(order_data)
 
-                order_data['total_amount'] = total_amount
+            async with db_helper.session_factory() as session:
+                new_order = await OrderRepository._insert(
+                    session, order_data, ordered_items_data, idempotency_key, request_hash
+                )
+                await session.commit()
+            totals_cache.increment("orders")
 
-                new_order = OrderModel(**order_data)
-                session.add(new_order)
-                await session.flush()
+            logger.info("Заказ успешно создан с ID: %s, is_first_order: %s", new_order.id, new_order.is_first_order)
+            return new_order
+        except Exception as error:
+            logger.error("Ошибка при создании заказа: %s", error, exc_info=True)
+            raise
 
-                for item_data in ordered_items_data:
-                    item_data['price_at_time_of_order'] = Decimal(item_data['price_at_time_of_order'])
-                    item = OrderedProductModel(order_id=new_order.id, **item_data)
-                    session.add(item)
+    @staticmethod
+    async def create_batch(orders: List[Tuple[dict, str | None, str | None]]) -> List[OrderModel | Exception]:
+        # Групповая фиксация: все заказы пачки пишутся через одно соединение и фиксируются одним COMMIT
+        prepared = [(*OrderRepository._prepare(order_data), key, request_hash) for order_data, key, request_hash in orders]
 
+        try:
+            async with db_helper.session_factory() as session:
+                results = [await OrderRepository._insert(session, *order) for order in prepared]
                 await session.commit()
+            totals_cache.increment("orders", len(results))
+            logger.info("Записана пачка заказов: %s", len(results))
+            return results
+        except Exception as error:
+            logger.warning("Пачка из %s заказов откатилась, заказы пишутся по одному: %s", len(prepared), error)
+
+        # Один заказ с ошибкой (например, повтор ключа идемпотентности) не должен ронять остальные
+        results = []
+        async with db_helper.session_factory() as session:
+            for order in prepared:
+                try:
+                    new_order = await OrderRepository._insert(session, *order)
+                    await session.commit()
+                    totals_cache.increment("orders")
+                    results.append(new_order)
+                except Exception as error:
+                    await session.rollback()
+                    logger.error("Ошибка при создании заказа: %s", error, exc_info=True)
+                    results.append(error)
+        return results
 
-                await session.refresh(new_order)
-
-                result = await session.execute(
-                    select(OrderModel)
-                    .options(selectinload(OrderModel.ordered_items))
-                    .where(OrderModel.id == new_order.id)
+    @staticmethod
+    async def subtract_customer_order(customer_id: int, total_amount: Decimal) -> None:
+        # Заказ удалён из админки: счётчики покупателя ведутся приращениями, поэтому вычитаются так же
+        async with db_helper.session_factory() as session:
+            await session.execute(
+                update(CustomerModel)
+                .where(CustomerModel.id == customer_id)
+                .values(
+                    orders_count=CustomerModel.orders_count - 1,
+                    total_spent=CustomerModel.total_spent - total_amount,
                 )
-                fully_loaded_order = result.unique().scalar_one()
+            )
+            await session.commit()
 
-                logger.info(
-                    f"Заказ успешно создан с ID: {fully_loaded_order.id}, is_first_order: {fully_loaded_order.is_first_order}")
-                return fully_loaded_order
-        except Exception as error:
-            logger.error(f"Ошибка при создании заказа: {str(error)}", exc_info=True)
-            raise
+    @staticmethod
+    async def select_order(order_id: int) -> OrderModel | None:
+        async with db_helper.session_factory() as session:
+            result = await session.execute(
+                select(OrderModel)
+                .options(selectinload(OrderModel.ordered_items))
+                .where(OrderModel.id == order_id)
+            )
+            return result.scalar_one_or_none()
+
+    @staticmethod
+    async def select_idempotency_key(key: str, ttl: int) -> IdempotencyKeyModel | None:
+        # Просроченный, но ещё не удалённый ключ удаляется сразу: заказ с ним пишется как новый
+        async with db_helper.session_factory() as session:
+            row = (await session.execute(
+                select(IdempotencyKeyModel, _expired_key(ttl).label("expired")).where(IdempotencyKeyModel.key == key)
+            )).one_or_none()
+            if row is None:
+                return None
+            if row.expired:
+                await session.execute(delete(IdempotencyKeyModel).where(IdempotencyKeyModel.key == key))
+                await session.commit()
+                return None
+            return row.IdempotencyKeyModel
+
+    @staticmethod
+    async def purge_idempotency_keys(ttl: int) -> int:
+        async with db_helper.session_factory() as session:
+            result = await session.execute(delete(IdempotencyKeyModel).where(_expired_key(ttl)))
+            await session.commit()
+            return result.rowcount
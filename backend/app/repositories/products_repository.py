@@ -1,160 +1,515 @@
 import logging
-from typing import Tuple, List
+from typing import Tuple, List, Sequence, Any, Dict
 
-from sqlalchemy import select, func
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, func, or_
+from sqlalchemy.orm import load_only
+from sqlalchemy.orm.attributes import set_committed_value
 
-from backend.core.models import DevicesModel, IqosModel, TereaModel
+from backend.app.api.schemas.filters_schemas import ProductFilters, PageCursor, ViewEnum
+from backend.app.cache.catalog_cache import catalog_cache, CatalogSnapshot
+from backend.app.cache.totals_cache import totals_cache
+from backend.app.cache.category_registry import category_registry
+from backend.app.cache.price_index import price_index
+from backend.app.cache.search_index import search_index
+from backend.app.cache.suggest_index import suggest_index
+from backend.core.models import (
+    DevicesModel, IqosModel, TereaModel,
+    DevicesCategoryModel, IqosCategoryModel, TereaCategoryModel
+)
 from backend.core.db_helper import db_helper
+from backend.core.metrics import instrument_repository
+from backend.app.repositories.catalog_query import apply_filters, apply_sort, check_cursor, snapshot_page, CATEGORY_COLUMNS
 
 
 logger = logging.getLogger(__name__)
 
 
+CATEGORY_SOURCES = {
+    DevicesModel: ("devices_category", DevicesCategoryModel),
+    IqosModel: ("iqos_category", IqosCategoryModel),
+    TereaModel: ("terea_category", TereaCategoryModel),
+}
+
+
+async def _load_categories(category_model) -> Sequence:
+    async with db_helper.read_session() as session:
+        result = await session.execute(select(category_model))
+        return result.scalars().all()
+
+
+async def _attach_categories(model, items: Sequence) -> None:
+    # Категория подставляется из справочника в памяти вместо отдельного SELECT через selectinload.
+    # Вызывается после выхода из сессии: справочник при промахе открывает свою, и соединение вызывающего
+    # не должно простаивать на это время
+    name, category_model = CATEGORY_SOURCES[model]
+    categories = await category_registry.get(name, lambda: _load_categories(category_model))
+    category_column = CATEGORY_COLUMNS[model]
+    for item in items:
+        set_committed_value(item, "category", categories.get(getattr(item, category_column)))
+
+
+async def _load_catalog(model) -> Sequence:
+    async with db_helper.read_session() as session:
+        result = await session.execute(
+            select(model)
+            .order_by(model.id.desc())
+        )
+        items = result.scalars().all()
+
+    await _attach_categories(model, items)
+    return items
+
+
+PRODUCT_TABLES = (("devices", DevicesModel), ("iqos", IqosModel), ("terea", TereaModel))
+
+# Колонки, которых достаточно для проверки цены и наличия
+STOCK_COLUMNS = {
+    DevicesModel: (DevicesModel.id, DevicesModel.ref, DevicesModel.name, DevicesModel.price, DevicesModel.nalichie),
+    IqosModel: (IqosModel.id, IqosModel.ref, IqosModel.name, IqosModel.price, IqosModel.sale_price, IqosModel.nalichie),
+    TereaModel: (TereaModel.id, TereaModel.ref, TereaModel.name, TereaModel.price, TereaModel.pricePack, TereaModel.nalichie),
+}
+
+# Колонки карточки каталога: без LONGTEXT description и прочих полей страницы товара
+CARD_COLUMNS = {
+    DevicesModel: (
+        DevicesModel.id, DevicesModel.name, DevicesModel.image, DevicesModel.price, DevicesModel.nalichie,
+        DevicesModel.new, DevicesModel.hit, DevicesModel.color, DevicesModel.ref, DevicesModel.type,
+        DevicesModel.device_id
+    ),
+    IqosModel: (
+        IqosModel.id, IqosModel.name, IqosModel.image, IqosModel.price, IqosModel.sale_price, IqosModel.color,
+        IqosModel.new, IqosModel.hit, IqosModel.exclusive, IqosModel.nalichie, IqosModel.ref, IqosModel.type,
+        IqosModel.id_category
+    ),
+    TereaModel: (
+        TereaModel.id, TereaModel.name, TereaModel.image, TereaModel.imagePack, TereaModel.price,
+        TereaModel.pricePack, TereaModel.flavor, TereaModel.strength, TereaModel.nalichie, TereaModel.new,
+        TereaModel.hit, TereaModel.ref, TereaModel.type, TereaModel.terea_id
+    ),
+}
+
+
+def _list_options(model, view: ViewEnum) -> list:
+    if view == "card":
+        return [load_only(*CARD_COLUMNS[model])]
+    return []
+
+
+@instrument_repository
 class DevicesRepository:
     @staticmethod
-    async def select_devices(skip: int = 0, limit: int = 100) -> Tuple[List[DevicesModel], int]:
-        logger.debug(f"Получение всех девайсов с пагинацией: skip={skip}, limit={limit}")
+    async def devices_snapshot() -> CatalogSnapshot:
+        return await catalog_cache.get_snapshot("devices", lambda: _load_catalog(DevicesModel))
+
+    @staticmethod
+    async def iqos_snapshot() -> CatalogSnapshot:
+        return await catalog_cache.get_snapshot("iqos", lambda: _load_catalog(IqosModel))
+
+    @staticmethod
+    async def terea_snapshot() -> CatalogSnapshot:
+        return await catalog_cache.get_snapshot("terea", lambda: _load_catalog(TereaModel))
+
+    @staticmethod
+    async def select_devices(
+            skip: int = 0,
+            limit: int = 100,
+            cursor: PageCursor | None = None,
+            filters: ProductFilters | None = None,
+            include_total: bool = True,
+            view: ViewEnum = "full"
+    ) -> Tuple[List[DevicesModel], int | None]:
+        logger.debug("Получение всех девайсов с пагинацией: skip=%s, limit=%s, cursor=%s, filters=%s, view=%s", skip, limit, cursor, filters, view)
+        filters = filters or ProductFilters()
+        check_cursor(cursor, filters)
         try:
-            async with db_helper.session_factory() as session:
-                total_query = select(func.count(DevicesModel.id))
-                total_result = await session.execute(total_query)
-                total = total_result.scalar()
+            if catalog_cache.enabled:
+                snapshot = await DevicesRepository.devices_snapshot()
+                devices, matched = snapshot_page(snapshot, filters, skip, limit, cursor)
+                total = matched if include_total else None
+
+                logger.info("Получено %s девайсов из %s всего (кэш)", len(devices), total)
+                return devices, total
+
+            async with db_helper.read_session() as session:
+                total = None
+                if include_total:
+                    filter_key = filters.cache_key()
+                    total = totals_cache.get("devices", filter_key)
+                    if total is None:
+                        total_result = await session.execute(
+                            apply_filters(select(func.count(DevicesModel.id)), DevicesModel, filters)
+                        )
+                        total = total_result.scalar()
+                        totals_cache.set("devices", total, filter_key)
 
                 devices_query = (
                     select(DevicesModel)
-                    .options(selectinload(DevicesModel.category))
-                    .offset(skip)
+                    .options(*_list_options(DevicesModel, view))
                     .limit(limit)
-                    .order_by(DevicesModel.id.desc())
                 )
+                devices_query = apply_filters(devices_query, DevicesModel, filters)
+                devices_query = apply_sort(devices_query, DevicesModel, filters, cursor)
+                if cursor is None:
+                    devices_query = devices_query.offset(skip)
+
                 devices_result = await session.execute(devices_query)
                 devices = devices_result.scalars().all()
 
-                logger.info(f"Получено {len(devices)} девайсов из {total} всего")
-                return devices, total
+            if view == "full":
+                await _attach_categories(DevicesModel, devices)
+
+            logger.info("Получено %s девайсов из %s всего", len(devices), total)
+            return devices, total
 
         except Exception as error:
-            logger.error(f"Ошибка при получении списка девайсов: {str(error)}", exc_info=True)
+            logger.error("Ошибка при получении списка девайсов: %s", error, exc_info=True)
             raise
 
     @staticmethod
     async def select_device_by_id(devices_id: int) -> DevicesModel | None:
-        logger.debug(f"Поиск девайса по id: {devices_id}")
+        logger.debug("Поиск девайса по id: %s", devices_id)
         try:
-            async with db_helper.session_factory() as session:
+            if catalog_cache.enabled:
+                snapshot = await DevicesRepository.devices_snapshot()
+                return snapshot.by_id.get(devices_id)
+
+            async with db_helper.read_session() as session:
                 result = await session.execute(
                     select(DevicesModel)
-                    .options(selectinload(DevicesModel.category))
                     .where(DevicesModel.id == devices_id)
                 )
                 device = result.scalar_one_or_none()
 
-                if device:
-                    logger.debug(f"Дeвайс с id {devices_id} найден")
-                else:
-                    logger.debug(f"Дeвайс с id {devices_id} не найден")
+            if device:
+                await _attach_categories(DevicesModel, [device])
+                logger.debug("Дeвайс с id %s найден", devices_id)
+            else:
+                logger.debug("Дeвайс с id %s не найден", devices_id)
 
-                return device
+            return device
 
         except Exception as error:
-            logger.error(f"Ошибка при получении девайса по id {devices_id}: {str(error)}", exc_info=True)
+            logger.error("Ошибка при получении девайса по id %s: %s", devices_id, error, exc_info=True)
             raise
 
     @staticmethod
-    async def select_iqos(skip: int = 0, limit: int = 100) -> Tuple[List[IqosModel], int]:
-        logger.debug(f"Получение всех продуктов iqos с пагинацией: skip={skip}, limit={limit}")
+    async def select_iqos(
+            skip: int = 0,
+            limit: int = 100,
+            cursor: PageCursor | None = None,
+            filters: ProductFilters | None = None,
+            include_total: bool = True,
+            view: ViewEnum = "full"
+    ) -> Tuple[List[IqosModel], int | None]:
+        logger.debug("Получение всех продуктов iqos с пагинацией: skip=%s, limit=%s, cursor=%s, filters=%s, view=%s", skip, limit, cursor, filters, view)
+        filters = filters or ProductFilters()
+        check_cursor(cursor, filters)
         try:
-            async with db_helper.session_factory() as session:
-                total_query = select(func.count(IqosModel.id))
-                total_result = await session.execute(total_query)
-                total = total_result.scalar()
+            if catalog_cache.enabled:
+                snapshot = await DevicesRepository.iqos_snapshot()
+                iqos_list, matched = snapshot_page(snapshot, filters, skip, limit, cursor)
+                total = matched if include_total else None
+
+                logger.info("Получено %s продуктов iqos из %s продуктов iqos (кэш)", len(iqos_list), total)
+                return iqos_list, total
+
+            async with db_helper.read_session() as session:
+                total = None
+                if include_total:
+                    filter_key = filters.cache_key()
+                    total = totals_cache.get("iqos", filter_key)
+                    if total is None:
+                        total_result = await session.execute(
+                            apply_filters(select(func.count(IqosModel.id)), IqosModel, filters)
+                        )
+                        total = total_result.scalar()
+                        totals_cache.set("iqos", total, filter_key)
 
                 iqos_list_query = (
                     select(IqosModel)
-                    .options(selectinload(IqosModel.category))
-                    .offset(skip)
+                    .options(*_list_options(IqosModel, view))
                     .limit(limit)
-                    .order_by(IqosModel.id.desc())
                 )
+                iqos_list_query = apply_filters(iqos_list_query, IqosModel, filters)
+                iqos_list_query = apply_sort(iqos_list_query, IqosModel, filters, cursor)
+                if cursor is None:
+                    iqos_list_query = iqos_list_query.offset(skip)
+
                 iqos_result = await session.execute(iqos_list_query)
                 iqos_list = iqos_result.scalars().all()
 
-                logger.info(f"Получено {len(iqos_list)} продуктов iqos из {total} продуктов iqos")
-                return iqos_list, total
+            if view == "full":
+                await _attach_categories(IqosModel, iqos_list)
+
+            logger.info("Получено %s продуктов iqos из %s продуктов iqos", len(iqos_list), total)
+            return iqos_list, total
 
         except Exception as error:
-            logger.error(f"Ошибка при получении списка iqos: {str(error)}", exc_info=True)
+            logger.error("Ошибка при получении списка iqos: %s", error, exc_info=True)
             raise
 
     @staticmethod
     async def select_iqos_by_id(iqos_id: int) -> IqosModel | None:
-        logger.debug(f"Поиск продукта iqos по id: {iqos_id}")
+        logger.debug("Поиск продукта iqos по id: %s", iqos_id)
         try:
-            async with db_helper.session_factory() as session:
+            if catalog_cache.enabled:
+                snapshot = await DevicesRepository.iqos_snapshot()
+                return snapshot.by_id.get(iqos_id)
+
+            async with db_helper.read_session() as session:
                 result = await session.execute(
                     select(IqosModel)
-                    .options(selectinload(IqosModel.category))
                     .where(IqosModel.id == iqos_id)
                 )
                 iqos = result.scalar_one_or_none()
 
-                if iqos:
-                    logger.debug(f"Продукт iqos с id {iqos_id} найден")
-                else:
-                    logger.debug(f"Продукт iqos с id {iqos_id} не найден")
+            if iqos:
+                await _attach_categories(IqosModel, [iqos])
+                logger.debug("Продукт iqos с id %s найден", iqos_id)
+            else:
+                logger.debug("Продукт iqos с id %s не найден", iqos_id)
 
-                return iqos
+            return iqos
 
         except Exception as error:
-            logger.error(f"Ошибка при получении продукта iqos по id {iqos_id}: {str(error)}", exc_info=True)
+            logger.error("Ошибка при получении продукта iqos по id %s: %s", iqos_id, error, exc_info=True)
             raise
 
     @staticmethod
-    async def select_terea(skip: int = 0, limit: int = 100) -> Tuple[List[TereaModel], int]:
-        logger.debug(f"Получение всех продуктов terea с пагинацией: skip={skip}, limit={limit}")
+    async def select_terea(
+            skip: int = 0,
+            limit: int = 100,
+            cursor: PageCursor | None = None,
+            filters: ProductFilters | None = None,
+            include_total: bool = True,
+            view: ViewEnum = "full"
+    ) -> Tuple[List[TereaModel], int | None]:
+        logger.debug("Получение всех продуктов terea с пагинацией: skip=%s, limit=%s, cursor=%s, filters=%s, view=%s", skip, limit, cursor, filters, view)
+        filters = filters or ProductFilters()
+        check_cursor(cursor, filters)
         try:
-            async with db_helper.session_factory() as session:
-                total_query = select(func.count(TereaModel.id))
-                total_result = await session.execute(total_query)
-                total = total_result.scalar()
+            if catalog_cache.enabled:
+                snapshot = await DevicesRepository.terea_snapshot()
+                terea_list, matched = snapshot_page(snapshot, filters, skip, limit, cursor)
+                total = matched if include_total else None
+
+                logger.info("Получено %s продуктов terea из %s продуктов terea (кэш)", len(terea_list), total)
+                return terea_list, total
+
+            async with db_helper.read_session() as session:
+                total = None
+                if include_total:
+                    filter_key = filters.cache_key()
+                    total = totals_cache.get("terea", filter_key)
+                    if total is None:
+                        total_result = await session.execute(
+                            apply_filters(select(func.count(TereaModel.id)), TereaModel, filters)
+                        )
+                        total = total_result.scalar()
+                        totals_cache.set("terea", total, filter_key)
 
                 terea_list_query = (
                     select(TereaModel)
-                    .options(selectinload(TereaModel.category))
-                    .offset(skip)
+                    .options(*_list_options(TereaModel, view))
                     .limit(limit)
-                    .order_by(TereaModel.id.desc())
                 )
+                terea_list_query = apply_filters(terea_list_query, TereaModel, filters)
+                terea_list_query = apply_sort(terea_list_query, TereaModel, filters, cursor)
+                if cursor is None:
+                    terea_list_query = terea_list_query.offset(skip)
+
                 terea_result = await session.execute(terea_list_query)
                 terea_list = terea_result.scalars().all()
 
-                logger.info(f"Получено {len(terea_list)} продуктов terea из {total} продуктов terea")
-                return terea_list, total
+            if view == "full":
+                await _attach_categories(TereaModel, terea_list)
+
+            logger.info("Получено %s продуктов terea из %s продуктов terea", len(terea_list), total)
+            return terea_list, total
 
         except Exception as error:
-            logger.error(f"Ошибка при получении списка iqos: {str(error)}", exc_info=True)
+            logger.error("Ошибка при получении списка iqos: %s", error, exc_info=True)
             raise
 
     @staticmethod
     async def select_terea_by_id(terea_id: int) -> TereaModel | None:
-        logger.debug(f"Поиск продукта terea по id: {terea_id}")
+        logger.debug("Поиск продукта terea по id: %s", terea_id)
         try:
-            async with db_helper.session_factory() as session:
+            if catalog_cache.enabled:
+                snapshot = await DevicesRepository.terea_snapshot()
+                return snapshot.by_id.get(terea_id)
+
+            async with db_helper.read_session() as session:
                 result = await session.execute(
                     select(TereaModel)
-                    .options(selectinload(TereaModel.category))
                     .where(TereaModel.id == terea_id)
                 )
                 terea = result.scalar_one_or_none()
 
-                if terea:
-                    logger.debug(f"Продукт terea с id {terea_id} найден")
-                else:
-                    logger.debug(f"Продукт terea с id {terea_id} не найден")
+            if terea:
+                await _attach_categories(TereaModel, [terea])
+                logger.debug("Продукт terea с id %s найден", terea_id)
+            else:
+                logger.debug("Продукт terea с id %s не найден", terea_id)
 
-                return terea
+            return terea
+
+        except Exception as error:
+            logger.error("Ошибка при получении продукта terea по id %s: %s", terea_id, error, exc_info=True)
+            raise
+
+
+    @staticmethod
+    async def select_product_by_ref(ref: str) -> Tuple[str, Any] | None:
+        logger.debug("Поиск товара по ref: %s", ref)
+        try:
+            if catalog_cache.enabled:
+                snapshots = (
+                    ("devices", await DevicesRepository.devices_snapshot()),
+                    ("iqos", await DevicesRepository.iqos_snapshot()),
+                    ("terea", await DevicesRepository.terea_snapshot()),
+                )
+                for product_type, snapshot in snapshots:
+                    product = snapshot.by_ref.get(ref)
+                    if product is not None:
+                        return product_type, product
+                return None
+
+            found = None
+            async with db_helper.read_session() as session:
+                # ref уникален в каждой таблице, поэтому каждый запрос - точечный поиск по индексу
+                for product_type, model in PRODUCT_TABLES:
+                    result = await session.execute(
+                        select(model)
+                        .where(model.ref == ref)
+                    )
+                    product = result.scalar_one_or_none()
+                    if product is not None:
+                        found = product_type, model, product
+                        break
+
+            if found is None:
+                logger.debug("Товар с ref %s не найден", ref)
+                return None
+
+            product_type, model, product = found
+            await _attach_categories(model, [product])
+            logger.debug("Товар с ref %s найден в таблице %s", ref, product_type)
+            return product_type, product
+
+        except Exception as error:
+            logger.error("Ошибка при получении товара по ref %s: %s", ref, error, exc_info=True)
+            raise
+
+
+    @staticmethod
+    async def select_products_batch(
+            refs: List[str],
+            ids: Dict[str, List[int]]
+    ) -> Tuple[Dict[str, Tuple[str, Any]], Dict[Tuple[str, int], Any]]:
+        logger.debug("Пакетный поиск товаров: %s ref, %s id", len(refs), sum(len(value) for value in ids.values()))
+        found_by_ref: Dict[str, Tuple[str, Any]] = {}
+        found_by_id: Dict[Tuple[str, int], Any] = {}
+        try:
+            if catalog_cache.enabled:
+                snapshots = {
+                    "devices": await DevicesRepository.devices_snapshot(),
+                    "iqos": await DevicesRepository.iqos_snapshot(),
+                    "terea": await DevicesRepository.terea_snapshot(),
+                }
+                for product_type, _ in PRODUCT_TABLES:
+                    snapshot = snapshots[product_type]
+                    for ref in refs:
+                        if ref not in found_by_ref and ref in snapshot.by_ref:
+                            found_by_ref[ref] = (product_type, snapshot.by_ref[ref])
+                    for item_id in ids.get(product_type, ()):
+                        if item_id in snapshot.by_id:
+                            found_by_id[(product_type, item_id)] = snapshot.by_id[item_id]
+                return found_by_ref, found_by_id
+
+            ref_set = set(refs)
+            async with db_helper.read_session() as session:
+                # Не больше одного запроса IN (...) на таблицу
+                for product_type, model in PRODUCT_TABLES:
+                    table_ids = set(ids.get(product_type, ()))
+                    if not refs and not table_ids:
+                        continue
+
+                    conditions = []
+                    if ref_set:
+                        conditions.append(model.ref.in_(ref_set))
+                    if table_ids:
+                        conditions.append(model.id.in_(table_ids))
+
+                    result = await session.execute(
+                        select(model)
+                        .options(load_only(*STOCK_COLUMNS[model]))
+                        .where(or_(*conditions))
+                    )
+                    for product in result.scalars().all():
+                        if product.ref in ref_set and product.ref not in found_by_ref:
+                            found_by_ref[product.ref] = (product_type, product)
+                        if product.id in table_ids:
+                            found_by_id[(product_type, product.id)] = product
+
+                logger.debug("Найдено %s товаров по ref и %s по id", len(found_by_ref), len(found_by_id))
+                return found_by_ref, found_by_id
+
+        except Exception as error:
+            logger.error("Ошибка при пакетном получении товаров: %s", error, exc_info=True)
+            raise
+
+
+    @staticmethod
+    async def search_products(query: str, limit: int, types: Tuple[str, ...]) -> Tuple[List[Tuple[str, Any, float]], int]:
+        logger.debug("Поиск товаров: query=%s, limit=%s, types=%s", query, limit, types)
+        try:
+            # Индекс строится из снимков каталога, поэтому поиск всегда работает по ним
+            snapshots = {
+                "devices": await DevicesRepository.devices_snapshot(),
+                "iqos": await DevicesRepository.iqos_snapshot(),
+                "terea": await DevicesRepository.terea_snapshot(),
+            }
+            for product_type in types:
+                search_index.sync(product_type, snapshots[product_type])
+
+            top, total = search_index.search(query, limit, types)
+            results = []
+            for (product_type, item_id), score in top:
+                product = snapshots[product_type].by_id.get(item_id)
+                if product is not None:
+                    results.append((product_type, product, score))
+
+            logger.debug("По запросу %s найдено %s товаров", query, total)
+            return results, total
+
+        except Exception as error:
+            logger.error("Ошибка при поиске товаров по запросу %s: %s", query, error, exc_info=True)
+            raise
+
+
+    @staticmethod
+    async def sync_suggest_index() -> None:
+        suggest_index.sync("devices", await DevicesRepository.devices_snapshot())
+        suggest_index.sync("iqos", await DevicesRepository.iqos_snapshot())
+        suggest_index.sync("terea", await DevicesRepository.terea_snapshot())
+
+    @staticmethod
+    async def sync_price_index() -> None:
+        # Вызывается на каждый заказ: снимки запрашиваются, только если каталог сменил версию
+        if not price_index.is_current("devices"):
+            price_index.sync("devices", await DevicesRepository.devices_snapshot())
+        if not price_index.is_current("iqos"):
+            price_index.sync("iqos", await DevicesRepository.iqos_snapshot())
+        if not price_index.is_current("terea"):
+            price_index.sync("terea", await DevicesRepository.terea_snapshot())
+
+    @staticmethod
+    async def suggest_products(prefix: str, limit: int) -> List[Tuple[Tuple[str, int], str, str]]:
+        try:
+            await DevicesRepository.sync_suggest_index()
+            return suggest_index.suggest(prefix, limit)
 
         except Exception as error:
-            logger.error(f"Ошибка при получении продукта terea по id {terea_id}: {str(error)}", exc_info=True)
+            logger.error("Ошибка при получении подсказок по префиксу %s: %s", prefix, error, exc_info=True)
             raise
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Tuple
+
+from backend.app.repositories.orders_repository import OrderRepository
+from backend.core.config import settings
+from backend.core.metrics import stats_counters
+from backend.core.models import OrderModel
+
+
+logger = logging.getLogger(__name__)
+
+
+class OrderQueueFull(Exception):
+    pass
+
+
+# Очередь записи заказов: запросы не держат по соединению на свою транзакцию, а ждут групповой COMMIT
+# одной фоновой задачи. Ответ клиенту уходит только после фиксации, так что гарантии те же, что у прямой записи
+class OrderQueue:
+    def __init__(self, enabled: bool = False, max_size: int = 1000, batch_max: int = 50, batch_window_ms: int = 5):
+        self.enabled = enabled
+        self.max_size = max_size
+        self.batch_max = batch_max
+        self.batch_window = batch_window_ms / 1000
+        self._queue: asyncio.Queue | None = None
+        self._writer: asyncio.Task | None = None
+        self._accepting = False
+
+        self.enqueued = 0
+        self.overflows = 0
+        self.batches = 0
+        self.committed = 0
+        self.failed = 0
+        self.max_batch = 0
+
+    def is_running(self) -> bool:
+        return self.enabled and self._accepting
+
+    def start(self) -> None:
+        if not self.enabled or self._accepting:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._writer = asyncio.create_task(self._write_loop())
+        self._accepting = True
+        logger.info("Очередь заказов запущена: до %s заказов, пачка до %s", self.max_size, self.batch_max)
+
+    async def stop(self) -> None:
+        if self._writer is None:
+            return
+        # Новые заказы идут напрямую, а уже принятые дописываются до остановки
+        self._accepting = False
+        await self._queue.join()
+        self._writer.cancel()
+        try:
+            await self._writer
+        except asyncio.CancelledError:
+            pass
+        self._writer = None
+        logger.info("Очередь заказов остановлена, записано заказов: %s", self.committed)
+
+    async def submit(self, order_data: dict, idempotency_key: str | None, request_hash: str | None) -> OrderModel:
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((order_data, idempotency_key, request_hash, future))
+        except asyncio.QueueFull:
+            self.overflows += 1
+            raise OrderQueueFull()
+
+        self.enqueued += 1
+        return await future
+
+    async def _next_batch(self, batch: List[Tuple[dict, str | None, str | None, asyncio.Future]]) -> None:
+        # Пачка набирается в переданный список: при сбое вызывающий видит всё, что уже взято из очереди
+        batch.append(await self._queue.get())
+        # Короткое окно набирает пачку при всплеске и почти не добавляет задержки одиночному заказу
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.batch_max:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+    async def _write_batch(self, batch: List[Tuple[dict, str | None, str | None, asyncio.Future]]) -> None:
+        try:
+            results = await OrderRepository.create_batch([order[:3] for order in batch])
+        except Exception as error:
+            logger.error("Ошибка записи пачки заказов: %s", error, exc_info=True)
+            results = [error] * len(batch)
+
+        for (_, _, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                self.failed += 1
+                future.set_exception(result)
+            else:
+                self.committed += 1
+                future.set_result(result)
+
+        self.batches += 1
+        self.max_batch = max(self.max_batch, len(batch))
+
+    def _fail(self, batch: List[Tuple[dict, str | None, str | None, asyncio.Future]], error: Exception) -> None:
+        for _, _, _, future in batch:
+            if not future.done():
+                self.failed += 1
+                future.set_exception(error)
+            self._queue.task_done()
+
+    async def _write_loop(self) -> None:
+        batch = []
+        try:
+            while True:
+                await self._next_batch(batch)
+                await self._write_batch(batch)
+                for _ in batch:
+                    self._queue.task_done()
+                batch = []
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            # Сломалась сама очередь, а не запись заказа: новые заказы пишутся напрямую, а принятые получают
+            # ошибку сразу, а не ждут ответа, который уже никто не отправит
+            self._accepting = False
+            logger.error("Очередь заказов остановлена из-за ошибки, заказы пишутся напрямую: %s", error, exc_info=True)
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            self._fail(batch, error)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "running": self.is_running(),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "enqueued": self.enqueued,
+            "overflows": self.overflows,
+            "batches": self.batches,
+            "committed": self.committed,
+            "failed": self.failed,
+            "max_batch": self.max_batch,
+        }
+
+
+order_queue = OrderQueue(
+    enabled=settings.orders.queue_enabled,
+    max_size=settings.orders.queue_max_size,
+    batch_max=settings.orders.queue_batch_max,
+    batch_window_ms=settings.orders.queue_batch_window_ms,
+)
+stats_counters(
+    "order_queue_events_total",
+    "Очередь заказов: принятые, переполнения, пачки, записанные и неудачные заказы",
+    "event",
+    order_queue.stats,
+    ("enqueued", "overflows", "batches", "committed", "failed"),
+)
@@ -1,21 +1,31 @@
+import hashlib
 import logging
+from typing import Tuple
+
+from sqlalchemy.exc import IntegrityError
 
 from backend.app.api.schemas.orders_schemas import OrderCreate, OrderResponse, GetOrder, OrderedItemResponse
+from backend.app.cache.idempotency_cache import idempotency_cache
+from backend.app.cache.price_index import price_index
 from backend.app.repositories.orders_repository import OrderRepository
+from backend.app.repositories.products_repository import DevicesRepository
+from backend.app.services.order_queue import order_queue, OrderQueueFull
+from backend.core.config import settings
+from backend.core.request_timing import timed_phase
 
 
 logger = logging.getLogger(__name__)
 
 
+class IdempotencyConflict(Exception):
+    pass
+
+
 class OrdersService:
 
     @staticmethod
-    async def create_order(order: OrderCreate) -> OrderResponse:
-        logger.info(f"Создание заказа: {order.model_dump()}")
-        try:
-            order_data = order.model_dump()
-            order_model = await OrderRepository.create(order_data)
-
+    def _order_response(order_model) -> OrderResponse:
+        with timed_phase("pydantic"):
             get_order = GetOrder(
                 id=order_model.id,
                 customer_name=order_model.customer_name,
@@ -36,10 +46,178 @@ class OrdersService:
                     for item in order_model.ordered_items
                 ]
             )
-
-            logger.info(f"Заказ успешно создан: {get_order.id}")
             return OrderResponse(order=get_order)
 
+    @staticmethod
+    def _check_request_hash(idempotency_key: str, stored_hash: str, request_hash: str) -> None:
+        if stored_hash != request_hash:
+            idempotency_cache.conflicts += 1
+            logger.warning("Idempotency-Key %s повторно использован с другим заказом", idempotency_key)
+            raise IdempotencyConflict("Idempotency-Key уже использован для другого заказа")
+
+    @staticmethod
+    async def _replay(idempotency_key: str, request_hash: str, check_db: bool = True) -> OrderResponse | None:
+        cached = idempotency_cache.get(idempotency_key)
+        if cached is not None:
+            stored_hash, response = cached
+            OrdersService._check_request_hash(idempotency_key, stored_hash, request_hash)
+            idempotency_cache.memory_replays += 1
+            return response
+        if not check_db:
+            return None
+
+        # Ключа нет в памяти этого воркера: заказ мог быть создан другим воркером или до рестарта
+        record = await OrderRepository.select_idempotency_key(idempotency_key, idempotency_cache.ttl)
+        if record is None:
+            return None
+
+        OrdersService._check_request_hash(idempotency_key, record.request_hash, request_hash)
+        order_model = await OrderRepository.select_order(record.order_id)
+        if order_model is None:
+            return None
+
+        response = OrdersService._order_response(order_model)
+        idempotency_cache.set(idempotency_key, record.request_hash, response)
+        idempotency_cache.db_replays += 1
+        return response
+
+    @staticmethod
+    async def _purge_idempotency_keys() -> None:
+        if not idempotency_cache.ttl or not idempotency_cache.purge_due():
+            return
+        try:
+            purged = await OrderRepository.purge_idempotency_keys(idempotency_cache.ttl)
+            logger.info("Удалено просроченных ключей идемпотентности: %s", purged)
+        except Exception as error:
+            logger.warning("Не удалось удалить просроченные ключи идемпотентности: %s", error)
+
+    @staticmethod
+    async def _apply_prices(order_data: dict) -> None:
+        mode = settings.orders.price_validation
+        ordered_items = order_data.get('ordered_items', [])
+        product_keys = [
+            (item.pop('product_type', None), item.pop('product_id', None), item.pop('variant', None))
+            for item in ordered_items
+        ]
+        if mode == "off" or not ordered_items:
+            return
+
+        # Все позиции проверяются по индексу в памяти, без запроса на каждый товар
+        await DevicesRepository.sync_price_index()
+        problems = []
+        # Позиции без (type, id), которые не нашлись по названию, и terea без варианта: так заказывают
+        # старые клиенты, в режиме "log" это не расхождение цены и пишется только в debug
+        unresolved = []
+        for item, (product_type, product_id, variant) in zip(ordered_items, product_keys):
+            found = price_index.lookup(product_type, product_id, item['product_name'])
+            if found is None:
+                if product_type is None or product_id is None:
+                    unresolved.append(
+                        f"товар «{item['product_name']}» не найден в каталоге по названию, "
+                        f"передайте product_type и product_id"
+                    )
+                else:
+                    problems.append(f"товар {product_type}/{product_id} не найден в каталоге")
+                continue
+
+            key, _, prices = found
+            # Цена берётся только из каталога по заказанному варианту, а не подбирается по цене клиента
+            catalog_price = prices.get(variant if key[0] == "terea" else None)
+            if catalog_price is None:
+                if variant is None:
+                    unresolved.append(f"для terea «{item['product_name']}» передайте variant: block или pack")
+                else:
+                    problems.append(f"у товара «{item['product_name']}» нет варианта {variant}")
+                continue
+
+            if item['price_at_time_of_order'] == catalog_price:
+                continue
+            if mode == "override":
+                item['price_at_time_of_order'] = catalog_price
+            else:
+                problems.append(
+                    f"цена товара «{item['product_name']}» {item['price_at_time_of_order']} "
+                    f"не совпадает с ценой каталога {catalog_price}"
+                )
+
+        if mode == "log":
+            if problems:
+                logger.warning("Расхождение цен в заказе: %s", "; ".join(problems))
+            if unresolved:
+                logger.debug("Позиции заказа без цены каталога: %s", "; ".join(unresolved))
+            return
+        problems += unresolved
+        if problems:
+            raise ValueError(f"Цены заказа не прошли проверку: {'; '.join(problems)}")
+
+    @staticmethod
+    async def _write_order(order_data: dict, idempotency_key: str | None, request_hash: str | None):
+        if not order_queue.is_running():
+            return await OrderRepository.create(order_data, idempotency_key, request_hash)
+
+        try:
+            return await order_queue.submit(order_data, idempotency_key, request_hash)
+        except OrderQueueFull:
+            if settings.orders.queue_overflow == "reject":
+                logger.warning("Очередь заказов переполнена, заказ отклонён")
+                raise
+            logger.warning("Очередь заказов переполнена, заказ пишется напрямую")
+            return await OrderRepository.create(order_data, idempotency_key, request_hash)
+
+    @staticmethod
+    async def _create_order(order: OrderCreate, idempotency_key: str | None = None, request_hash: str | None = None) -> OrderResponse:
+        logger.info("Создание заказа: %s", order)
+        order_data = order.model_dump()
+        await OrdersService._apply_prices(order_data)
+        try:
+            order_model = await OrdersService._write_order(order_data, idempotency_key, request_hash)
+            result = OrdersService._order_response(order_model)
+
+            logger.info("Заказ успешно создан: %s", result.order.id)
+            return result
+
+        except IntegrityError as error:
+            # С ключом идемпотентности конфликт разбирает create_order: это может быть гонка повторов
+            if idempotency_key is None:
+                logger.error("Ошибка при создании заказа: %s", error, exc_info=True)
+                raise ValueError(f"Ошибка при создании заказа: {str(error)}")
+            raise
+        except OrderQueueFull:
+            raise
         except Exception as error:
-            logger.error(f"Ошибка при создании заказа: {str(error)}", exc_info=True)
-            raise ValueError(f"Ошибка при создании заказа: {str(error)}")
\ No newline at end of file
+            logger.error("Ошибка при создании заказа: %s", error, exc_info=True)
+            raise ValueError(f"Ошибка при создании заказа: {str(error)}")
+
+    @staticmethod
+    async def create_order(order: OrderCreate, idempotency_key: str | None = None) -> Tuple[OrderResponse, bool]:
+        if idempotency_key is None:
+            return await OrdersService._create_order(order), False
+
+        request_hash = hashlib.sha256(order.model_dump_json().encode()).hexdigest()
+        async with idempotency_cache.hold(idempotency_key):
+            # С очередью заказов запрос не берёт соединение ради проверки ключа: повтор, которого нет в памяти,
+            # упадёт на первичном ключе при записи пачки и будет отдан ниже
+            replay = await OrdersService._replay(idempotency_key, request_hash, check_db=not order_queue.is_running())
+            if replay is not None:
+                logger.info("Повтор заказа по Idempotency-Key %s: заказ %s", idempotency_key, replay.order.id)
+                return replay, True
+
+            try:
+                result = await OrdersService._create_order(order, idempotency_key, request_hash)
+            except IntegrityError as error:
+                # Тот же ключ одновременно пришёл в другой воркер, и его заказ записан первым
+                replay = await OrdersService._replay(idempotency_key, request_hash)
+                if replay is not None:
+                    return replay, True
+                # Ключ занимала просроченная, ещё не удалённая запись: _replay её удалил, заказ пишется заново.
+                # Если конфликт был не по ключу, повтор упадёт так же
+                try:
+                    result = await OrdersService._create_order(order, idempotency_key, request_hash)
+                except IntegrityError:
+                    raise ValueError(f"Ошибка при создании заказа: {str(error)}")
+
+            idempotency_cache.set(idempotency_key, request_hash, result)
+            idempotency_cache.stored += 1
+
+        await OrdersService._purge_idempotency_keys()
+        return result, False
@@ -1,256 +1,390 @@
 import logging
+import time
+from typing import Tuple
 
 from backend.app.api.schemas import(
     GetDevicesResponse,
     DevicesSchema,
+    DevicesCardSchema,
     GetDeviceByIdResponse,
 
     GetIqosResponse,
     IqosSchema,
+    IqosCardSchema,
     GetIqosByIdResponse,
 
     GetTereaResponse,
     TereaSchema,
-    GetTereaByIdResponse
+    TereaCardSchema,
+    GetTereaByIdResponse,
+
+    GetProductByRefResponse,
+
+    ProductsBatchRequest,
+    ProductsBatchResponse,
+    ProductStockSchema,
+
+    ProductSearchItem,
+    ProductSearchResponse,
+    SuggestionSchema,
+    SuggestResponse
 )
+from backend.app.api.schemas.filters_schemas import ProductFilters, PageCursor, ViewEnum
+from backend.app.repositories.catalog_query import encode_cursor, sort_value
 from backend.app.repositories.products_repository import DevicesRepository
+from backend.app.services.serializers import to_schemas
+from backend.core.request_timing import timed_phase
 
 
 logger = logging.getLogger(__name__)
 
 
+def _stock_schema(product_type: str, product) -> ProductStockSchema:
+    return ProductStockSchema(
+        type=product_type,
+        id=product.id,
+        ref=product.ref,
+        name=product.name,
+        price=product.price,
+        sale_price=getattr(product, "sale_price", None),
+        pricePack=getattr(product, "pricePack", None),
+        nalichie=product.nalichie
+    )
+
+
+def _next_cursor(models, limit: int, filters: ProductFilters | None) -> str | None:
+    if len(models) < limit:
+        return None
+
+    sort = filters.sort if filters is not None else "id"
+    return encode_cursor(PageCursor(id=models[-1].id, sort=sort, value=sort_value(models[-1], sort)))
+
+
 class DevicesService:
     @staticmethod
-    async def get_devices(skip: int = 0, limit: int = 100) -> GetDevicesResponse:
-        logger.info(f"Получение списка девайсов: skip={skip}, limit={limit}")
+    async def get_devices(
+            skip: int = 0,
+            limit: int = 100,
+            cursor: PageCursor | None = None,
+            filters: ProductFilters | None = None,
+            include_total: bool = True,
+            view: ViewEnum = "full"
+    ) -> GetDevicesResponse:
+        logger.info("Получение списка девайсов: skip=%s, limit=%s", skip, limit)
         try:
-            devices_models, total = await DevicesRepository.select_devices(skip=skip, limit=limit)
-
-            devices_response = [
-                DevicesSchema(
-                    id=device.id,
-                    name=device.name,
-                    description=device.description,
-                    image=device.image,
-                    price=device.price,
-                    nalichie=device.nalichie,
-                    new=device.new,
-                    hit=device.hit,
-                    color=device.color,
-                    ref=device.ref,
-                    type=device.type,
-                    device_id=device.device_id,
-                    category=device.category
-                ) for device in devices_models
-
-            ]
-
-            logger.info(f"Успешно возвращено {len(devices_response)} девайсов")
+            devices_models, total = await DevicesRepository.select_devices(
+                skip=skip, limit=limit, cursor=cursor, filters=filters, include_total=include_total, view=view
+            )
+
+            devices_response = to_schemas(DevicesCardSchema if view == "card" else DevicesSchema, devices_models)
+
+            logger.info("Успешно возвращено %s девайсов", len(devices_response))
             return GetDevicesResponse(
                 devices=devices_response,
                 skip=skip,
                 limit=limit,
-                total=total
+                total=total,
+                next_cursor=_next_cursor(devices_models, limit, filters)
             )
 
         except Exception as error:
-            logger.error(f"Ошибка при получении девайсов: {str(error)}", exc_info=True)
+            logger.error("Ошибка при получении девайсов: %s", error, exc_info=True)
             raise ValueError(f"Ошибка при получении девайсов: {str(error)}")
 
     @staticmethod
     async def get_device(devices_id: int) -> GetDevicesResponse:
-        logger.info(f"Получение девайса по id: {devices_id}")
+        logger.info("Получение девайса по id: %s", devices_id)
         try:
             device_model = await DevicesRepository.select_device_by_id(devices_id)
 
             if not device_model:
-                logger.warning(f"Девайс с id {devices_id} не найден")
+                logger.warning("Девайс с id %s не найден", devices_id)
                 raise ValueError("Девайс не найден")
 
-            device_response = DevicesSchema(
-                id=device_model.id,
-                name=device_model.name,
-                description=device_model.description,
-                image=device_model.image,
-                price=device_model.price,
-                nalichie=device_model.nalichie,
-                new=device_model.new,
-                hit=device_model.hit,
-                color=device_model.color,
-                ref=device_model.ref,
-                type=device_model.type,
-                device_id=device_model.device_id,
-                category=device_model.category
-            )
-
-            logger.info(f"Девайса с id {devices_id} успешно получен")
+            with timed_phase("pydantic"):
+                device_response = DevicesSchema(
+                    id=device_model.id,
+                    name=device_model.name,
+                    description=device_model.description,
+                    image=device_model.image,
+                    price=device_model.price,
+                    nalichie=device_model.nalichie,
+                    new=device_model.new,
+                    hit=device_model.hit,
+                    color=device_model.color,
+                    ref=device_model.ref,
+                    type=device_model.type,
+                    device_id=device_model.device_id,
+                    category=device_model.category
+                )
+
+            logger.info("Девайса с id %s успешно получен", devices_id)
             return GetDeviceByIdResponse(device=device_response)
 
         except ValueError as error:
-            logger.warning(f"Девайс с id {devices_id} не найден")
+            logger.warning("Девайс с id %s не найден", devices_id)
             raise ValueError(str(error))
         except Exception as error:
-            logger.error(f"Ошибка при получении девайса {devices_id}: {str(error)}", exc_info=True)
+            logger.error("Ошибка при получении девайса %s: %s", devices_id, error, exc_info=True)
             raise ValueError(f"Ошибка при получении девайса: {str(error)}")
 
     @staticmethod
-    async def get_iqos_list(skip: int = 0, limit: int = 100) -> GetIqosResponse:
-        logger.info(f"Получение списка iqos: skip={skip}, limit={limit}")
+    async def get_iqos_list(
+            skip: int = 0,
+            limit: int = 100,
+            cursor: PageCursor | None = None,
+            filters: ProductFilters | None = None,
+            include_total: bool = True,
+            view: ViewEnum = "full"
+    ) -> GetIqosResponse:
+        logger.info("Получение списка iqos: skip=%s, limit=%s", skip, limit)
         try:
-            iqos_models, total = await DevicesRepository.select_iqos(skip=skip, limit=limit)
-
-            iqos_response = [
-                IqosSchema(
-                    id=iqos.id,
-                    name=iqos.name,
-                    model=iqos.model,
-                    description=iqos.description,
-                    image=iqos.image,
-                    price=iqos.price,
-                    color=iqos.color,
-                    new=iqos.new,
-                    hit=iqos.hit,
-                    exclusive=iqos.exclusive,
-                    nalichie=iqos.nalichie,
-                    ref=iqos.ref,
-                    type=iqos.type,
-                    sale_price=iqos.sale_price,
-                    id_category=iqos.id_category,
-                    category=iqos.category
-                ) for iqos in iqos_models
-
-            ]
-            logger.info(f"Успешно возвращено {len(iqos_response)} продуктов iqos")
+            iqos_models, total = await DevicesRepository.select_iqos(
+                skip=skip, limit=limit, cursor=cursor, filters=filters, include_total=include_total, view=view
+            )
+
+            iqos_response = to_schemas(IqosCardSchema if view == "card" else IqosSchema, iqos_models)
+            logger.info("Успешно возвращено %s продуктов iqos", len(iqos_response))
             return GetIqosResponse(
                 iqos=iqos_response,
                 skip=skip,
                 limit=limit,
-                total=total
+                total=total,
+                next_cursor=_next_cursor(iqos_models, limit, filters)
             )
 
         except Exception as error:
-            logger.error(f"Ошибка при получении продуктов iqos: {str(error)}", exc_info=True)
+            logger.error("Ошибка при получении продуктов iqos: %s", error, exc_info=True)
             raise ValueError(f"Ошибка при получении продуктов iqos: {str(error)}")
 
     @staticmethod
     async def get_iqos(iqos_id: int) -> GetIqosByIdResponse:
-        logger.info(f"Получение продукта iqos по id: {iqos_id}")
+        logger.info("Получение продукта iqos по id: %s", iqos_id)
         try:
             iqos_model = await DevicesRepository.select_iqos_by_id(iqos_id)
 
             if not iqos_model:
-                logger.warning(f"Продукт iqos с id {iqos_id} не найден")
+                logger.warning("Продукт iqos с id %s не найден", iqos_id)
                 raise ValueError("Продукт iqos не найден")
 
-            iqos_response = IqosSchema(
-                id=iqos_model.id,
-                name=iqos_model.name,
-                model=iqos_model.model,
-                description=iqos_model.description,
-                image=iqos_model.image,
-                price=iqos_model.price,
-                color=iqos_model.color,
-                new=iqos_model.new,
-                hit=iqos_model.hit,
-                exclusive=iqos_model.exclusive,
-                nalichie=iqos_model.nalichie,
-                ref=iqos_model.ref,
-                type=iqos_model.type,
-                sale_price=iqos_model.sale_price,
-                id_category=iqos_model.id_category,
-                category=iqos_model.category
-            )
-
-            logger.info(f"Продукт iqos с id {iqos_id} успешно получен")
+            with timed_phase("pydantic"):
+                iqos_response = IqosSchema(
+                    id=iqos_model.id,
+                    name=iqos_model.name,
+                    model=iqos_model.model,
+                    description=iqos_model.description,
+                    image=iqos_model.image,
+                    price=iqos_model.price,
+                    color=iqos_model.color,
+                    new=iqos_model.new,
+                    hit=iqos_model.hit,
+                    exclusive=iqos_model.exclusive,
+                    nalichie=iqos_model.nalichie,
+                    ref=iqos_model.ref,
+                    type=iqos_model.type,
+                    sale_price=iqos_model.sale_price,
+                    id_category=iqos_model.id_category,
+                    category=iqos_model.category
+                )
+
+            logger.info("Продукт iqos с id %s успешно получен", iqos_id)
             return GetIqosByIdResponse(iqos=iqos_response)
 
         except ValueError as error:
-            logger.warning(f"Продукт iqos с id {iqos_id} не найден")
+            logger.warning("Продукт iqos с id %s не найден", iqos_id)
             raise ValueError(str(error))
         except Exception as error:
-            logger.error(f"Ошибка при получении продукта iqos {iqos_id}: {str(error)}", exc_info=True)
+            logger.error("Ошибка при получении продукта iqos %s: %s", iqos_id, error, exc_info=True)
             raise ValueError(f"Ошибка при получении продукта iqos: {str(error)}")
 
     @staticmethod
-    async def get_terea_list(skip: int = 0, limit: int = 100) -> GetTereaResponse:
-        logger.info(f"Получение списка terea: skip={skip}, limit={limit}")
+    async def get_terea_list(
+            skip: int = 0,
+            limit: int = 100,
+            cursor: PageCursor | None = None,
+            filters: ProductFilters | None = None,
+            include_total: bool = True,
+            view: ViewEnum = "full"
+    ) -> GetTereaResponse:
+        logger.info("Получение списка terea: skip=%s, limit=%s", skip, limit)
         try:
-            terea_models, total = await DevicesRepository.select_terea(skip=skip, limit=limit)
-
-            terea_response = [
-                TereaSchema(
-                    id=terea.id,
-                    name=terea.name,
-                    description=terea.description,
-                    image=terea.image,
-                    imagePack=terea.imagePack,
-                    price=terea.price,
-                    pricePack=terea.pricePack,
-                    has_capsule=terea.has_capsule,
-                    flavor=terea.flavor,
-                    country=terea.country,
-                    brend=terea.brend,
-                    strength=terea.strength,
-                    nalichie=terea.nalichie,
-                    new=terea.new,
-                    hit=terea.hit,
-                    ref=terea.ref,
-                    type=terea.type,
-                    terea_id=terea.terea_id,
-                    category=terea.category
-                ) for terea in terea_models
-
-            ]
-            logger.info(f"Успешно возвращено {len(terea_response)} продуктов terea")
+            terea_models, total = await DevicesRepository.select_terea(
+                skip=skip, limit=limit, cursor=cursor, filters=filters, include_total=include_total, view=view
+            )
+
+            terea_response = to_schemas(TereaCardSchema if view == "card" else TereaSchema, terea_models)
+            logger.info("Успешно возвращено %s продуктов terea", len(terea_response))
             return GetTereaResponse(
                 terea=terea_response,
                 skip=skip,
                 limit=limit,
-                total=total
+                total=total,
+                next_cursor=_next_cursor(terea_models, limit, filters)
             )
 
         except Exception as error:
-            logger.error(f"Ошибка при получении продуктов terea: {str(error)}", exc_info=True)
+            logger.error("Ошибка при получении продуктов terea: %s", error, exc_info=True)
             raise ValueError(f"Ошибка при получении продуктов terea: {str(error)}")
 
     @staticmethod
     async def get_terea(terea_id: int) -> GetTereaByIdResponse:
-        logger.info(f"Получение продукта terea по id: {terea_id}")
+        logger.info("Получение продукта terea по id: %s", terea_id)
         try:
             terea_model = await DevicesRepository.select_terea_by_id(terea_id)
 
             if not terea_model:
-                logger.warning(f"Продукт terea с id {terea_id} не найден")
+                logger.warning("Продукт terea с id %s не найден", terea_id)
                 raise ValueError("Продукт terea не найден")
 
-            terea_response = TereaSchema(
-                id=terea_model.id,
-                name=terea_model.name,
-                description=terea_model.description,
-                image=terea_model.image,
-                imagePack=terea_model.imagePack,
-                price=terea_model.price,
-                pricePack=terea_model.pricePack,
-                has_capsule=terea_model.has_capsule,
-                flavor=terea_model.flavor,
-                country=terea_model.country,
-                brend=terea_model.brend,
-                strength=terea_model.strength,
-                nalichie=terea_model.nalichie,
-                new=terea_model.new,
-                hit=terea_model.hit,
-                ref=terea_model.ref,
-                type=terea_model.type,
-                terea_id=terea_model.terea_id,
-                category=terea_model.category
-            )
-
-            logger.info(f"Продукт terea с id {terea_id} успешно получен")
+            with timed_phase("pydantic"):
+                terea_response = TereaSchema(
+                    id=terea_model.id,
+                    name=terea_model.name,
+                    description=terea_model.description,
+                    image=terea_model.image,
+                    imagePack=terea_model.imagePack,
+                    price=terea_model.price,
+                    pricePack=terea_model.pricePack,
+                    has_capsule=terea_model.has_capsule,
+                    flavor=terea_model.flavor,
+                    country=terea_model.country,
+                    brend=terea_model.brend,
+                    strength=terea_model.strength,
+                    nalichie=terea_model.nalichie,
+                    new=terea_model.new,
+                    hit=terea_model.hit,
+                    ref=terea_model.ref,
+                    type=terea_model.type,
+                    terea_id=terea_model.terea_id,
+                    category=terea_model.category
+                )
+
+            logger.info("Продукт terea с id %s успешно получен", terea_id)
             return GetTereaByIdResponse(terea=terea_response)
 
         except ValueError as error:
-            logger.warning(f"Продукт terea с id {terea_id} не найден")
+            logger.warning("Продукт terea с id %s не найден", terea_id)
+            raise ValueError(str(error))
+        except Exception as error:
+            logger.error("Ошибка при получении продукта terea %s: %s", terea_id, error, exc_info=True)
+            raise ValueError(f"Ошибка при получении продукта terea: {str(error)}")
+
+    @staticmethod
+    async def get_product_by_ref(ref: str) -> GetProductByRefResponse:
+        logger.info("Получение товара по ref: %s", ref)
+        try:
+            found = await DevicesRepository.select_product_by_ref(ref)
+
+            if not found:
+                logger.warning("Товар с ref %s не найден", ref)
+                raise ValueError("Товар не найден")
+
+            product_type, product_model = found
+            schema = {"devices": DevicesSchema, "iqos": IqosSchema, "terea": TereaSchema}[product_type]
+
+            with timed_phase("pydantic"):
+                product = schema.model_validate(product_model)
+
+            logger.info("Товар с ref %s успешно получен (%s)", ref, product_type)
+            return GetProductByRefResponse(type=product_type, product=product)
+
+        except ValueError as error:
+            logger.warning("Товар с ref %s не найден", ref)
             raise ValueError(str(error))
         except Exception as error:
-            logger.error(f"Ошибка при получении продукта terea {terea_id}: {str(error)}", exc_info=True)
-            raise ValueError(f"Ошибка при получении продукта terea: {str(error)}")
\ No newline at end of file
+            logger.error("Ошибка при получении товара по ref %s: %s", ref, error, exc_info=True)
+            raise ValueError(f"Ошибка при получении товара: {str(error)}")
+
+
+    @staticmethod
+    async def get_products_batch(batch: ProductsBatchRequest) -> ProductsBatchResponse:
+        logger.info("Пакетное получение товаров: %s ref, %s id", len(batch.refs), len(batch.items))
+        try:
+            refs = list(dict.fromkeys(batch.refs))
+            # Повторы в запросе ищутся и попадают в missing_items один раз, как и ref
+            items = list({(item.type, item.id): item for item in batch.items}.values())
+            ids = {}
+            for item in items:
+                ids.setdefault(item.type, []).append(item.id)
+
+            found_by_ref, found_by_id = await DevicesRepository.select_products_batch(refs, ids)
+
+            products = []
+            seen = set()
+            missing_refs = []
+            missing_items = []
+            with timed_phase("pydantic"):
+                for ref in refs:
+                    if ref not in found_by_ref:
+                        missing_refs.append(ref)
+                        continue
+                    product_type, product = found_by_ref[ref]
+                    if (product_type, product.id) not in seen:
+                        seen.add((product_type, product.id))
+                        products.append(_stock_schema(product_type, product))
+
+                for item in items:
+                    product = found_by_id.get((item.type, item.id))
+                    if product is None:
+                        missing_items.append(item)
+                    elif (item.type, item.id) not in seen:
+                        seen.add((item.type, item.id))
+                        products.append(_stock_schema(item.type, product))
+
+            logger.info("Пакетно найдено %s товаров, не найдено %s", len(products), len(missing_refs) + len(missing_items))
+            return ProductsBatchResponse(products=products, missing_refs=missing_refs, missing_items=missing_items)
+
+        except Exception as error:
+            logger.error("Ошибка при пакетном получении товаров: %s", error, exc_info=True)
+            raise ValueError(f"Ошибка при пакетном получении товаров: {str(error)}")
+
+
+    @staticmethod
+    async def search_products(query: str, limit: int = 20, types: Tuple[str, ...] = ("devices", "iqos", "terea")) -> ProductSearchResponse:
+        logger.info("Поиск товаров: query=%s, limit=%s, types=%s", query, limit, types)
+        try:
+            found, total = await DevicesRepository.search_products(query, limit, types)
+
+            card_schemas = {"devices": DevicesCardSchema, "iqos": IqosCardSchema, "terea": TereaCardSchema}
+            with timed_phase("pydantic"):
+                results = [
+                    ProductSearchItem(
+                        type=product_type,
+                        score=round(score, 2),
+                        product=card_schemas[product_type].model_validate(product)
+                    ) for product_type, product, score in found
+                ]
+
+            logger.info("По запросу %s возвращено %s товаров из %s", query, len(results), total)
+            return ProductSearchResponse(query=query, total=total, results=results)
+
+        except Exception as error:
+            logger.error("Ошибка при поиске товаров: %s", error, exc_info=True)
+            raise ValueError(f"Ошибка при поиске товаров: {str(error)}")
+
+
+    @staticmethod
+    async def suggest_products(prefix: str, limit: int = 10) -> SuggestResponse:
+        # Вызывается на каждое нажатие клавиши, поэтому без логов уровня INFO
+        try:
+            found = await DevicesRepository.suggest_products(prefix, limit)
+            with timed_phase("pydantic"):
+                return SuggestResponse(
+                    prefix=prefix,
+                    suggestions=[
+                        SuggestionSchema(text=text, type=product_type, id=item_id, ref=ref)
+                        for (product_type, item_id), text, ref in found
+                    ]
+                )
+
+        except Exception as error:
+            logger.error("Ошибка при получении подсказок: %s", error, exc_info=True)
+            raise ValueError(f"Ошибка при получении подсказок: {str(error)}")
+
+    @staticmethod
+    async def warm_up_catalog() -> None:
+        # Снимки каталога загружаются один раз, индексы подсказок и цен строятся из них
+        started = time.perf_counter()
+        await DevicesRepository.sync_suggest_index()
+        await DevicesRepository.sync_price_index()
+        logger.info("Каталог и индексы прогреты при старте за %.1f мс", (time.perf_counter() - started) * 1000)
@@ -0,0 +1,61 @@
+import logging
+from typing import Any, Dict, List, Sequence, Type
+from weakref import WeakKeyDictionary
+
+from pydantic import BaseModel, TypeAdapter
+from starlette.responses import Response
+
+from backend.app.api.schemas import (
+    DevicesSchema,
+    DevicesCardSchema,
+    IqosSchema,
+    IqosCardSchema,
+    TereaSchema,
+    TereaCardSchema
+)
+from backend.core.request_timing import timed_phase
+
+
+logger = logging.getLogger(__name__)
+
+
+# Один TypeAdapter на схему: валидация всего списка идёт одним вызовом в pydantic-core, без цикла в Python
+LIST_ADAPTERS: Dict[Type[BaseModel], TypeAdapter] = {
+    schema: TypeAdapter(List[schema])
+    for schema in (DevicesSchema, DevicesCardSchema, IqosSchema, IqosCardSchema, TereaSchema, TereaCardSchema)
+}
+
+# Уже построенные схемы для строк ORM. Строки снимка каталога живут до его сброса и не меняются,
+# поэтому каждая из них валидируется один раз; строки из обычных запросов уходят из кэша вместе с ними
+_converted: "WeakKeyDictionary[Any, Dict[Type[BaseModel], BaseModel]]" = WeakKeyDictionary()
+
+
+def to_schemas(schema: Type[BaseModel], rows: Sequence[Any]) -> List[BaseModel]:
+    result: List[BaseModel | None] = []
+    pending_positions: List[int] = []
+    pending_rows: List[Any] = []
+
+    for position, row in enumerate(rows):
+        converted = _converted.get(row)
+        item = converted.get(schema) if converted is not None else None
+        if item is None:
+            pending_positions.append(position)
+            pending_rows.append(row)
+        result.append(item)
+
+    if pending_rows:
+        with timed_phase("pydantic"):
+            items = LIST_ADAPTERS[schema].validate_python(pending_rows, from_attributes=True)
+        for position, row, item in zip(pending_positions, pending_rows, items):
+            result[position] = item
+            _converted.setdefault(row, {})[schema] = item
+
+    return result
+
+
+def json_response(payload: BaseModel, status_code: int = 200) -> Response:
+    # Ответ уже провалидирован при сборке, поэтому повторная проверка по response_model не нужна.
+    # Все JSON-ответы API идут через эту функцию, иначе их кодирование не попадает в фазу json
+    with timed_phase("json"):
+        content = payload.model_dump_json()
+    return Response(content=content, status_code=status_code, media_type="application/json")
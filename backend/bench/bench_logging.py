@@ -0,0 +1,91 @@
+import io
+import logging
+import time
+
+from backend.app.api.schemas.orders_schemas import OrderCreate
+from backend.bench.harness import best_of
+from backend.core.loger_config import LogerConfig
+
+
+# Цена логирования: вызовы POST /orders с f-строками (как было) и с ленивыми аргументами на уровне
+# WARNING, выдача записи синхронно и через очередь, в том числе в медленный приёмник.
+# Запуск: python -m backend.bench.bench_logging 2>/dev/null
+
+CALLS = 20000
+logger = logging.getLogger("bench")
+
+order = OrderCreate(
+    customer_name="Иванов Иван",
+    phone_number="+79991234567",
+    is_delivery=True,
+    city="Москва",
+    address="ул. Ленина, д. 1",
+    ordered_items=[
+        {"product_name": f"Terea Sienna {i}", "quantity": 2, "price_at_time_of_order": "510"} for i in range(5)
+    ]
+)
+order_data = order.model_dump()
+order_id, is_first_order = 1, True
+
+
+def order_calls_eager():
+    logger.info(f"POST /orders запрос: создание заказа {order.model_dump()}")
+    logger.info(f"Создание заказа: {order.model_dump()}")
+    logger.info(f"Создание нового заказа с данными: {order_data}")
+    logger.info(f"Заказ успешно создан с ID: {order_id}, is_first_order: {is_first_order}")
+    logger.info(f"Заказ успешно создан: {order_id}")
+    logger.info(f"POST /orders успешно: заказ создан с ID {order_id}")
+
+
+def order_calls_lazy():
+    logger.info("POST /orders запрос: создание заказа %s", order)
+    logger.info("Создание заказа: %s", order)
+    logger.info("Создание нового заказа с данными: %s", order_data)
+    logger.info("Заказ успешно создан с ID: %s, is_first_order: %s", order_id, is_first_order)
+    logger.info("Заказ успешно создан: %s", order_id)
+    logger.info("POST /orders успешно: заказ создан с ID %s", order_id)
+
+
+def per_call(function, calls: int = CALLS) -> float:
+    return best_of(lambda: [function() for _ in range(calls)]) / calls * 1e6
+
+
+class SlowStream(io.StringIO):
+    # Заблокированный pipe или медленный драйвер логов: 0.2 мс на запись
+    def write(self, text: str) -> int:
+        time.sleep(0.0002)
+        return len(text)
+
+
+def configure(use_queue: bool, json_format: bool = False) -> LogerConfig:
+    config = LogerConfig()
+    config.use_queue = use_queue
+    config.json_format = json_format
+    config.setup_logging()
+    return config
+
+
+def main():
+    config = configure(use_queue=False)
+    print(f"POST /orders log calls at WARNING, f-strings: {per_call(order_calls_eager):8.2f} us")
+    print(f"POST /orders log calls at WARNING, lazy:      {per_call(order_calls_lazy):8.2f} us")
+
+    emit = lambda: logger.warning("Заказ %s создан", order_id)
+    print(f"warning to stderr, sync StreamHandler:        {per_call(emit):8.2f} us")
+    for json_format in (False, True):
+        config = configure(use_queue=True, json_format=json_format)
+        print(f"warning to stderr, queue{', JSON' if json_format else '      '}:                {per_call(emit):8.2f} us")
+        config.stop_logging()
+
+    for use_queue in (False, True):
+        config = configure(use_queue=use_queue)
+        handlers = config._listener.handlers if use_queue else logging.root.handlers
+        for handler in handlers:
+            handler.setStream(SlowStream())
+        label = "queue" if use_queue else "sync "
+        print(f"warning to a slow sink, {label}:                {per_call(emit, 300):8.2f} us")
+        config.stop_logging()
+
+
+if __name__ == "__main__":
+    main()
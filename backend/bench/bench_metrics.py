@@ -0,0 +1,44 @@
+import timeit
+
+import httpx
+
+from backend.app.cache.payload_cache import payload_cache
+from backend.bench.harness import run, timings
+from backend.core.metrics import metrics, db_query_duration, http_requests_total, instrument_engine
+from backend.main import main_app
+
+
+# Цена сбора метрик: медиана запросов через ASGI-приложение с metrics.enabled и без,
+# плюс стоимость одного observe()/inc(). Запуск: python -m backend.bench.bench_metrics
+
+REQUESTS = 400
+PATHS = ("/products/by-ref/device-5", "/products/devices?limit=20")
+
+
+async def main(engine):
+    # Движок подменён после создания db_helper, поэтому слушатели курсора ставятся заново
+    instrument_engine(engine, "primary")
+    payload_cache.enabled = False
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main_app), base_url="http://bench") as client:
+        for path in PATHS:
+            async def request():
+                response = await client.get(path)
+                response.raise_for_status()
+
+            await request()
+            for attempt in range(2):
+                for enabled in (False, True):
+                    metrics.enabled = enabled
+                    result = await timings(request, REQUESTS)
+                    print(f"{path} metrics {'on ' if enabled else 'off'}: median {result[len(result) // 2] * 1e6:.0f} us")
+
+    metrics.enabled = True
+    number = 100000
+    observe = min(timeit.repeat(lambda: db_query_duration.observe(0.003, "bench"), number=number, repeat=5)) / number
+    inc = min(timeit.repeat(lambda: http_requests_total.inc("GET", "/bench", "200"), number=number, repeat=5)) / number
+    print(f"Histogram.observe: {observe * 1e6:.2f} us, Counter.inc: {inc * 1e6:.2f} us")
+
+
+if __name__ == "__main__":
+    run(main, 200)
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+from sqlalchemy import event, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+import backend.app.repositories.orders_repository as orders_repository
+from backend.app.api.schemas.orders_schemas import OrderCreate
+from backend.app.cache.idempotency_cache import idempotency_cache
+from backend.app.services.order_queue import order_queue
+from backend.app.services.orders_services import OrdersService
+from backend.bench.harness import use_sqlite
+from backend.core.config import settings
+from backend.core.models import BaseModel
+
+
+# Пропускная способность POST /orders (OrdersService.create_order с Idempotency-Key): прямая запись
+# и очередь заказов с групповым COMMIT. sqlite-файл в WAL с тем же пулом, что у MySQL в проде (10 + 15),
+# поэтому цифры только относительные. Запуск: python -m backend.bench.bench_order_queue
+
+ORDERS = 600
+CONCURRENCY = 150
+RUNS = 2
+
+
+class SqliteUpsert:
+    # Покупатель пишется через MySQL INSERT ... ON DUPLICATE KEY UPDATE, в sqlite это ON CONFLICT DO UPDATE.
+    # LAST_INSERT_ID(id) в sqlite нет, поэтому customer_id повторного заказа здесь не точен - на замер не влияет
+    def __init__(self, model):
+        self.model = model
+        self.statement = None
+        self.inserted = None
+
+    def values(self, **values):
+        self.statement = sqlite_insert(self.model).values(**values)
+        self.inserted = self.statement.excluded
+        return self
+
+    def on_duplicate_key_update(self, **values):
+        values.pop("id")
+        return self.statement.on_conflict_do_update(index_elements=["phone"], set_=values)
+
+
+def make_order(number: int) -> OrderCreate:
+    return OrderCreate(
+        customer_name="Покупатель",
+        phone_number=f"+7999{number % 300:07d}",
+        is_delivery=False,
+        ordered_items=[
+            {"product_name": "Terea Sienna", "quantity": 1, "price_at_time_of_order": 510},
+            {"product_name": "Terea Amber", "quantity": 2, "price_at_time_of_order": 510},
+        ]
+    )
+
+
+async def measure(use_queue: bool, path: str) -> None:
+    engine = use_sqlite(f"sqlite+aiosqlite:///{path}", pool_size=10, max_overflow=15, connect_args={"timeout": 30})
+    async with engine.begin() as connection:
+        await connection.execute(text("PRAGMA journal_mode=WAL"))
+        await connection.run_sync(BaseModel.metadata.create_all)
+
+    connections = {"in_use": 0, "max": 0, "commits": 0}
+
+    def checkout(*args):
+        connections["in_use"] += 1
+        connections["max"] = max(connections["max"], connections["in_use"])
+
+    def checkin(*args):
+        connections["in_use"] -= 1
+
+    def commit(*args):
+        connections["commits"] += 1
+
+    event.listen(engine.sync_engine.pool, "checkout", checkout)
+    event.listen(engine.sync_engine.pool, "checkin", checkin)
+    event.listen(engine.sync_engine, "commit", commit)
+
+    idempotency_cache._entries.clear()
+    order_queue.enabled = use_queue
+    order_queue.start()
+
+    limit = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+
+    async def create(number: int) -> None:
+        async with limit:
+            started = time.perf_counter()
+            await OrdersService.create_order(make_order(number), f"bench-{number}")
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*[create(number) for number in range(ORDERS)], return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    await order_queue.stop()
+    await engine.dispose()
+
+    errors = [result for result in results if isinstance(result, Exception)]
+    latencies.sort()
+    print(
+        f"{'queue' if use_queue else 'sync '}: {ORDERS / elapsed:.0f} orders/s, "
+        f"p50 {latencies[len(latencies) // 2] * 1000:.0f} ms, p99 {latencies[int(len(latencies) * 0.99)] * 1000:.0f} ms, "
+        f"connections {connections['max']}, commits {connections['commits']}, errors {len(errors)}"
+    )
+
+
+async def main() -> None:
+    orders_repository.mysql_insert = SqliteUpsert
+    settings.orders.price_validation = "off"
+    # Срок ключей считается через MySQL TIMESTAMPADD, которого нет в sqlite; на запись заказа он не влияет
+    idempotency_cache.ttl = 0
+    # Лог каждого заказа в консоль измерял бы вывод, а не запись
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for run_number in range(RUNS):
+            for use_queue in (False, True):
+                await measure(use_queue, os.path.join(directory, f"orders-{run_number}-{int(use_queue)}.db"))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
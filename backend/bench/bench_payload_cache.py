@@ -0,0 +1,33 @@
+import httpx
+
+from backend.app.cache.payload_cache import payload_cache
+from backend.bench.harness import run, timings
+from backend.main import main_app
+
+
+# GET /products/terea?limit=1000 через ASGI-приложение с кэшем ответов и без него.
+# Запуск: python -m backend.bench.bench_payload_cache
+
+ROWS = 1000
+REQUESTS = 50
+
+
+async def main(engine):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main_app), base_url="http://bench") as client:
+        async def request():
+            response = await client.get("/products/terea", params={"limit": ROWS}, headers={"accept-encoding": "gzip"})
+            response.raise_for_status()
+
+        # Первый запрос загружает снимок каталога: его стоимость не относится ни к одному из режимов
+        await request()
+        for enabled in (False, True):
+            payload_cache.enabled = enabled
+            result = await timings(request, REQUESTS)
+            print(
+                f"payload cache {'on ' if enabled else 'off'}: "
+                f"median {result[len(result) // 2] * 1000:.2f} ms, p90 {result[int(len(result) * 0.9)] * 1000:.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    run(main, ROWS)
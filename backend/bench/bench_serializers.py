@@ -0,0 +1,65 @@
+from typing import List
+
+from pydantic import TypeAdapter
+
+from backend.app.api.schemas import GetTereaResponse, TereaSchema
+from backend.app.repositories.products_repository import DevicesRepository
+from backend.app.services.serializers import json_response, to_schemas
+from backend.bench.harness import best_of, run
+
+
+# Сравнение сборки схем terea: по строке (как было до to_schemas), одним TypeAdapter и to_schemas
+# с уже провалидированными строками снимка. Запуск: python -m backend.bench.bench_serializers
+
+SIZES = (50, 1000, 10000)
+ADAPTER = TypeAdapter(List[TereaSchema])
+
+
+def per_row(rows):
+    return [
+        TereaSchema(
+            id=terea.id,
+            name=terea.name,
+            description=terea.description,
+            image=terea.image,
+            imagePack=terea.imagePack,
+            price=terea.price,
+            pricePack=terea.pricePack,
+            has_capsule=terea.has_capsule,
+            flavor=terea.flavor,
+            country=terea.country,
+            brend=terea.brend,
+            strength=terea.strength,
+            nalichie=terea.nalichie,
+            new=terea.new,
+            hit=terea.hit,
+            ref=terea.ref,
+            type=terea.type,
+            terea_id=terea.terea_id,
+            category=terea.category
+        ) for terea in rows
+    ]
+
+
+def type_adapter(rows):
+    return ADAPTER.validate_python(rows, from_attributes=True)
+
+
+async def main(engine):
+    snapshot = await DevicesRepository.terea_snapshot()
+    print(f"{'rows':>6} {'per-row, ms':>12} {'TypeAdapter, ms':>16} {'to_schemas warm, ms':>20} {'json, ms':>9}")
+    for size in SIZES:
+        rows = snapshot.items[:size]
+        to_schemas(TereaSchema, rows)
+        response = GetTereaResponse(terea=to_schemas(TereaSchema, rows), skip=0, limit=size)
+        print(
+            f"{size:>6} "
+            f"{best_of(lambda: per_row(rows)) * 1000:>12.2f} "
+            f"{best_of(lambda: type_adapter(rows)) * 1000:>16.2f} "
+            f"{best_of(lambda: to_schemas(TereaSchema, rows)) * 1000:>20.2f} "
+            f"{best_of(lambda: json_response(response)) * 1000:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    run(main, max(SIZES))
@@ -0,0 +1,45 @@
+import asyncio
+import random
+import time
+
+from backend.app.cache.suggest_index import suggest_index
+from backend.app.services.products_service import DevicesService
+from backend.bench.harness import run
+
+
+# Подсказки GET /products/suggest через сервисный слой: 1000 одновременных клиентов по 5 запросов.
+# Запуск: python -m backend.bench.bench_suggest
+
+ROWS_PER_TABLE = 3334
+CALLERS = 1000
+LOOKUPS = 5
+PREFIXES = ["и", "ил", "илю", "илюм", "iluma", "prime", "te", "ter", "terea", "si", "sie", "i o", "kr", "крыш", "7", "33"]
+
+
+async def main(engine):
+    await DevicesService.warm_up_catalog()
+    print(f"index keys: {suggest_index.stats()['keys']}")
+
+    latencies = []
+
+    async def caller():
+        for _ in range(LOOKUPS):
+            started = time.perf_counter()
+            await DevicesService.suggest_products(random.choice(PREFIXES), 10)
+            latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(CALLERS)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    print(
+        f"{CALLERS} callers x {LOOKUPS}: p50 {latencies[len(latencies) // 2] * 1000:.3f} ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.3f} ms, {len(latencies) / wall:.0f} lookups/s"
+    )
+
+
+if __name__ == "__main__":
+    random.seed(12)
+    run(main, ROWS_PER_TABLE)
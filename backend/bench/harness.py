@@ -0,0 +1,107 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, List
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.mysql import ENUM, LONGTEXT, SET, TINYINT
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+
+from backend.core.db_helper import db_helper
+from backend.core.models import (
+    BaseModel,
+    DevicesCategoryModel,
+    DevicesModel,
+    IqosCategoryModel,
+    IqosModel,
+    TereaCategoryModel,
+    TereaModel
+)
+
+
+# Замеры идут без MySQL: приложение переключается на sqlite в памяти (нужен aiosqlite),
+# схема создаётся из моделей, поэтому скрипты не расходятся с ними
+@compiles(LONGTEXT, "sqlite")
+@compiles(SET, "sqlite")
+@compiles(ENUM, "sqlite")
+def _text_sqlite(element, compiler, **kwargs):
+    return "TEXT"
+
+
+@compiles(TINYINT, "sqlite")
+def _tinyint_sqlite(element, compiler, **kwargs):
+    return "INTEGER"
+
+
+COLORS = ["Красный", "Черный", "Серый"]
+
+
+def use_sqlite(url: str = "sqlite+aiosqlite:///:memory:", **engine_options) -> AsyncEngine:
+    engine = create_async_engine(url, **engine_options)
+    db_helper.engine = engine
+    db_helper.session_factory = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    db_helper.replica_engines = []
+    db_helper.replica_session_factories = []
+    return engine
+
+
+async def fill_catalog(engine: AsyncEngine, rows: int) -> None:
+    async with engine.begin() as connection:
+        await connection.run_sync(BaseModel.metadata.create_all)
+        for model in (DevicesCategoryModel, IqosCategoryModel, TereaCategoryModel):
+            await connection.execute(insert(model), [{"category_name": "cat1"}, {"category_name": "cat2"}])
+
+        await connection.execute(insert(DevicesModel), [
+            dict(
+                name=f"Крышка Iluma Prime {i}", description="desc", image="img", price=1000 + i * 10,
+                nalichie=i % 2, new=int(i % 5 == 0), hit=0, color=COLORS[i % 3], ref=f"device-{i}",
+                type="devices", device_id=1 + i % 2
+            )
+            for i in range(1, rows + 1)
+        ])
+        await connection.execute(insert(IqosModel), [
+            dict(
+                name=f"IQOS Iluma i One {i}", model="i One", description="desc", image="img", price=9000 + i,
+                color=COLORS[i % 3], new=0, hit=1, exclusive=0, nalichie=1, ref=f"iqos-{i}",
+                type="iqos", sale_price=None, id_category=1
+            )
+            for i in range(1, rows + 1)
+        ])
+        await connection.execute(insert(TereaModel), [
+            dict(
+                name=f"Terea Sienna {i}", description="Табачный вкус", image="img", imagePack=None, price=5000,
+                pricePack=510, has_capsule=0, flavor="Ментол", country="Армения", brend="Terea",
+                strength="Крепкие", nalichie=1, new=0, hit=0, ref=f"terea-{i}", type="terea", terea_id=1
+            )
+            for i in range(1, rows + 1)
+        ])
+
+
+def best_of(function: Callable[[], object], repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+async def timings(request: Callable[[], Awaitable[object]], count: int) -> List[float]:
+    result = []
+    for _ in range(count):
+        started = time.perf_counter()
+        await request()
+        result.append(time.perf_counter() - started)
+    return sorted(result)
+
+
+def run(main: Callable[[AsyncEngine], Awaitable[None]], rows: int) -> None:
+    async def wrapper():
+        engine = use_sqlite()
+        try:
+            await fill_catalog(engine, rows)
+            await main(engine)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(wrapper())
@@ -1,7 +1,17 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Sequence
+
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 
 from backend.core.config import settings
+from backend.core.metrics import InstrumentedQueuePool, instrumented, instrument_engine, pool_gauges
+from backend.core.slow_query_log import slow_query_log
+
 
+logger = logging.getLogger(__name__)
 
 class DatabaseHelper:
     def __init__(
@@ -10,14 +20,27 @@ class DatabaseHelper:
             echo: bool = False,
             pool_size: int = 5,
             max_overflow: int = 10,
+            pool_pre_ping: bool = True,
+            pool_recycle: int = 1800,
+            pool_timeout: int = 30,
+            replica_urls: Sequence[str] = (),
+            replica_pool_size: int = 5,
+            replica_max_overflow: int = 10,
+            replica_sticky_seconds: float = 5,
 
     ):
         self.engine: AsyncEngine = create_async_engine(
             url=url,
             echo=echo,
             pool_size=pool_size,
-            max_overflow=max_overflow
+            max_overflow=max_overflow,
+            pool_pre_ping=pool_pre_ping,
+            pool_recycle=pool_recycle,
+            pool_timeout=pool_timeout,
+            **self._pool_options()
         )
+        instrument_engine(self.engine, "primary")
+        slow_query_log.watch(self.engine, "primary")
 
         self.session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(
             bind=self.engine,
@@ -25,10 +48,89 @@ class DatabaseHelper:
             expire_on_commit=False
         )
 
+        # Реплики только для чтения каталога: у каждой свой пул, запись заказов их не касается
+        self.replica_engines: List[AsyncEngine] = [
+            create_async_engine(
+                url=replica_url,
+                echo=echo,
+                pool_size=replica_pool_size,
+                max_overflow=replica_max_overflow,
+                pool_pre_ping=pool_pre_ping,
+                pool_recycle=pool_recycle,
+                pool_timeout=pool_timeout,
+                **self._pool_options()
+            )
+            for replica_url in replica_urls
+        ]
+        for index, engine in enumerate(self.replica_engines):
+            instrument_engine(engine, f"replica_{index}")
+            slow_query_log.watch(engine, f"replica_{index}")
+        self.replica_session_factories: List[async_sessionmaker[AsyncSession]] = [
+            async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+            for engine in self.replica_engines
+        ]
+        self.replica_sticky_seconds = replica_sticky_seconds
+        self._next_replica = 0
+        self._primary_until = 0.0
+
+    @staticmethod
+    def _pool_options() -> dict:
+        return {"poolclass": InstrumentedQueuePool} if instrumented() else {}
+
+    def pools(self) -> Dict[str, AsyncEngine]:
+        engines = {"primary": self.engine}
+        for index, engine in enumerate(self.replica_engines):
+            engines[f"replica_{index}"] = engine
+        return engines
+
+    def mark_written(self) -> None:
+        # После правки каталога снимок перечитывается из основной базы, а не с отстающей реплики
+        self._primary_until = time.monotonic() + self.replica_sticky_seconds
+
+    def read_session(self) -> AsyncSession:
+        if not self.replica_session_factories or time.monotonic() < self._primary_until:
+            return self.session_factory()
+
+        factory = self.replica_session_factories[self._next_replica % len(self.replica_session_factories)]
+        self._next_replica += 1
+        return factory()
+
+    async def warm_up(self, connections: int) -> None:
+        # Соединения открываются одновременно и возвращаются в пул: первые запросы после деплоя
+        # не платят за TCP и авторизацию в MySQL. Больше pool_size открывать нет смысла -
+        # лишние соединения overflow закрываются сразу после возврата
+        for engine in [self.engine, *self.replica_engines]:
+            started = time.perf_counter()
+            count = min(connections, engine.pool.size()) if hasattr(engine.pool, "size") else 1
+            opened = [engine.connect() for _ in range(count)]
+            try:
+                await asyncio.gather(*[connection.start() for connection in opened])
+                await asyncio.gather(*[connection.execute(text("SELECT 1")) for connection in opened])
+            finally:
+                await asyncio.gather(*[connection.close() for connection in opened], return_exceptions=True)
+
+            logger.info(
+                "Пул %s прогрет: %s соединений за %.1f мс",
+                engine.url.host or engine.url.database, count, (time.perf_counter() - started) * 1000
+            )
+
+    async def dispose(self) -> None:
+        for engine in [self.engine, *self.replica_engines]:
+            await engine.dispose()
+        logger.info("Пулы соединений с базой закрыты")
+
 
 db_helper = DatabaseHelper(
     settings.db.url,
     settings.db.echo,
     settings.db.pool_size,
     settings.db.max_overflow,
-)
\ No newline at end of file
+    settings.db.pool_pre_ping,
+    settings.db.pool_recycle,
+    settings.db.pool_timeout,
+    settings.db.replica_urls,
+    settings.db.replica_pool_size,
+    settings.db.replica_max_overflow,
+    settings.db.replica_sticky_seconds,
+)
+pool_gauges(db_helper.pools)
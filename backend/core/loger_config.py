@@ -1,8 +1,73 @@
+import atexit
+import copy
+import json
 import logging
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+
+# Стандартные атрибуты LogRecord: всё остальное пришло через extra= и попадает в JSON отдельными полями
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    # Одна строка JSON на запись: сборщик логов разбирает поля без регулярок
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "line": record.lineno,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc_info"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class LocalQueueHandler(QueueHandler):
+    # Стандартный prepare() вклеивает traceback в msg и обнуляет exc_info - рассчитано на передачу
+    # записи в другой процесс. Очередь здесь в том же процессе, поэтому подставляются только аргументы
+    # (они могут измениться после вызова), а traceback форматирует обработчик в потоке слушателя
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    # Из access-лога uvicorn пропускается доля успешных запросов, ошибки (4xx, 5xx) пишутся всегда
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1:
+            return True
+        status_code = record.args[-1] if isinstance(record.args, tuple) and record.args else None
+        if isinstance(status_code, int) and status_code >= 400:
+            return True
+        return random.random() < self.rate
 
 
 class LogerConfig:
     loger_level = logging.WARNING
+    # Запись в поток идёт из отдельного потока QueueListener, event loop только кладёт запись в очередь
+    use_queue = True
+    json_format = False
+    access_log_sample_rate = 1.0
+
+    _listener: QueueListener | None = None
+    _stop_registered = False
 
     def setup_logging(self):
         log_format_str = "[%(asctime)s.%(msecs)03d] %(module)20s:%(lineno)-4d %(levelname)8s - %(message)s"
@@ -13,18 +78,44 @@ class LogerConfig:
 
         if root_logger.handlers:
             root_logger.handlers.clear()
+        self.stop_logging()
 
-        formatter = logging.Formatter(fmt=log_format_str, datefmt=date_format_str)
+        if self.json_format:
+            formatter = JsonFormatter()
+        else:
+            formatter = logging.Formatter(fmt=log_format_str, datefmt=date_format_str)
         console_handler = logging.StreamHandler()
         console_handler.setLevel(self.loger_level)
         console_handler.setFormatter(formatter)
 
-        root_logger.addHandler(console_handler)
+        handler = console_handler
+        if self.use_queue:
+            handler = LocalQueueHandler(queue.SimpleQueue())
+            handler.setLevel(self.loger_level)
+            self._listener = QueueListener(handler.queue, console_handler, respect_handler_level=True)
+            self._listener.start()
+            # Остаток очереди дописывается и при выходе без lifespan (скрипты, миграции)
+            if not self._stop_registered:
+                atexit.register(self.stop_logging)
+                self._stop_registered = True
+
+        root_logger.addHandler(handler)
 
         uvicorn_logger_names = ["uvicorn", "uvicorn.access", "uvicorn.error", "uvicorn.asgi"]
         for name in uvicorn_logger_names:
             uvicorn_logger = logging.getLogger(name)
             uvicorn_logger.setLevel(self.loger_level)
             uvicorn_logger.handlers.clear()
-            uvicorn_logger.addHandler(console_handler)
-            uvicorn_logger.propagate = False
\ No newline at end of file
+            uvicorn_logger.addHandler(handler)
+            uvicorn_logger.propagate = False
+
+        access_logger = logging.getLogger("uvicorn.access")
+        for log_filter in [log_filter for log_filter in access_logger.filters if isinstance(log_filter, SamplingFilter)]:
+            access_logger.removeFilter(log_filter)
+        if self.access_log_sample_rate < 1:
+            access_logger.addFilter(SamplingFilter(self.access_log_sample_rate))
+
+    def stop_logging(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
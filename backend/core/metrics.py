@@ -0,0 +1,256 @@
+import bisect
+import functools
+import hmac
+import inspect
+import ipaddress
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from backend.core.config import settings
+from backend.core.request_timing import request_timing
+
+
+# Метрики в текстовом формате Prometheus без сторонних библиотек: всё считается в потоке event loop,
+# поэтому хватает словарей без блокировок
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(
+            self,
+            name: str,
+            description: str,
+            labelnames: Sequence[str] = (),
+            collect: Callable[[], Dict[LabelValues, float]] | None = None
+    ):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        # Значения пула, счётчики кэшей и прочие снимки состояния считаются только в момент запроса /metrics
+        self._collect = collect
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        if self._collect is not None:
+            self._values = self._collect()
+        for labelvalues, value in self._values.items():
+            yield f"{self.name}{_labels(self.labelnames, labelvalues)} {value}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labelvalues: str, amount: float = 1) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, *labelvalues: str, value: float) -> None:
+        self._values[labelvalues] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # метки -> [счётчики по корзинам (последняя - +Inf), сумма]
+        self._values: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        entry = self._values.get(labelvalues)
+        if entry is None:
+            entry = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def samples(self) -> Iterable[str]:
+        for labelvalues, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                bucket_labels = _labels(self.labelnames, labelvalues, f'le="{bound}"')
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            cumulative += counts[-1]
+            bucket_labels = _labels(self.labelnames, labelvalues, 'le="+Inf"')
+            yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labelvalues)} {total}"
+            yield f"{self.name}_count{_labels(self.labelnames, labelvalues)} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: List[Any] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry(enabled=settings.metrics.enabled)
+
+_allowed_networks = [ipaddress.ip_network(network, strict=False) for network in settings.metrics.allowed_networks]
+
+
+def scrape_allowed(client_host: str | None, authorization: str) -> bool:
+    # В /metrics видны маршруты, время SQL и состояние пулов, поэтому наружу он не отдаётся
+    if settings.metrics.token:
+        return hmac.compare_digest(authorization.encode(), f"Bearer {settings.metrics.token}".encode())
+    try:
+        address = ipaddress.ip_address(client_host or "")
+    except ValueError:
+        return False
+    return any(address in network for network in _allowed_networks)
+
+http_requests_total = metrics.register(
+    Counter("http_requests_total", "Число HTTP-запросов", ("method", "route", "status"))
+)
+http_request_duration = metrics.register(
+    Histogram("http_request_duration_seconds", "Время обработки HTTP-запроса", ("method", "route"))
+)
+http_requests_in_flight = metrics.register(
+    Gauge("http_requests_in_flight", "HTTP-запросы в обработке", ("method",))
+)
+db_query_duration = metrics.register(
+    Histogram("db_query_duration_seconds", "Время SQL-запроса по методу репозитория", ("operation",), DB_BUCKETS)
+)
+db_pool_checkout_wait = metrics.register(
+    Histogram("db_pool_checkout_wait_seconds", "Ожидание соединения из пула", ("pool",), DB_BUCKETS)
+)
+
+
+# Метод репозитория, от имени которого идут SQL-запросы: ставится декоратором instrument_repository
+db_operation: ContextVar[str] = ContextVar("db_operation", default="other")
+
+
+def instrument_repository(cls):
+    # Каждый публичный async staticmethod класса помечает свои запросы именем "Класс.метод";
+    # запросы приватных помощников попадают в метод, который их вызвал
+    for name, attribute in list(vars(cls).items()):
+        if name.startswith("_") or not isinstance(attribute, staticmethod) or not inspect.iscoroutinefunction(attribute.__func__):
+            continue
+
+        def wrap(function, operation):
+            @functools.wraps(function)
+            async def wrapper(*args, **kwargs):
+                token = db_operation.set(operation)
+                # Для Server-Timing меряется только внешний вызов: вложенные репозитории уже внутри него
+                timing = request_timing.get() if token.old_value is Token.MISSING else None
+                started = time.perf_counter()
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    if timing is not None:
+                        timing.add("repository", time.perf_counter() - started)
+                    db_operation.reset(token)
+            return wrapper
+
+        setattr(cls, name, staticmethod(wrap(attribute.__func__, f"{cls.__name__}.{name}")))
+    return cls
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    # В SQLAlchemy нет события "начали ждать соединение", поэтому ожидание меряется вокруг выдачи из очереди
+    _metrics_name = "primary"
+
+    def _do_get(self):
+        timing = request_timing.get()
+        if not metrics.enabled and timing is None:
+            return super()._do_get()
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - started
+            if metrics.enabled:
+                db_pool_checkout_wait.observe(elapsed, self._metrics_name)
+            if timing is not None:
+                timing.add("pool", elapsed)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"]
+    if metrics.enabled:
+        db_query_duration.observe(elapsed, db_operation.get())
+    timing = request_timing.get()
+    if timing is not None:
+        timing.add("sql", elapsed)
+
+
+def instrumented() -> bool:
+    # Пул и события курсора нужны и метрикам, и заголовку Server-Timing
+    return metrics.enabled or settings.timing.enabled
+
+
+def instrument_engine(engine: AsyncEngine, name: str) -> None:
+    if not instrumented():
+        return
+
+    if isinstance(engine.pool, InstrumentedQueuePool):
+        engine.pool._metrics_name = name
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def pool_gauges(engines: Callable[[], Dict[str, AsyncEngine]]) -> None:
+    def collect(method: str) -> Callable[[], Dict[LabelValues, float]]:
+        def values() -> Dict[LabelValues, float]:
+            return {
+                (name,): getattr(engine.pool, method)()
+                for name, engine in engines().items()
+                if hasattr(engine.pool, method)
+            }
+        return values
+
+    metrics.register(Gauge("db_pool_size", "Размер пула соединений", ("pool",), collect("size")))
+    metrics.register(Gauge("db_pool_checked_out", "Выданные из пула соединения", ("pool",), collect("checkedout")))
+    metrics.register(Gauge("db_pool_checked_in", "Свободные соединения в пуле", ("pool",), collect("checkedin")))
+    metrics.register(Gauge("db_pool_overflow", "Соединения сверх pool_size", ("pool",), collect("overflow")))
+
+
+def stats_counters(name: str, description: str, label: str, stats: Callable[[], Dict[str, Any]], fields: Sequence[str]) -> None:
+    # Счётчики, которые компонент уже ведёт для своего stats(): одна метрика, поле - значение метки
+    def values() -> Dict[LabelValues, float]:
+        current = stats()
+        return {(field,): current[field] for field in fields}
+
+    metrics.register(Counter(name, description, (label,), values))
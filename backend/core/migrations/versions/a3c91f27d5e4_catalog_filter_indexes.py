@@ -0,0 +1,60 @@
+"""catalog filter indexes
+
+Revision ID: a3c91f27d5e4
+Revises: 6e43d39dd3cf
+Create Date: 2026-10-18 12:10:44.281903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c91f27d5e4'
+down_revision: Union[str, Sequence[str], None] = '6e43d39dd3cf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+CATALOG_INDEXES = {
+    'Devices': [
+        ('ix_devices_device_id_price', ['device_id', 'price']),
+        ('ix_devices_nalichie_price', ['nalichie', 'price']),
+        ('ix_devices_color_price', ['color', 'price']),
+        ('ix_devices_price_id', ['price', 'id']),
+        ('ix_devices_new_id', ['new', 'id']),
+        ('ix_devices_hit_id', ['hit', 'id']),
+    ],
+    'Iqos': [
+        ('ix_iqos_id_category_price', ['id_category', 'price']),
+        ('ix_iqos_nalichie_price', ['nalichie', 'price']),
+        ('ix_iqos_color_price', ['color', 'price']),
+        ('ix_iqos_price_id', ['price', 'id']),
+        ('ix_iqos_new_id', ['new', 'id']),
+        ('ix_iqos_hit_id', ['hit', 'id']),
+    ],
+    'Terea': [
+        ('ix_terea_terea_id_price', ['terea_id', 'price']),
+        ('ix_terea_nalichie_price', ['nalichie', 'price']),
+        ('ix_terea_strength_price', ['strength', 'price']),
+        ('ix_terea_price_id', ['price', 'id']),
+        ('ix_terea_new_id', ['new', 'id']),
+        ('ix_terea_hit_id', ['hit', 'id']),
+    ],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table_name, indexes in CATALOG_INDEXES.items():
+        for index_name, columns in indexes:
+            op.create_index(index_name, table_name, columns, unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name, indexes in CATALOG_INDEXES.items():
+        for index_name, columns in reversed(indexes):
+            op.drop_index(index_name, table_name=table_name)
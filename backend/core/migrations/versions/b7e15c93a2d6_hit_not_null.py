@@ -0,0 +1,42 @@
+"""hit not null
+
+Revision ID: b7e15c93a2d6
+Revises: f2a6d8e35b10
+Create Date: 2026-10-18 18:02:37.518244
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e15c93a2d6'
+down_revision: Union[str, Sequence[str], None] = 'f2a6d8e35b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+CATALOG_TABLES = ['Devices', 'Iqos', 'Terea']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Без NULL сортировка и фильтр по хиту идут по самой колонке и используют индекс (hit, id)
+    for table_name in CATALOG_TABLES:
+        op.execute(sa.text(f'UPDATE `{table_name}` SET hit = 0 WHERE hit IS NULL'))
+        op.alter_column(table_name, 'hit',
+                   existing_type=mysql.TINYINT(),
+                   nullable=False,
+                   server_default=sa.text('0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name in CATALOG_TABLES:
+        op.alter_column(table_name, 'hit',
+                   existing_type=mysql.TINYINT(),
+                   nullable=True,
+                   server_default=None)
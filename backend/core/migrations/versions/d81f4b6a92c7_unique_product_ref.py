@@ -0,0 +1,33 @@
+"""unique product ref
+
+Revision ID: d81f4b6a92c7
+Revises: a3c91f27d5e4
+Create Date: 2026-10-18 15:02:17.530614
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81f4b6a92c7'
+down_revision: Union[str, Sequence[str], None] = 'a3c91f27d5e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Миграция упадёт, если в таблице уже есть повторяющиеся ref - их нужно исправить вручную
+    op.create_index('ux_devices_ref', 'Devices', ['ref'], unique=True)
+    op.create_index('ux_iqos_ref', 'Iqos', ['ref'], unique=True)
+    op.create_index('ux_terea_ref', 'Terea', ['ref'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ux_terea_ref', table_name='Terea')
+    op.drop_index('ux_iqos_ref', table_name='Iqos')
+    op.drop_index('ux_devices_ref', table_name='Devices')
@@ -0,0 +1,88 @@
+"""customers
+
+Revision ID: e4b7c2d19f03
+Revises: d81f4b6a92c7
+Create Date: 2026-10-18 15:24:41.208337
+
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b7c2d19f03'
+down_revision: Union[str, Sequence[str], None] = 'd81f4b6a92c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Копия normalize_phone из orders_repository: миграция не должна зависеть от кода приложения
+def _normalize_phone(phone_number: str) -> str:
+    digits = re.sub(r"\D", "", phone_number)
+    if len(digits) == 11 and digits.startswith("8"):
+        return "7" + digits[1:]
+    if len(digits) == 10 and digits.startswith("9"):
+        return "7" + digits
+    return digits or phone_number.strip()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('Customers',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('phone', sa.VARCHAR(length=32), nullable=False),
+    sa.Column('customer_name', sa.VARCHAR(length=256), nullable=False),
+    sa.Column('first_order_at', sa.DateTime(), nullable=False),
+    sa.Column('last_order_at', sa.DateTime(), nullable=False),
+    sa.Column('orders_count', sa.Integer(), nullable=False),
+    sa.Column('total_spent', sa.DECIMAL(precision=14, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('phone')
+    )
+    op.add_column('Orders', sa.Column('customer_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('fk_orders_customer_id', 'Orders', 'Customers', ['customer_id'], ['id'])
+    op.create_index('ix_orders_customer_id_id', 'Orders', ['customer_id', 'id'], unique=False)
+
+    # Заполнение по уже существующим заказам
+    connection = op.get_bind()
+    orders = connection.execute(sa.text(
+        "SELECT id, phone_number, customer_name, total_amount, created_at FROM Orders ORDER BY id"
+    )).all()
+
+    customers = {}
+    for order in orders:
+        phone = _normalize_phone(order.phone_number)
+        customer = customers.setdefault(phone, {
+            'phone': phone,
+            'first_order_at': order.created_at,
+            'orders_count': 0,
+            'total_spent': 0,
+            'order_ids': [],
+        })
+        customer['customer_name'] = order.customer_name
+        customer['last_order_at'] = order.created_at
+        customer['orders_count'] += 1
+        customer['total_spent'] += order.total_amount
+        customer['order_ids'].append(order.id)
+
+    for customer in customers.values():
+        order_ids = customer.pop('order_ids')
+        customer_id = connection.execute(sa.text(
+            "INSERT INTO Customers (phone, customer_name, first_order_at, last_order_at, orders_count, total_spent) "
+            "VALUES (:phone, :customer_name, :first_order_at, :last_order_at, :orders_count, :total_spent)"
+        ), customer).lastrowid
+        connection.execute(
+            sa.text("UPDATE Orders SET customer_id = :customer_id WHERE id = :id"),
+            [{'customer_id': customer_id, 'id': order_id} for order_id in order_ids]
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('fk_orders_customer_id', 'Orders', type_='foreignkey')
+    op.drop_index('ix_orders_customer_id_id', table_name='Orders')
+    op.drop_column('Orders', 'customer_id')
+    op.drop_table('Customers')
@@ -0,0 +1,37 @@
+"""idempotency keys
+
+Revision ID: f2a6d8e35b10
+Revises: e4b7c2d19f03
+Create Date: 2026-10-18 15:41:09.773205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a6d8e35b10'
+down_revision: Union[str, Sequence[str], None] = 'e4b7c2d19f03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('Idempotency_keys',
+    sa.Column('key', sa.VARCHAR(length=128), nullable=False),
+    sa.Column('request_hash', sa.CHAR(length=64), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['Orders.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_Idempotency_keys_created_at'), 'Idempotency_keys', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_Idempotency_keys_created_at'), table_name='Idempotency_keys')
+    op.drop_table('Idempotency_keys')
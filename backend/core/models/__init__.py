@@ -6,4 +6,6 @@ from backend.core.models.iqos_category_model import IqosCategoryModel
 from backend.core.models.devices_model import DevicesModel
 from backend.core.models.devices_category_model import DevicesCategoryModel
 from backend.core.models.auth_model import AdminUserModel
-from backend.core.models.orders_model import OrderModel, OrderedProductModel
\ No newline at end of file
+from backend.core.models.customers_model import CustomerModel
+from backend.core.models.orders_model import OrderModel, OrderedProductModel
+from backend.core.models.idempotency_key_model import IdempotencyKeyModel
@@ -0,0 +1,26 @@
+import decimal
+from datetime import datetime
+from typing import List
+
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import VARCHAR, DECIMAL, Integer, DateTime
+
+from backend.core.models.base_model import BaseModel
+
+
+class CustomerModel(BaseModel):
+    __tablename__ = "Customers"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    # Только цифры, 8XXXXXXXXXX приводится к 7XXXXXXXXXX
+    phone: Mapped[str] = mapped_column(VARCHAR(32), unique=True)
+    customer_name: Mapped[str] = mapped_column(VARCHAR(256))
+    first_order_at: Mapped[datetime] = mapped_column(DateTime)
+    last_order_at: Mapped[datetime] = mapped_column(DateTime)
+    orders_count: Mapped[int] = mapped_column(Integer, default=0)
+    total_spent: Mapped[decimal.Decimal] = mapped_column(DECIMAL(precision=14, scale=2), default=0)
+
+    orders: Mapped[List["OrderModel"]] = relationship(back_populates="customer", order_by="OrderModel.id.desc()")
+
+    def __str__(self):
+        return f"Покупатель: {self.customer_name}, Телефон: {self.phone}, Заказов: {self.orders_count}"
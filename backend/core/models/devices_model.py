@@ -2,7 +2,7 @@ import decimal
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.mysql import LONGTEXT, TINYINT, ENUM
-from sqlalchemy import VARCHAR, DECIMAL, Integer, ForeignKey
+from sqlalchemy import VARCHAR, DECIMAL, Integer, ForeignKey, Index, text
 
 from backend.core.models.base_model import BaseModel
 from backend.core.models.emun_for_models import ENUM_COLORS
@@ -11,6 +11,15 @@ from backend.core.models.emun_for_models import ENUM_COLORS
 
 class DevicesModel(BaseModel):
     __tablename__ = "Devices"
+    __table_args__ = (
+        Index("ux_devices_ref", "ref", unique=True),
+        Index("ix_devices_device_id_price", "device_id", "price"),
+        Index("ix_devices_nalichie_price", "nalichie", "price"),
+        Index("ix_devices_color_price", "color", "price"),
+        Index("ix_devices_price_id", "price", "id"),
+        Index("ix_devices_new_id", "new", "id"),
+        Index("ix_devices_hit_id", "hit", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(VARCHAR(256))
@@ -19,7 +28,7 @@ class DevicesModel(BaseModel):
     price: Mapped[decimal.Decimal] = mapped_column(DECIMAL(precision=10, scale=0))
     nalichie: Mapped[int] = mapped_column(TINYINT(display_width=1))
     new: Mapped[int] = mapped_column(TINYINT)
-    hit: Mapped[int | None] = mapped_column(TINYINT, nullable=True)
+    hit: Mapped[int] = mapped_column(TINYINT, default=0, server_default=text("0"))
     color: Mapped[str] = mapped_column(ENUM(*ENUM_COLORS))
     ref: Mapped[str] = mapped_column(VARCHAR(256))
     type: Mapped[str] = mapped_column(VARCHAR(256))
@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import VARCHAR, CHAR, Integer, DateTime, ForeignKey
+
+from backend.core.models.base_model import BaseModel
+
+
+class IdempotencyKeyModel(BaseModel):
+    __tablename__ = "Idempotency_keys"
+
+    key: Mapped[str] = mapped_column(VARCHAR(128), primary_key=True)
+    # sha256 тела запроса: тот же ключ с другим заказом - ошибка клиента, а не повтор
+    request_hash: Mapped[str] = mapped_column(CHAR(64))
+    order_id: Mapped[int] = mapped_column(Integer, ForeignKey("Orders.id", ondelete="CASCADE"))
+    created_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+
+    def __str__(self):
+        return f"Ключ идемпотентности: {self.key}, Заказ: {self.order_id}"
@@ -2,7 +2,7 @@ import decimal
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.mysql import TEXT, LONGTEXT, ENUM, TINYINT
-from sqlalchemy import VARCHAR, DECIMAL, Integer, ForeignKey
+from sqlalchemy import VARCHAR, DECIMAL, Integer, ForeignKey, Index, text
 
 from backend.core.models.base_model import BaseModel
 from backend.core.models.emun_for_models import ENUM_COLORS
@@ -10,6 +10,15 @@ from backend.core.models.emun_for_models import ENUM_COLORS
 
 class IqosModel(BaseModel):
     __tablename__ = "Iqos"
+    __table_args__ = (
+        Index("ux_iqos_ref", "ref", unique=True),
+        Index("ix_iqos_id_category_price", "id_category", "price"),
+        Index("ix_iqos_nalichie_price", "nalichie", "price"),
+        Index("ix_iqos_color_price", "color", "price"),
+        Index("ix_iqos_price_id", "price", "id"),
+        Index("ix_iqos_new_id", "new", "id"),
+        Index("ix_iqos_hit_id", "hit", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(VARCHAR(256))
@@ -19,7 +28,7 @@ class IqosModel(BaseModel):
     price: Mapped[decimal.Decimal] = mapped_column(DECIMAL(precision=10, scale=0))
     color: Mapped[str] = mapped_column(ENUM(*ENUM_COLORS))
     new: Mapped[int] = mapped_column(TINYINT(display_width=1))
-    hit: Mapped[int | None] = mapped_column(TINYINT, nullable=True)
+    hit: Mapped[int] = mapped_column(TINYINT, default=0, server_default=text("0"))
     exclusive: Mapped[int | None] = mapped_column(TINYINT, nullable=True)
     nalichie: Mapped[int] = mapped_column(TINYINT(display_width=1))
     ref: Mapped[str] = mapped_column(VARCHAR(256))
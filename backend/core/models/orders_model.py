@@ -4,13 +4,16 @@ from typing import List
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.mysql import TEXT, TINYINT
-from sqlalchemy import VARCHAR, DECIMAL, Integer, DateTime, ForeignKey, func
+from sqlalchemy import VARCHAR, DECIMAL, Integer, DateTime, ForeignKey, Index, func
 
 from backend.core.models.base_model import BaseModel
 
 
 class OrderModel(BaseModel):
     __tablename__ = "Orders"
+    __table_args__ = (
+        Index("ix_orders_customer_id_id", "customer_id", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     is_first_order: Mapped[bool] = mapped_column(TINYINT(display_width=1))
@@ -21,8 +24,10 @@ class OrderModel(BaseModel):
     address: Mapped[str | None] = mapped_column(TEXT, nullable=True)
     total_amount: Mapped[decimal.Decimal] = mapped_column(DECIMAL(precision=12, scale=2))
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    customer_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("Customers.id"), nullable=True)
 
 
+    customer: Mapped["CustomerModel"] = relationship(back_populates="orders")
     ordered_items: Mapped[List["OrderedProductModel"]] = relationship(back_populates="order", cascade="all, delete-orphan")
 
     def __str__(self):
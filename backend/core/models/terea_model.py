@@ -2,7 +2,7 @@ import decimal
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.mysql import TEXT, LONGTEXT, TINYINT, SET, ENUM
-from sqlalchemy import VARCHAR, DECIMAL, Integer, ForeignKey
+from sqlalchemy import VARCHAR, DECIMAL, Integer, ForeignKey, Index, text
 
 from backend.core.models.base_model import BaseModel
 from backend.core.models.emun_for_models import SET_FLAVORS, ENUM_STRENGTHS
@@ -10,6 +10,15 @@ from backend.core.models.emun_for_models import SET_FLAVORS, ENUM_STRENGTHS
 
 class TereaModel(BaseModel):
     __tablename__ = "Terea"
+    __table_args__ = (
+        Index("ux_terea_ref", "ref", unique=True),
+        Index("ix_terea_terea_id_price", "terea_id", "price"),
+        Index("ix_terea_nalichie_price", "nalichie", "price"),
+        Index("ix_terea_strength_price", "strength", "price"),
+        Index("ix_terea_price_id", "price", "id"),
+        Index("ix_terea_new_id", "new", "id"),
+        Index("ix_terea_hit_id", "hit", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(VARCHAR(256))
@@ -25,7 +34,7 @@ class TereaModel(BaseModel):
     strength: Mapped[str] = mapped_column(ENUM(*ENUM_STRENGTHS))
     nalichie: Mapped[int] = mapped_column(TINYINT(display_width=1))
     new: Mapped[int] = mapped_column(TINYINT)
-    hit: Mapped[int | None] = mapped_column(TINYINT, nullable=True)
+    hit: Mapped[int] = mapped_column(TINYINT, default=0, server_default=text("0"))
     ref: Mapped[str] = mapped_column(VARCHAR(256))
     type: Mapped[str] = mapped_column(VARCHAR(256))
     terea_id: Mapped[int] = mapped_column(Integer, ForeignKey("Terea_category.id"))
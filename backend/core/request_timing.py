@@ -0,0 +1,75 @@
+import time
+from contextvars import ContextVar
+from typing import Dict, List
+
+
+# Фаза -> описание в Server-Timing. Заголовок только в latin-1, поэтому описания на английском
+PHASES = {
+    "pool": "pool checkout",
+    "sql": "sql",
+    "orm": "orm hydration",
+    "pydantic": "pydantic",
+    "json": "json encode",
+    "compress": "compress",
+}
+
+
+class RequestTiming:
+    def __init__(self):
+        self.started = time.perf_counter()
+        # фаза -> [суммарное время в секундах, число замеров]
+        self.phases: Dict[str, List[float]] = {}
+
+    def add(self, phase: str, seconds: float) -> None:
+        entry = self.phases.get(phase)
+        if entry is None:
+            self.phases[phase] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    def durations(self, total: float) -> Dict[str, float]:
+        # Время ORM не меряется отдельно: это время вызовов репозиториев без ожидания пула и SQL.
+        # При параллельных запросах (GET /products) фазы суммируются по всем задачам и могут превышать total
+        phases = {phase: seconds for phase, (seconds, _) in self.phases.items()}
+        repository = phases.pop("repository", None)
+        if repository is not None:
+            phases["orm"] = max(repository - phases.get("sql", 0.0) - phases.get("pool", 0.0), 0.0)
+        phases["total"] = total
+        return {phase: round(seconds * 1000, 3) for phase, seconds in phases.items()}
+
+    def server_timing(self, total: float) -> str:
+        parts = []
+        for phase, duration in self.durations(total).items():
+            part = f'{phase};dur={duration:.1f}'
+            if phase == "sql":
+                part += f';desc="{int(self.phases["sql"][1])} queries"'
+            elif phase in PHASES and PHASES[phase] != phase:
+                part += f';desc="{PHASES[phase]}"'
+            parts.append(part)
+        return ", ".join(parts)
+
+
+# Разбивка текущего HTTP-запроса; None вне запроса (фоновые задачи, старт), тогда замеры пропускаются
+request_timing: ContextVar[RequestTiming | None] = ContextVar("request_timing", default=None)
+
+
+def add_phase(phase: str, seconds: float) -> None:
+    timing = request_timing.get()
+    if timing is not None:
+        timing.add(phase, seconds)
+
+
+class timed_phase:
+    # Класс, а не @contextmanager: генератор на каждый вход заметно дороже, а фазы меряются на каждом запросе
+    def __init__(self, phase: str):
+        self.phase = phase
+        self.timing = request_timing.get()
+
+    def __enter__(self) -> None:
+        if self.timing is not None:
+            self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        if self.timing is not None:
+            self.timing.add(self.phase, time.perf_counter() - self.started)
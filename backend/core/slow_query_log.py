@@ -0,0 +1,202 @@
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from typing import Any, Dict, List, Set
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from backend.core.config import settings
+from backend.core.metrics import db_operation
+
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_OPERATION = "slow_query_log.explain"
+
+# Отпечаток запроса: литералы и плейсхолдеры заменяются на "?", списки IN и строки VALUES
+# сворачиваются, поэтому запросы с разными параметрами и длиной списков попадают в одну строку отчёта
+_FINGERPRINT_RULES = (
+    (re.compile(r"'(?:[^'\\]|\\.|'')*'"), "?"),
+    (re.compile(r"%\(\w+\)s|%s"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(?+)"),
+    (re.compile(r"\(\?\+\)(?:\s*,\s*\(\?\+\))+"), "(?+), ..."),
+    (re.compile(r"\s+"), " "),
+)
+
+
+def fingerprint(statement: str) -> str:
+    for pattern, replacement in _FINGERPRINT_RULES:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+def redact_parameters(parameters: Any) -> Any:
+    # В параметрах заказов телефоны, имена и адреса покупателей: в журнале остаются только типы значений
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+class SlowQueryLog:
+    def __init__(
+            self,
+            enabled: bool = False,
+            threshold_ms: int = 200,
+            explain: bool = False,
+            max_fingerprints: int = 500,
+            keep_parameters: bool = False
+    ):
+        self.enabled = enabled
+        self.threshold = threshold_ms / 1000
+        self.explain = explain
+        self.max_fingerprints = max_fingerprints
+        self.keep_parameters = keep_parameters
+        # отпечаток -> сводка: число, суммарное и максимальное время, вызывающие методы, самый медленный пример, план
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._explaining: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        # Планы снимаются по одному, чтобы журнал не занимал пул соединений
+        self._explain_limit = asyncio.Semaphore(1)
+
+        self.recorded = 0
+        self.evicted = 0
+        self.explained = 0
+
+    def watch(self, engine: AsyncEngine, name: str) -> None:
+        if not self.enabled:
+            return
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info["slow_query_started"] = time.perf_counter()
+
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info.pop("slow_query_started", None)
+            if started is None:
+                return
+            duration = time.perf_counter() - started
+            if duration >= self.threshold:
+                self.record(engine, name, statement, parameters, duration, executemany)
+
+        event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", after_cursor_execute)
+
+    def record(self, engine: AsyncEngine, pool: str, statement: str, parameters: Any, duration: float, executemany: bool) -> None:
+        operation = db_operation.get()
+        if operation == EXPLAIN_OPERATION:
+            return
+
+        key = fingerprint(statement)
+        entry = self._entries.get(key)
+        if entry is None:
+            if len(self._entries) >= self.max_fingerprints:
+                # Вытесняется отпечаток, который суммарно стоил меньше всех
+                cheapest = min(self._entries, key=lambda other: self._entries[other]["total"])
+                del self._entries[cheapest]
+                self.evicted += 1
+            entry = self._entries[key] = {
+                "id": hashlib.md5(key.encode()).hexdigest()[:12],
+                "fingerprint": key,
+                "count": 0,
+                "total": 0.0,
+                "max": 0.0,
+                "operations": {},
+                "pools": {},
+                "sample": None,
+                "sample_parameters": None,
+                "last_seen": 0.0,
+                "plan": None,
+                "plan_error": None,
+            }
+
+        entry["count"] += 1
+        entry["total"] += duration
+        entry["operations"][operation] = entry["operations"].get(operation, 0) + 1
+        entry["pools"][pool] = entry["pools"].get(pool, 0) + 1
+        entry["last_seen"] = time.time()
+        if duration >= entry["max"]:
+            entry["max"] = duration
+            entry["sample"] = statement
+            if executemany:
+                entry["sample_parameters"] = None
+            else:
+                entry["sample_parameters"] = parameters if self.keep_parameters else redact_parameters(parameters)
+        self.recorded += 1
+
+        logger.warning("Медленный запрос %.1f мс [%s, %s]: %s", duration * 1000, operation, pool, key[:500])
+
+        if self.explain and entry["plan"] is None and not executemany:
+            self._schedule_explain(engine, key, statement, parameters)
+
+    def _schedule_explain(self, engine: AsyncEngine, key: str, statement: str, parameters: Any) -> None:
+        # EXPLAIN только для чтения: план INSERT/UPDATE тоже строится, но индексы ищем по выборкам
+        if key in self._explaining or not statement.lstrip().upper().startswith("SELECT"):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Запрос вне event loop (миграции alembic): план не снимаем
+            return
+
+        self._explaining.add(key)
+        task = loop.create_task(self._explain(engine, key, statement, parameters))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, engine: AsyncEngine, key: str, statement: str, parameters: Any) -> None:
+        token = db_operation.set(EXPLAIN_OPERATION)
+        try:
+            async with self._explain_limit:
+                async with engine.connect() as connection:
+                    result = await connection.exec_driver_sql(f"EXPLAIN {statement}", parameters or None)
+                    plan = {"columns": list(result.keys()), "rows": [tuple(row) for row in result.fetchall()]}
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["plan"] = plan
+            self.explained += 1
+        except Exception as error:
+            logger.warning("Не удалось снять EXPLAIN для медленного запроса: %s", error)
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["plan_error"] = str(error)
+        finally:
+            self._explaining.discard(key)
+            db_operation.reset(token)
+
+    def top(self, limit: int, order_by: str = "total") -> List[Dict[str, Any]]:
+        if order_by not in ("total", "max", "count"):
+            order_by = "total"
+        entries = sorted(self._entries.values(), key=lambda entry: entry[order_by], reverse=True)[:limit]
+        return [
+            {**entry, "avg": entry["total"] / entry["count"] if entry["count"] else 0.0}
+            for entry in entries
+        ]
+
+    def reset(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold * 1000,
+            "explain": self.explain,
+            "keep_parameters": self.keep_parameters,
+            "fingerprints": len(self._entries),
+            "recorded": self.recorded,
+            "evicted": self.evicted,
+            "explained": self.explained,
+        }
+
+
+slow_query_log = SlowQueryLog(
+    enabled=settings.slow_queries.enabled,
+    threshold_ms=settings.slow_queries.threshold_ms,
+    explain=settings.slow_queries.explain,
+    max_fingerprints=settings.slow_queries.max_fingerprints,
+    keep_parameters=settings.slow_queries.keep_parameters,
+)
@@ -1,22 +1,71 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from uvicorn import run
 from sqladmin import Admin
+from starlette.middleware import Middleware
 
-from backend.app.admin import admin_views
+from backend.app.admin import admin_views, AdminOperationMiddleware, ADMIN_TEMPLATES_DIR
+from backend.app.api.middlewares.metrics_middleware import MetricsMiddleware
+from backend.app.api.middlewares.payload_cache_middleware import PayloadCacheMiddleware
+from backend.app.api.middlewares.server_timing_middleware import ServerTimingMiddleware
 from backend.app.api.routers.products_routers import router as products_router
 from backend.app.api.routers.orders_routers import router as orders_router
 from backend.app.auth.admin_auth import authentication_backend
+from backend.app.services.order_queue import order_queue
+from backend.app.services.products_service import DevicesService
 from backend.core.config import settings
 from backend.core.db_helper import db_helper
+from backend.core.metrics import metrics, scrape_allowed
 
 
 settings.log.setup_logging()
 logger = logging.getLogger(__name__)
 
+async def warm_up(app: FastAPI) -> bool:
+    try:
+        await db_helper.warm_up(settings.db.warmup_connections)
+        await DevicesService.warm_up_catalog()
+    except Exception as error:
+        logger.warning("Не удалось прогреть пул и каталог при старте: %s", error)
+        return False
+
+    app.state.ready = True
+    logger.info("Прогрев завершён, приложение готово принимать запросы")
+    return True
+
+
+async def retry_warm_up(app: FastAPI) -> None:
+    # База была недоступна при старте: /ready остаётся красным, пока прогрев не пройдёт
+    delay = 1
+    while not await warm_up(app):
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 30)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    retry_task = None
+    if not await warm_up(app):
+        retry_task = asyncio.create_task(retry_warm_up(app))
+
+    order_queue.start()
+    yield
+
+    app.state.ready = False
+    if retry_task is not None:
+        retry_task.cancel()
+    # Принятые в очередь заказы дописываются до остановки воркера
+    await order_queue.stop()
+    await db_helper.dispose()
+
+
 def create_application() -> FastAPI:
-    app = FastAPI(title="IlumaStore", version="1.0.0", docs_url="/docs", redoc_url="/redoc")
+    app = FastAPI(title="IlumaStore", version="1.0.0", docs_url="/docs", redoc_url="/redoc", lifespan=lifespan)
 
     router = APIRouter(tags=["root"])
     @router.get("/")
@@ -27,11 +76,37 @@ def create_application() -> FastAPI:
             "admin": "/admin"
         }
 
+    @router.get("/ready")
+    async def ready(request: Request):
+        if not getattr(request.app.state, "ready", False):
+            return JSONResponse(status_code=503, content={"status": "warming_up"})
+        return {"status": "ready"}
+
+    if settings.metrics.enabled:
+        @router.get(settings.metrics.path, include_in_schema=False)
+        async def prometheus_metrics(request: Request):
+            client_host = request.client.host if request.client else None
+            if not scrape_allowed(client_host, request.headers.get("authorization", "")):
+                return PlainTextResponse("Forbidden", status_code=403)
+            return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
     app.include_router(router)
     app.include_router(products_router)
     app.include_router(orders_router)
 
-    admin = Admin(app, db_helper.engine, authentication_backend=authentication_backend)
+    # ?concurrent= в GET /products сравнивает режимы загрузки, поэтому такие запросы кэш не обслуживает
+    app.add_middleware(PayloadCacheMiddleware, path_prefix=products_router.prefix, bypass_params=("concurrent",))
+    app.add_middleware(ServerTimingMiddleware)
+    # Добавлен последним, значит внешний: во время запроса входит и ответ из кэша ответов
+    app.add_middleware(MetricsMiddleware, metrics_path=settings.metrics.path)
+
+    admin = Admin(
+        app,
+        db_helper.engine,
+        authentication_backend=authentication_backend,
+        templates_dir=ADMIN_TEMPLATES_DIR,
+        middlewares=[Middleware(AdminOperationMiddleware)]
+    )
     for view in admin_views:
         admin.add_view(view)
 
@@ -0,0 +1,41 @@
+import json
+import logging
+
+import pytest
+
+from backend.core.loger_config import LogerConfig
+
+
+@pytest.fixture
+def loger_config():
+    config = LogerConfig()
+    config.loger_level = logging.INFO
+    config.use_queue = True
+    config.json_format = True
+    yield config
+    config.stop_logging()
+    logging.root.handlers.clear()
+
+
+def test_exception_through_queue_keeps_exc_info(loger_config, capsys):
+    loger_config.setup_logging()
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        logging.getLogger("tests").error("Ошибка заказа %s", 42, exc_info=True)
+    # Остановка слушателя дописывает очередь
+    loger_config.stop_logging()
+
+    records = [json.loads(line) for line in capsys.readouterr().err.splitlines()]
+    assert len(records) == 1
+    assert records[0]["message"] == "Ошибка заказа 42"
+    assert "ZeroDivisionError" in records[0]["exc_info"]
+    assert "Traceback" not in records[0]["message"]
+
+
+def test_repeated_setup_registers_one_exit_hook(loger_config, monkeypatch):
+    registered = []
+    monkeypatch.setattr("backend.core.loger_config.atexit.register", registered.append)
+    loger_config.setup_logging()
+    loger_config.setup_logging()
+    assert len(registered) == 1